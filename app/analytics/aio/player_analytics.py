@@ -0,0 +1,34 @@
+from app.analytics.player_analytics import (
+    PLAYER_AVERAGES_SQL,
+    PLAYER_TOTALS_SQL,
+)
+from app.db.rows import map_row, mapped_cursor
+
+# Async mirror of app.analytics.player_analytics for the API request path.
+
+
+async def get_player_totals(conn, player_id, start=None, end=None):
+    """
+    Returns total stats for a player across all games, or those in [start, end].
+    """
+    cursor = mapped_cursor(conn)
+
+    await cursor.execute(
+        PLAYER_TOTALS_SQL,
+        (player_id, start, end)
+    )
+
+    return map_row(cursor, await cursor.fetchone())
+
+async def get_player_averages(conn, player_id, start=None, end=None):
+    """
+    Returns per-game averages for a player.
+    """
+    cursor = mapped_cursor(conn)
+
+    await cursor.execute(
+        PLAYER_AVERAGES_SQL,
+        (player_id, start, end)
+    )
+
+    return map_row(cursor, await cursor.fetchone())
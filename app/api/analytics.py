@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends
-from app.api.deps import get_db
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.api.etag import GLOBAL, PLAYER, conditional
+from app.api.deps import DateRange, PageParams, date_range, get_db, page_params, set_page_headers, sparse_fields
 from app.api.models import PlayerTotalsOut, PlayerAveragesOut
-from app.analytics.player_analytics import get_player_totals, get_player_averages
+from app.api.responses import json_response
+from app.analytics.aio.player_analytics import get_player_totals, get_player_averages
 from app.api.auth_deps import get_current_user
-from app.services.analytics_service import player_totals_and_averages, leaders
-from app.services.team_stats_service import (
+from app.db.pagination import aestimate_count
+from app.services.aio.analytics_service import current_player_analytics_pager, leaders, player_analytics_page
+from app.services.analytics_service import PLAYER_ANALYTICS_COLUMNS, leader_metrics
+from app.services.team_stats_service import STAT_COLUMNS
+from app.services.aio.team_stats_service import (
     get_team_totals,
     get_team_averages,
     get_team_splits_totals,
@@ -13,55 +20,68 @@ from app.services.team_stats_service import (
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
-@router.get("/players/{player_id}/totals", response_model=PlayerTotalsOut, dependencies=[Depends(get_current_user)])
-def player_totals(player_id: int, conn=Depends(get_db)):
-    row = get_player_totals(conn, player_id)
-    return dict(row)
+@router.get("/players/{player_id}/totals", response_model=PlayerTotalsOut, dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_totals(player_id: int, window: DateRange = Depends(date_range), conn=Depends(get_db)):
+    row = await get_player_totals(conn, player_id, window.start, window.end)
+    return row
 
-@router.get("/players/{player_id}/averages", response_model=PlayerAveragesOut, dependencies=[Depends(get_current_user)])
-def player_averages(player_id: int, conn=Depends(get_db)):
-    row = get_player_averages(conn, player_id)
-    return dict(row)
+@router.get("/players/{player_id}/averages", response_model=PlayerAveragesOut, dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_averages(player_id: int, window: DateRange = Depends(date_range), conn=Depends(get_db)):
+    row = await get_player_averages(conn, player_id, window.start, window.end)
+    return row
 
-@router.get("/players", dependencies=[Depends(get_current_user)])
-def analytics_players(conn=Depends(get_db)):
-    rows = player_totals_and_averages(conn)
-    return [dict(r) for r in rows]
+@router.get("/players", dependencies=[Depends(get_current_user), conditional(GLOBAL)])
+async def analytics_players(
+    request: Request,
+    response: Response,
+    paging: PageParams = Depends(page_params),
+    fields=sparse_fields(PLAYER_ANALYTICS_COLUMNS),
+    conn=Depends(get_db),
+):
+    """
+    Sorts by points (default -points), avg_points, rebounds, assists,
+    minutes, gp or name; see page_params for paging. ?fields=total_points,gp
+    narrows each row to those columns (plus the player and the sort key).
+    """
+    try:
+        page = await player_analytics_page(conn, paging.sort, paging.cursor, paging.limit, fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    total = None
+    if paging.estimate:
+        total = await aestimate_count(conn, current_player_analytics_pager(fields, paging.sort))
+    set_page_headers(request, response, page, total)
+    return json_response(page.rows, response)
 
-@router.get("/leaders", dependencies=[Depends(get_current_user)])
-def analytics_leaders(conn=Depends(get_db), limit: int = 5):
-    data = leaders(conn, limit=limit)
-    return {
-        "minutes": [dict(r) for r in data["minutes"]],
-        "points": [dict(r) for r in data["points"]],
-        "rebounds": [dict(r) for r in data["rebounds"]],
-        "OREB": [dict(r) for r in data["OREB"]],
-        "assists": [dict(r) for r in data["assists"]],
-        "steals": [dict(r) for r in data["steals"]],
-        "blocks": [dict(r) for r in data["blocks"]],
-        "turnovers": [dict(r) for r in data["turnovers"]],
-        "fouls": [dict(r) for r in data["fouls"]],
-        "FG": [dict(r) for r in data["FG"]],
-        "FGA": [dict(r) for r in data["FGA"]],
-        "FG3": [dict(r) for r in data["FG3"]],
-        "FGA3": [dict(r) for r in data["FGA3"]],
-        "FT": [dict(r) for r in data["FT"]],
-        "FTA": [dict(r) for r in data["FTA"]],
-        "PM": [dict(r) for r in data["PM"]],
-    }
+@router.get("/leaders", dependencies=[Depends(get_current_user), conditional(GLOBAL)])
+async def analytics_leaders(response: Response, conn=Depends(get_db), limit: int = 5, metrics: Optional[str] = None):
+    """
+    ?metrics=points,rebounds limits the response to those boards.
+    """
+    requested = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else None
+    try:
+        requested = leader_metrics(requested)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    data = await leaders(conn, limit=limit, metrics=requested)
+    return json_response({metric: data[metric] for metric in requested}, response)
 
-@router.get("/team/totals", dependencies=[Depends(get_current_user)])
-def team_totals(conn=Depends(get_db)):
-    return get_team_totals(conn)
+@router.get("/team/totals", dependencies=[Depends(get_current_user), conditional(GLOBAL)])
+async def team_totals(window: DateRange = Depends(date_range), conn=Depends(get_db)):
+    return await get_team_totals(conn, window.start, window.end)
 
-@router.get("/team/averages", dependencies=[Depends(get_current_user)])
-def team_averages(conn=Depends(get_db)):
-    return get_team_averages(conn)
+@router.get("/team/averages", dependencies=[Depends(get_current_user), conditional(GLOBAL)])
+async def team_averages(window: DateRange = Depends(date_range), conn=Depends(get_db)):
+    return await get_team_averages(conn, window.start, window.end)
 
-@router.get("/team/splits/totals", dependencies=[Depends(get_current_user)])
-def team_splits_totals(conn=Depends(get_db)):
-    return get_team_splits_totals(conn)
+@router.get("/team/splits/totals", dependencies=[Depends(get_current_user), conditional(GLOBAL)])
+async def team_splits_totals(
+    window: DateRange = Depends(date_range), conn=Depends(get_db), fields=sparse_fields(STAT_COLUMNS)
+):
+    return await get_team_splits_totals(conn, window.start, window.end, fields)
 
-@router.get("/team/splits/averages", dependencies=[Depends(get_current_user)])
-def team_splits_averages(conn=Depends(get_db)):
-    return get_team_splits_averages(conn)
+@router.get("/team/splits/averages", dependencies=[Depends(get_current_user), conditional(GLOBAL)])
+async def team_splits_averages(
+    window: DateRange = Depends(date_range), conn=Depends(get_db), fields=sparse_fields(STAT_COLUMNS)
+):
+    return await get_team_splits_averages(conn, window.start, window.end, fields)
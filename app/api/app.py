@@ -1,27 +1,57 @@
+from app.api.startup import FirstResponseTimer, elapsed_ms, record
 from contextlib import asynccontextmanager
+import asyncio
 import os
+import time
 from fastapi import FastAPI
 from app.api.players import router as players_router
 from app.api.games import router as games_router
 from app.api.stats import router as stats_router
 from app.api.analytics import router as analytics_router
-from app.db.connect import get_connection
-from app.db.schema import init_db
+from app.api.metrics import router as metrics_router
+from app.api.exports import router as exports_router
+from app.api.compression import CompressionMiddleware
+from app.api.responses import ORJSONResponse
+from app.db.hash_pool import shutdown_hash_pool, start_hash_pool
+from app.db.pool import acquire_async, open_async_pool, open_replica_pool, close_async_pool, release_async
+from app.db.schema import ensure_schema
+from app.services.aio.analytics_service import cancel_season_refresh
+from app.services.result_cache import CACHE_ENABLED, get_backend
 from app.api.auth import router as auth_router
 from fastapi.middleware.cors import CORSMiddleware
 
+async def _ensure_schema(pool):
+    # One pooled connection and, normally, one SELECT of schema_version.
+    started = time.perf_counter()
+    conn = await acquire_async(pool)
+    try:
+        ran = await ensure_schema(conn)
+    finally:
+        await release_async(pool, conn)
+    record(schema_ms=elapsed_ms(started), schema_ddl=ran)
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    conn = get_connection()
-    init_db(conn)
-    conn.close()
-    yield
+    started = time.perf_counter()
+    pool, _ = await asyncio.gather(open_async_pool(), open_replica_pool())
+    await _ensure_schema(pool)
+    if CACHE_ENABLED:
+        await get_backend().setup()
+    start_hash_pool()
+    record(lifespan_ms=elapsed_ms(started))
+    try:
+        yield
+    finally:
+        await cancel_season_refresh()
+        await close_async_pool()
+        shutdown_hash_pool()
 
 app = FastAPI(
     title="CDB API",
     description="Club Database REST API",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.include_router(players_router)
@@ -29,6 +59,8 @@ app.include_router(games_router)
 app.include_router(stats_router)
 app.include_router(analytics_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
+app.include_router(exports_router)
 
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",")
 app.add_middleware(
@@ -38,4 +70,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Estimate", "Link"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(FirstResponseTimer)
+
+record(import_ms=elapsed_ms())
@@ -4,8 +4,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 
 from app.api.deps import get_db
 from app.api.auth_deps import require_admin, get_current_user
+from app.db.hash_pool import HashingBusy
 from app.db.security import create_access_token
-from app.services.user_service import authenticate_user, create_user
+from app.services.aio.token_service import issue_refresh_token, rotate_refresh_token
+from app.services.aio.user_service import authenticate_user, create_user, set_user_role
 
 from pydantic import BaseModel, Field
 
@@ -14,6 +16,12 @@ class UserCreate(BaseModel):
     password: str = Field(min_length=6, max_length=200)
     role: str = "viewer"
 
+class RoleUpdate(BaseModel):
+    role: str
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 def _row_field(row, field: str, index: int):
     if row is None:
         return None
@@ -21,31 +29,80 @@ def _row_field(row, field: str, index: int):
         return row.get(field)
     return row[index]
 
+def _busy():
+    return HTTPException(
+        status_code=503,
+        detail="Too many logins in progress, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+def _access_token(user) -> str:
+    return create_access_token(
+        {
+            "sub": _row_field(user, "username", 1),
+            "role": _row_field(user, "role", 3),
+            "ver": _row_field(user, "token_version", 5) or 0,
+        }
+    )
+
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/token")
-def login(form: OAuth2PasswordRequestForm = Depends(), conn=Depends(get_db)):
-    user = authenticate_user(conn, form.username, form.password)
+async def login(form: OAuth2PasswordRequestForm = Depends(), conn=Depends(get_db)):
+    try:
+        user = await authenticate_user(conn, form.username, form.password)
+    except HashingBusy:
+        raise _busy()
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
-    
-    token = create_access_token(
-        {"sub": _row_field(user, "username", 1), "role": _row_field(user, "role", 3)}
-    )
-    return {"access_token": token, "token_type": "bearer"}
+
+    refresh_token = await issue_refresh_token(conn, user)
+    return {"access_token": _access_token(user), "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.post("/refresh")
+async def refresh(payload: RefreshRequest, conn=Depends(get_db)):
+    """
+    Trades a refresh token for a new access token and refresh token,
+    without a password check.
+    """
+    rotated = await rotate_refresh_token(conn, payload.refresh_token)
+    if rotated is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    user, refresh_token = rotated
+    return {"access_token": _access_token(user), "token_type": "bearer", "refresh_token": refresh_token}
 
 @router.post("/users")
-def admin_create_user(
+async def admin_create_user(
     payload: UserCreate,
     conn=Depends(get_db),
     _admin=Depends(require_admin),
 ):
     try:
-        user_id = create_user(conn, payload.username, payload.password, payload.role)
+        user_id = await create_user(conn, payload.username, payload.password, payload.role)
         return {"user_id": user_id}
     except psycopg.errors.UniqueViolation:
         raise HTTPException(status_code=409, detail="Username already exists")
+    except HashingBusy:
+        raise _busy()
     
+@router.put("/users/{username}/role")
+async def admin_set_user_role(
+    username: str,
+    payload: RoleUpdate,
+    conn=Depends(get_db),
+    _admin=Depends(require_admin),
+):
+    """
+    Changes a user's role. Their existing tokens stop working.
+    """
+    try:
+        updated = await set_user_role(conn, username, payload.role)
+    except psycopg.errors.CheckViolation:
+        raise HTTPException(status_code=422, detail="Unknown role")
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"username": username, "role": payload.role}
+
 @router.get("/me")
-def me(user=Depends(get_current_user)):
+async def me(user=Depends(get_current_user)):
     return {"username": user["username"], "role": user["role"]}
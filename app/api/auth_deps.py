@@ -1,28 +1,51 @@
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
 
-from app.api.deps import get_db
-from app.db.security import decode_token
-from app.services.user_service import get_user_by_username
+from app.db.pool import acquire_async, get_async_pool, release_async
+from app.db.security import InvalidToken, decode_token
+from app.services.aio.user_service import get_user_by_username
+from app.services.user_cache import cache_user, get_cached_user
 
 oauth_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user(token: str = Depends(oauth_scheme), conn=Depends(get_db)):
+@asynccontextmanager
+async def user_connection():
+    """
+    Connection for user lookups on a cache miss. Always the primary: a
+    replica could still hold the role or token version being revoked.
+    """
+    pool = await get_async_pool()
+    conn = await acquire_async(pool)
+    try:
+        yield conn
+    finally:
+        await release_async(pool, conn)
+
+async def get_current_user(token: str = Depends(oauth_scheme)):
     try:
         payload = decode_token(token)
         username = payload.get("sub")
         if not username:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    
-    user = get_user_by_username(conn, username)
-    if user is None:
+    except InvalidToken:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    token_version = payload.get("ver", 0)
+
+    # A token newer than the cached user means the cache is behind.
+    user = get_cached_user(username)
+    if user is None or user["token_version"] < token_version:
+        async with user_connection() as conn:
+            user = await get_user_by_username(conn, username)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = cache_user(user)
+    if user["token_version"] != token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
     return user
 
-def require_admin(user=Depends(get_current_user)):
+async def require_admin(user=Depends(get_current_user)):
     if user["role"] != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
-    return user
\ No newline at end of file
+    return user
@@ -1,9 +1,130 @@
-from typing import Generator
-from app.db.connect import get_connection
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import AsyncGenerator, NamedTuple, Optional
+from fastapi import Depends, HTTPException, Query, Request, Response
 
-def get_db() -> Generator:
-    conn = get_connection()
+from app.db.fieldsets import parse_fields
+from app.db.pagination import Page
+from app.db.pool import acquire_async, get_async_pool, get_replica_pool, release_async
+from app.db.routing import pinned_lsn, record_write, release_pin, replica_caught_up, track_writes
+from app.db.security import InvalidToken, decode_token
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+def _request_subject(request: Request):
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        return decode_token(auth[7:]).get("sub")
+    except InvalidToken:
+        return None
+
+async def _read_connection(subject):
+    """
+    Returns (pool, conn) for a read: the replica unless the subject has a
+    recent write the replica hasn't replayed yet.
+    """
+    replica = await get_replica_pool()
+    if replica is not None:
+        conn = await acquire_async(replica)
+        lsn = pinned_lsn(subject)
+        if lsn is None:
+            return replica, conn
+        try:
+            caught_up = await replica_caught_up(conn, lsn)
+        except Exception:
+            caught_up = False
+        if caught_up:
+            release_pin(subject)
+            return replica, conn
+        await release_async(replica, conn)
+
+    pool = await get_async_pool()
+    return pool, await acquire_async(pool)
+
+async def get_db(request: Request) -> AsyncGenerator:
+    subject = _request_subject(request)
+    is_read = request.method in READ_METHODS
+    if is_read:
+        pool, conn = await _read_connection(subject)
+    else:
+        pool = await get_async_pool()
+        conn = await acquire_async(pool)
+    try:
+        with track_writes() as writes:
+            yield conn
+        if writes["wrote"] and await get_replica_pool() is not None:
+            await record_write(subject, conn)
+    finally:
+        await release_async(pool, conn)
+
+@asynccontextmanager
+async def stream_connection(request: Request):
+    """
+    A read connection owned by a streaming response body, which keeps
+    using it after the route (and get_db) have returned.
+    """
+    pool, conn = await _read_connection(_request_subject(request))
     try:
         yield conn
     finally:
-        conn.close()
\ No newline at end of file
+        await release_async(pool, conn)
+
+
+class DateRange(NamedTuple):
+    start: Optional[date]
+    end: Optional[date]
+
+def date_range(start: Optional[date] = None, end: Optional[date] = None) -> DateRange:
+    """
+    Optional ?start=&end= ISO dates, both inclusive, pushed into the SQL.
+    """
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=422, detail="start must be on or before end")
+    return DateRange(start, end)
+
+
+class PageParams(NamedTuple):
+    sort: Optional[str]
+    cursor: Optional[str]
+    limit: Optional[int]
+    estimate: bool
+
+def page_params(
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    estimate: bool = False,
+) -> PageParams:
+    """
+    ?sort=name (-name descends), ?cursor= from the previous page's
+    X-Next-Cursor, ?limit= (capped at PAGE_MAX_LIMIT) and ?estimate=true
+    for an X-Total-Estimate header. Without limit or cursor the whole list
+    is returned.
+    """
+    return PageParams(sort, cursor, limit, estimate)
+
+def set_page_headers(request: Request, response: Response, page: Page, total_estimate: Optional[int] = None):
+    """
+    List bodies stay plain arrays; the next page is advertised in headers.
+    """
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+        next_url = request.url.include_query_params(cursor=page.next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    if total_estimate is not None:
+        response.headers["X-Total-Estimate"] = str(total_estimate)
+
+def sparse_fields(allowed):
+    """
+    Route dependency: ?fields=points,rebounds parsed against allowed (None
+    when absent); unknown fields are a 422 before any query runs.
+    """
+    def parse(fields: Optional[str] = None) -> Optional[tuple]:
+        try:
+            return parse_fields(fields, allowed)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+    return Depends(parse)
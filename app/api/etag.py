@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from app.api.deps import get_db
+from app.db.versions import GLOBAL_SCOPE, game_scope, player_scope, read_versions
+
+# Conditional GETs. A read route declares which data-version scopes its
+# response depends on; the ETag hashes the path, query string and those
+# versions, so a matching If-None-Match is answered with 304 after one
+# primary-key lookup instead of the route's queries.
+#
+# Cache-Control defaults to HTTP_CACHE_CONTROL. HTTP_CACHE_CONTROL_ROUTES is
+# a JSON object mapping route paths (as declared, e.g.
+# "/analytics/leaders") to their own directives.
+
+DEFAULT_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "private, no-cache")
+CACHE_CONTROL_ROUTES = json.loads(os.getenv("HTTP_CACHE_CONTROL_ROUTES", "{}"))
+
+GLOBAL = GLOBAL_SCOPE
+PLAYER = player_scope("{player_id}")
+GAME = game_scope("{game_id}")
+
+
+def make_etag(path: str, query: str, versions: dict) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(f"{path}?{query}".encode())
+    for scope in sorted(versions):
+        digest.update(f"|{scope}={versions[scope]}".encode())
+    # Weak: the body is equivalent, not byte-identical, across encodings.
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_control_for(request: Request, default: str = None) -> str:
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    return CACHE_CONTROL_ROUTES.get(path) or default or DEFAULT_CACHE_CONTROL
+
+
+def conditional(*scopes: str, cache_control: str = None):
+    """
+    Route dependency: sets ETag/Cache-Control from the versions of scopes
+    (formatted with the path params), or answers 304 when If-None-Match
+    already has them.
+    """
+    async def check(request: Request, response: Response, conn=Depends(get_db)):
+        names = [scope.format(**request.path_params) for scope in scopes]
+        versions = await read_versions(conn, names)
+        headers = {
+            "ETag": make_etag(request.url.path, request.url.query, versions),
+            "Cache-Control": cache_control_for(request, cache_control),
+        }
+        if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(check)
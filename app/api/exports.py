@@ -0,0 +1,86 @@
+from typing import NamedTuple, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.auth_deps import get_current_user
+from app.api.compression import negotiate_encoding
+from app.api.deps import DateRange, date_range, stream_connection
+from app.services.aio.export_service import gzip_chunks, stream_export
+from app.services.export_service import EXPORT_FORMATS, export_params
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+class ExportFilters(NamedTuple):
+    player_id: Optional[int]
+    game_id: Optional[int]
+    window: DateRange
+
+
+def export_filters(
+    player_id: Optional[int] = None,
+    game_id: Optional[int] = None,
+    window: DateRange = Depends(date_range),
+) -> ExportFilters:
+    return ExportFilters(player_id, game_id, window)
+
+
+def _export_response(request: Request, kind: str, filename: str, fmt: str, filters: ExportFilters):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    params = export_params(kind, filters.player_id, filters.game_id, filters.window.start, filters.window.end)
+    compress = negotiate_encoding(request.headers.get("accept-encoding"), ("gzip",)) == "gzip"
+
+    async def body():
+        # The body owns its connection: it runs after the route returns.
+        async with stream_connection(request) as conn:
+            chunks = stream_export(conn, kind, params, fmt)
+            if compress:
+                chunks = gzip_chunks(chunks)
+            async for chunk in chunks:
+                yield chunk
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=EXPORT_FORMATS[fmt], headers=headers)
+
+
+@router.get("/stat-lines", dependencies=[Depends(get_current_user)])
+async def export_stat_lines(
+    request: Request,
+    fmt: str = Query("csv", alias="format"),
+    filters: ExportFilters = Depends(export_filters),
+):
+    """
+    Streams stat lines (with game date, opponent and location) as CSV or NDJSON.
+    """
+    return _export_response(request, "stat_lines", "stat-lines", fmt, filters)
+
+
+@router.get("/games", dependencies=[Depends(get_current_user)])
+async def export_games(
+    request: Request,
+    fmt: str = Query("csv", alias="format"),
+    filters: ExportFilters = Depends(export_filters),
+):
+    """
+    Streams games; player_id keeps the games that player has a line in.
+    """
+    return _export_response(request, "games", "games", fmt, filters)
+
+
+@router.get("/analytics/players", dependencies=[Depends(get_current_user)])
+async def export_player_analytics(
+    request: Request,
+    fmt: str = Query("csv", alias="format"),
+    filters: ExportFilters = Depends(export_filters),
+):
+    """
+    Streams per-player totals and averages over the filtered stat lines.
+    """
+    return _export_response(request, "player_analytics", "player-analytics", fmt, filters)
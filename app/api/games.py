@@ -1,35 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.api.deps import get_db
-from app.api.models import GameCreate, GameOut
-from app.services.game_service import create_game, get_all_games, get_game_by_id, delete_game
-from app.services.stat_service import delete_statlines_for_game
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.api.etag import GAME, GLOBAL, conditional
+from app.api.deps import DateRange, PageParams, date_range, get_db, page_params, set_page_headers
+from app.api.models import BoxScoreIn, BoxScoreOut, GameCreate, GameOut
+from app.api.responses import json_response
+from app.db.pagination import aestimate_count
+from app.services.aio.game_service import create_game, get_games_page, get_game_by_id, delete_game
+from app.services.aio.stat_service import delete_statlines_for_game, save_box_score
+from app.services.game_service import GAMES_PAGER
 from app.api.auth_deps import get_current_user, require_admin
 
 router = APIRouter(prefix="/games", tags=["Games"])
 
-@router.get("/", response_model=list[GameOut], dependencies=[Depends(get_current_user)])
-def list_games(conn=Depends(get_db)):
-    games = get_all_games(conn)
-    return [dict(g) for g in games]
+@router.get("/", response_model=list[GameOut], dependencies=[Depends(get_current_user), conditional(GLOBAL)])
+async def list_games(
+    request: Request,
+    response: Response,
+    window: DateRange = Depends(date_range),
+    paging: PageParams = Depends(page_params),
+    conn=Depends(get_db),
+):
+    """
+    Sorts by date or opponent; see page_params for paging.
+    """
+    try:
+        page = await get_games_page(conn, window.start, window.end, paging.sort, paging.cursor, paging.limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    total = await aestimate_count(conn, GAMES_PAGER, (window.start, window.end)) if paging.estimate else None
+    set_page_headers(request, response, page, total)
+    return json_response(page.rows, response)
 
-@router.get("/{game_id}", response_model=GameOut, dependencies=[Depends(get_current_user)])
-def read_game(game_id: int, conn=Depends(get_db)):
-    game = get_game_by_id(conn, game_id)
+@router.get("/{game_id}", response_model=GameOut, dependencies=[Depends(get_current_user), conditional(GAME)])
+async def read_game(game_id: int, conn=Depends(get_db)):
+    game = await get_game_by_id(conn, game_id)
     if game is None:
         raise HTTPException(status_code=404, detail="Game not found")
     return dict(game)
 
 @router.post("/", response_model=dict, dependencies=[Depends(require_admin)])
-def add_game(payload: GameCreate, conn=Depends(get_db)):
-    game_id = create_game(conn, payload.date, payload.opponent, payload.location)
+async def add_game(payload: GameCreate, conn=Depends(get_db)):
+    game_id = await create_game(conn, payload.date, payload.opponent, payload.location)
     if game_id is None:
         raise HTTPException(status_code=409, detail="Game already exists")
     return {"game_id": game_id}
 
 @router.delete("/{game_id}", response_model=dict, dependencies=[Depends(require_admin)])
-def remove_game(game_id: int, conn=Depends(get_db)):
-    delete_statlines_for_game(conn, game_id)
-    deleted = delete_game(conn, game_id)
+async def remove_game(game_id: int, conn=Depends(get_db)):
+    await delete_statlines_for_game(conn, game_id)
+    deleted = await delete_game(conn, game_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Game not found")
-    return {"deleted": True}
\ No newline at end of file
+    return {"deleted": True}
+
+@router.put("/{game_id}/box-score", response_model=BoxScoreOut, dependencies=[Depends(require_admin)])
+async def put_box_score(game_id: int, payload: BoxScoreIn, conn=Depends(get_db)):
+    """
+    Writes every stat line for the game in one transaction.
+    delete_missing removes lines for players not in the payload.
+    """
+    lines = [line.model_dump() for line in payload.lines]
+    try:
+        report = await save_box_score(conn, game_id, lines, delete_missing=payload.delete_missing)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if report is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return report
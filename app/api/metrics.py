@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+from app.api.auth_deps import require_admin
+from app.api.startup import startup_stats
+from app.db.hash_pool import hash_pool_stats
+from app.db.pool import pool_stats
+from app.db.statements import statement_stats
+from app.services.aio.analytics_service import season_refresh_stats
+from app.services.result_cache import cache_stats
+from app.services.user_cache import user_cache_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/pool", dependencies=[Depends(require_admin)])
+def connection_pool_stats():
+    return pool_stats()
+
+@router.get("/statements", dependencies=[Depends(require_admin)])
+def prepared_statement_stats():
+    return statement_stats()
+
+@router.get("/cache", dependencies=[Depends(require_admin)])
+def result_cache_stats():
+    return cache_stats()
+
+@router.get("/aggregates", dependencies=[Depends(require_admin)])
+def season_aggregates_stats():
+    return season_refresh_stats()
+
+@router.get("/auth-cache", dependencies=[Depends(require_admin)])
+def authenticated_user_cache_stats():
+    return user_cache_stats()
+
+@router.get("/hashing", dependencies=[Depends(require_admin)])
+def password_hashing_stats():
+    return hash_pool_stats()
+
+@router.get("/startup", dependencies=[Depends(require_admin)])
+def cold_start_stats():
+    return startup_stats()
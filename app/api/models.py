@@ -1,3 +1,4 @@
+from datetime import date as Date
 from pydantic import BaseModel
 from typing import Optional
 
@@ -21,14 +22,16 @@ class PlayerOut(BaseModel):
 
 # ----- Games ------
 
+# Dates are ISO strings on the wire ("2026-01-05"); pydantic parses them.
+
 class GameCreate(BaseModel):
-    date: str
+    date: Date
     opponent: str
     location: Optional[str] = None
 
 class GameOut(BaseModel):
     id: int
-    date: str
+    date: Date
     opponent: str
     location: Optional[str] = None 
 
@@ -55,6 +58,37 @@ class StatLineCreate(BaseModel):
     PM: int = 0
     starter: int = 0
 
+class BoxScoreLine(BaseModel):
+    player_id: int
+    minutes: float = 0
+    points: int = 0
+    rebounds: int = 0
+    OREB: int = 0
+    assists: int = 0
+    steals: int = 0
+    blocks: int = 0
+    turnovers: int = 0
+    fouls: int = 0
+    FG: int = 0
+    FGA: int = 0
+    FG3: int = 0
+    FGA3: int = 0
+    FT: int = 0
+    FTA: int = 0
+    PM: int = 0
+    starter: int = 0
+
+class BoxScoreIn(BaseModel):
+    lines: list[BoxScoreLine]
+    delete_missing: bool = False
+
+class BoxScoreOut(BaseModel):
+    game_id: int
+    inserted: list[int]
+    updated: list[int]
+    unchanged: list[int]
+    deleted: list[int]
+
 class StatLineUpdate(BaseModel):
     minutes: Optional[float] = None
     points: Optional[int] = None
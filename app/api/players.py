@@ -1,88 +1,157 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.api.deps import get_db
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.api.etag import GLOBAL, PLAYER, conditional
+from app.api.deps import DateRange, PageParams, date_range, get_db, page_params, set_page_headers, sparse_fields
 from app.api.models import PlayerCreate, PlayerOut, PlayerUpdate
-from app.services.player_service import create_player, get_all_players, get_player_by_id, delete_player, update_player
-from app.services.stat_service import delete_statlines_for_player, get_game_log_for_player
-from app.services.player_stats_service import (
+from app.api.responses import json_response
+from app.db.pagination import aestimate_count
+from app.services.aio.player_service import create_player, get_players_page, get_player_by_id, delete_player, update_player
+from app.services.aio.stat_service import delete_statlines_for_player, get_player_game_log
+from app.services.aio.player_stats_service import (
     get_player_totals,
     get_player_averages,
     get_player_splits_totals,
     get_player_splits_averages,
+    get_player_dashboard,
 )
+from app.services.player_stats_service import STAT_COLUMNS, dashboard_sections
+from app.services.player_service import PLAYERS_PAGER
+from app.services.stat_service import GAME_LOG_FIELDS, game_log_pager
 from app.api.auth_deps import get_current_user, require_admin
 
 router = APIRouter(prefix="/players", tags=["Players"])
 
 #Decorator: modifies/enhances function. Tells FastAPI: when someone makes an HTTP GET request to /players/, run this function.
-@router.get("/", response_model=list[PlayerOut], dependencies=[Depends(get_current_user)]) 
-def list_players(conn=Depends(get_db)):
-    players = get_all_players(conn)
-    return [dict(player) for player in players]
-
-@router.get("/{player_id}", response_model=PlayerOut, dependencies=[Depends(get_current_user)])
-def read_player(player_id: int, conn=Depends(get_db)):
-    player = get_player_by_id(conn, player_id)
+@router.get("/", response_model=list[PlayerOut], dependencies=[Depends(get_current_user), conditional(GLOBAL)]) 
+async def list_players(
+    request: Request,
+    response: Response,
+    paging: PageParams = Depends(page_params),
+    conn=Depends(get_db),
+):
+    """
+    Sorts by id or name; see page_params for paging.
+    """
+    try:
+        page = await get_players_page(conn, paging.sort, paging.cursor, paging.limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    total = await aestimate_count(conn, PLAYERS_PAGER) if paging.estimate else None
+    set_page_headers(request, response, page, total)
+    return json_response(page.rows, response)
+
+@router.get("/{player_id}", response_model=PlayerOut, dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def read_player(player_id: int, conn=Depends(get_db)):
+    player = await get_player_by_id(conn, player_id)
     if player is None:
         raise HTTPException(status_code=404, detail="Player not found")
     return dict(player)
 
-@router.get("/{player_id}/game-log", dependencies=[Depends(get_current_user)])
-def player_game_log(player_id: int, conn=Depends(get_db)):
-    player = get_player_by_id(conn, player_id)
-    if player is None:
+@router.get("/{player_id}/game-log", dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_game_log(
+    player_id: int,
+    request: Request,
+    response: Response,
+    window: DateRange = Depends(date_range),
+    paging: PageParams = Depends(page_params),
+    fields=sparse_fields(GAME_LOG_FIELDS),
+    conn=Depends(get_db),
+):
+    """
+    Sorts by date, points or minutes; see page_params for paging.
+    ?fields=points,rebounds narrows each row's stats (the game and the sort
+    key are always included).
+    """
+    try:
+        page = await get_player_game_log(
+            conn, player_id, window.start, window.end, paging.sort, paging.cursor, paging.limit, fields
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    if page is None:
         raise HTTPException(status_code=404, detail="Player not found")
-    
-    rows = get_game_log_for_player(conn, player_id)
-    return [dict(r) for r in rows]
 
-@router.get("/{player_id}/totals", dependencies=[Depends(get_current_user)])
-def player_totals(player_id: int, conn=Depends(get_db)):
-    player = get_player_by_id(conn, player_id)
-    if player is None:
+    total = None
+    if paging.estimate:
+        pager = game_log_pager(fields, paging.sort)
+        total = await aestimate_count(conn, pager, (player_id, window.start, window.end))
+    set_page_headers(request, response, page, total)
+    return json_response(page.rows, response)
+
+@router.get("/{player_id}/totals", dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_totals(player_id: int, window: DateRange = Depends(date_range), conn=Depends(get_db)):
+    result = await get_player_totals(conn, player_id, window.start, window.end)
+    if result is None:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    return get_player_totals(conn, player_id)
+    return result
 
-@router.get("/{player_id}/averages", dependencies=[Depends(get_current_user)])
-def player_averages(player_id: int, conn=Depends(get_db)):
-    player = get_player_by_id(conn, player_id)
-    if player is None:
+@router.get("/{player_id}/averages", dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_averages(player_id: int, window: DateRange = Depends(date_range), conn=Depends(get_db)):
+    result = await get_player_averages(conn, player_id, window.start, window.end)
+    if result is None:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    return get_player_averages(conn, player_id)
+    return result
 
-@router.get("/{player_id}/splits/totals", dependencies=[Depends(get_current_user)])
-def player_splits_totals(player_id: int, conn=Depends(get_db)):
-    player = get_player_by_id(conn, player_id)
-    if player is None:
+@router.get("/{player_id}/splits/totals", dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_splits_totals(
+    player_id: int, window: DateRange = Depends(date_range), conn=Depends(get_db), fields=sparse_fields(STAT_COLUMNS)
+):
+    result = await get_player_splits_totals(conn, player_id, window.start, window.end, fields)
+    if result is None:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    return get_player_splits_totals(conn, player_id)
+    return result
 
-@router.get("/{player_id}/splits/averages", dependencies=[Depends(get_current_user)])
-def player_splits_averages(player_id: int, conn=Depends(get_db)):
-    player = get_player_by_id(conn, player_id)
-    if player is None:
+@router.get("/{player_id}/splits/averages", dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_splits_averages(
+    player_id: int, window: DateRange = Depends(date_range), conn=Depends(get_db), fields=sparse_fields(STAT_COLUMNS)
+):
+    result = await get_player_splits_averages(conn, player_id, window.start, window.end, fields)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+    return result
+
+@router.get("/{player_id}/dashboard", dependencies=[Depends(get_current_user), conditional(PLAYER)])
+async def player_dashboard(
+    player_id: int,
+    include: Optional[str] = None,
+    window: DateRange = Depends(date_range),
+    conn=Depends(get_db),
+):
+    """
+    ?include=player,totals limits the response to those sections.
+    """
+    requested = [s.strip() for s in include.split(",") if s.strip()] if include else None
+    try:
+        sections = dashboard_sections(requested)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    result = await get_player_dashboard(conn, player_id, window.start, window.end, sections)
+    if result is None:
         raise HTTPException(status_code=404, detail="Player not found")
 
-    return get_player_splits_averages(conn, player_id)
+    return result
 
 @router.post("/", response_model=dict, dependencies=[Depends(require_admin)])
-def add_player(payload: PlayerCreate, conn=Depends(get_db)):
-    player_id = create_player(conn, payload.name, payload.jersey_number, payload.position)
+async def add_player(payload: PlayerCreate, conn=Depends(get_db)):
+    player_id = await create_player(conn, payload.name, payload.jersey_number, payload.position)
     return {"player_id": player_id}
 
 @router.delete("/{player_id}", response_model=dict, dependencies=[Depends(require_admin)])
-def remove_player(player_id: int, conn=Depends(get_db)):
-    delete_statlines_for_player(conn, player_id)
-    deleted = delete_player(conn, player_id)
+async def remove_player(player_id: int, conn=Depends(get_db)):
+    await delete_statlines_for_player(conn, player_id)
+    deleted = await delete_player(conn, player_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Player not found")
     return {"deleted": True}
 
 @router.patch("/{player_id}", response_model=dict, dependencies=[Depends(require_admin)])
-def edit_player(player_id: int, payload: PlayerUpdate, conn=Depends(get_db)):
-    updated = update_player(
+async def edit_player(player_id: int, payload: PlayerUpdate, conn=Depends(get_db)):
+    updated = await update_player(
         conn,
         player_id,
         name=payload.name,
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.db.rows import decimal_value
+
+# JSON encoding with orjson. ORJSONResponse is the app's default response
+# class, so every route's body is dumped by orjson. Large list routes go
+# further: they return json_response(rows), which FastAPI sends as-is,
+# skipping jsonable_encoder, response_model validation and the per-row
+# dict copies.
+
+
+def json_default(value):
+    # Same rule as jsonable_encoder: NUMERIC without a fractional part
+    # (SUM of integers) is an int, anything else (ROUND(...), minutes) a float.
+    if isinstance(value, Decimal):
+        return decimal_value(value)
+    raise TypeError(f"can't encode {type(value).__name__} as JSON")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(content, response: Response = None) -> ORJSONResponse:
+    """
+    Returns content encoded once, straight from the service's rows. Headers
+    already set on the route's injected response (ETag, paging) carry over.
+    """
+    out = ORJSONResponse(content)
+    if response is not None:
+        out.headers.raw.extend(response.headers.raw)
+    return out
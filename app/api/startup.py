@@ -0,0 +1,57 @@
+import logging
+import time
+
+# Cold-start timings, served at /metrics/startup. The clock starts when
+# app.api.app begins importing (this is its first import):
+#   import_ms          importing the app, its routers and services
+#   schema_ms          the schema version check, plus DDL when behind
+#   schema_ddl         whether that check ran the DDL
+#   lifespan_ms        pools opened, schema checked, cache and hashing ready
+#   first_response_ms  import start to the first response's headers
+# scripts/startup_time.py measures the same from outside the process.
+
+logger = logging.getLogger(__name__)
+
+_started = time.perf_counter()
+
+_stats = {
+    "import_ms": None,
+    "schema_ms": None,
+    "schema_ddl": None,
+    "lifespan_ms": None,
+    "first_response_ms": None,
+}
+
+
+def elapsed_ms(since: float = None) -> float:
+    return round((time.perf_counter() - (_started if since is None else since)) * 1000, 3)
+
+
+def record(**timings):
+    _stats.update(timings)
+
+
+def startup_stats() -> dict:
+    return dict(_stats)
+
+
+class FirstResponseTimer:
+    """
+    Records when the process sends its first HTTP response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _stats["first_response_ms"] is not None:
+            await self.app(scope, receive, send)
+            return
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start" and _stats["first_response_ms"] is None:
+                _stats["first_response_ms"] = elapsed_ms()
+                logger.info("startup timings: %s", _stats)
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
@@ -1,8 +1,10 @@
 import psycopg
-from fastapi import APIRouter, Depends, HTTPException
-from app.api.deps import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from app.api.etag import GAME, PLAYER, conditional
+from app.api.deps import get_db, sparse_fields
 from app.api.models import StatLineCreate, StatLineUpdate, StatLineOut
-from app.services.stat_service import (
+from app.api.responses import json_response
+from app.services.aio.stat_service import (
     create_statline,
     update_statline,
     player_stats_for_game,
@@ -10,21 +12,22 @@ from app.services.stat_service import (
     upsert_statline,
     delete_statline
 )
+from app.services.stat_service import STATLINE_FIELDS
 from app.api.auth_deps import get_current_user, require_admin
 
 router = APIRouter(prefix="/stat-lines", tags=["Stat Lines"])
 
-@router.get("/by-player/{player_id}/by-game/{game_id}", response_model=StatLineOut, dependencies=[Depends(get_current_user)])
-def get_statline(player_id: int, game_id: int, conn=Depends(get_db)):
-    row = player_stats_for_game(conn, player_id, game_id)
+@router.get("/by-player/{player_id}/by-game/{game_id}", response_model=StatLineOut, dependencies=[Depends(get_current_user), conditional(PLAYER, GAME)])
+async def get_statline(player_id: int, game_id: int, conn=Depends(get_db)):
+    row = await player_stats_for_game(conn, player_id, game_id)
     if row is None:
         raise HTTPException(status_code=404, detail="Stat line not found for player/game")
-    return dict(row)
+    return row
 
 @router.post("/", response_model=dict, dependencies=[Depends(require_admin)])
-def add_statline(payload: StatLineCreate, conn=Depends(get_db)):
+async def add_statline(payload: StatLineCreate, conn=Depends(get_db)):
     try:
-        stat_id = create_statline(
+        stat_id = await create_statline(
             conn,
             payload.player_id,
             payload.game_id,
@@ -51,9 +54,9 @@ def add_statline(payload: StatLineCreate, conn=Depends(get_db)):
         raise HTTPException(status_code=409, detail=str(e))
     
 @router.patch("/by-player/{player_id}/by-game/{game_id}", response_model=dict, dependencies=[Depends(require_admin)])
-def patch_statline(player_id: int, game_id: int, payload: StatLineUpdate, conn=Depends(get_db)):
+async def patch_statline(player_id: int, game_id: int, payload: StatLineUpdate, conn=Depends(get_db)):
     try:
-        updated = update_statline(
+        updated = await update_statline(
             conn,
             player_id,
             game_id,
@@ -82,20 +85,25 @@ def patch_statline(player_id: int, game_id: int, payload: StatLineUpdate, conn=D
         raise HTTPException(status_code=409, detail=str(e))
     
 @router.delete("/by-player/{player_id}/by-game/{game_id}", response_model=dict, dependencies=[Depends(require_admin)])
-def remove_statline(player_id: int, game_id: int, conn=Depends(get_db)):
-    deleted = delete_statline(conn, player_id, game_id)
+async def remove_statline(player_id: int, game_id: int, conn=Depends(get_db)):
+    deleted = await delete_statline(conn, player_id, game_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Stat line not found")
     return {"deleted": True}
 
-@router.get("/by-game/{game_id}", dependencies=[Depends(get_current_user)])
-def list_statlines_for_game(game_id: int, conn=Depends(get_db)):
-    rows = get_statlines_for_game(conn, game_id)
-    return [dict(r) for r in rows]
+@router.get("/by-game/{game_id}", dependencies=[Depends(get_current_user), conditional(GAME)])
+async def list_statlines_for_game(
+    game_id: int, response: Response, conn=Depends(get_db), fields=sparse_fields(STATLINE_FIELDS)
+):
+    """
+    ?fields=points,rebounds narrows each line (ids are always included).
+    """
+    rows = await get_statlines_for_game(conn, game_id, fields)
+    return json_response(rows, response)
 
 @router.put("/upsert", dependencies=[Depends(require_admin)])
-def upsert_statline_route(payload: dict, conn=Depends(get_db)):
-    upsert_statline(
+async def upsert_statline_route(payload: dict, conn=Depends(get_db)):
+    await upsert_statline(
         conn,
         player_id=payload["player_id"],
         game_id=payload["game_id"],
@@ -0,0 +1,237 @@
+import logging
+import os
+
+import psycopg
+
+from app.db.batch import run_batch
+
+# Running aggregates kept up to date by triggers on stat_line:
+#   player_aggregates  one row per player: games played (lines with
+#                      minutes > 0) and the sum of each stat over them.
+#   game_team_totals   one row per game: stat line count and the sum of
+#                      each stat over every line.
+# Every insert, update and delete on stat_line applies the old row's
+# contribution with a minus sign and the new row's with a plus sign, in the
+# writer's transaction. Unwindowed player totals/averages and team
+# totals/averages read these tables instead of scanning stat_line.
+#
+# RUNNING_AGGREGATES=0 sends those reads back to stat_line. They also go
+# back (for the life of the process) if the tables haven't been created yet.
+# scripts/verify_aggregates.py recomputes both tables from stat_line and
+# reports or repairs drift.
+
+RUNNING_AGGREGATES_ENABLED = os.getenv("RUNNING_AGGREGATES", "1") != "0"
+
+AGGREGATE_COLUMNS = [
+    "minutes", "points", "rebounds", "OREB", "assists", "steals", "blocks", "turnovers",
+    "fouls", "FG", "FGA", "FG3", "FGA3", "FT", "FTA", "PM",
+]
+
+logger = logging.getLogger(__name__)
+
+_tables_missing = False
+
+
+def use_running_aggregates() -> bool:
+    return RUNNING_AGGREGATES_ENABLED and not _tables_missing
+
+
+def mark_running_aggregates_missing():
+    global _tables_missing
+    if not _tables_missing:
+        logger.warning("running aggregate tables missing; reading stat_line (run scripts/migrate.py)")
+    _tables_missing = True
+
+
+async def run_aggregate_batch(conn, build):
+    """
+    Runs run_batch(conn, *build()). If the aggregate tables don't exist,
+    marks them missing and runs build() again against stat_line.
+    """
+    try:
+        return await run_batch(conn, *build())
+    except psycopg.errors.UndefinedTable:
+        if not use_running_aggregates():
+            raise
+        mark_running_aggregates_missing()
+        return await run_batch(conn, *build())
+
+
+def _column_type(col: str) -> str:
+    return "NUMERIC" if col == "minutes" else "BIGINT"
+
+
+def _column_defs() -> str:
+    return ",\n            ".join(
+        f"{col} {_column_type(col)} NOT NULL DEFAULT 0" for col in AGGREGATE_COLUMNS
+    )
+
+
+CREATE_PLAYER_AGGREGATES_SQL = f"""
+    CREATE TABLE IF NOT EXISTS player_aggregates (
+        player_id INTEGER PRIMARY KEY REFERENCES players(id) ON DELETE CASCADE,
+        gp BIGINT NOT NULL DEFAULT 0,
+        {_column_defs()}
+    )
+"""
+
+CREATE_GAME_TEAM_TOTALS_SQL = f"""
+    CREATE TABLE IF NOT EXISTS game_team_totals (
+        game_id INTEGER PRIMARY KEY REFERENCES games(id) ON DELETE CASCADE,
+        lines BIGINT NOT NULL DEFAULT 0,
+        {_column_defs()}
+    )
+"""
+
+
+def _subtract(table: str, count_col: str, key: str, record: str) -> str:
+    sets = ", ".join(
+        [f"{count_col} = {count_col} - 1"]
+        + [f"{col} = {col} - COALESCE({record}.{col}, 0)" for col in AGGREGATE_COLUMNS]
+    )
+    return f"UPDATE {table} SET {sets} WHERE {key} = {record}.{key};"
+
+
+def _add(table: str, count_col: str, key: str, record: str) -> str:
+    columns = ", ".join([key, count_col, *AGGREGATE_COLUMNS])
+    values = ", ".join(
+        [f"{record}.{key}", "1"] + [f"COALESCE({record}.{col}, 0)" for col in AGGREGATE_COLUMNS]
+    )
+    sets = ", ".join(
+        [f"{count_col} = {table}.{count_col} + 1"]
+        + [f"{col} = {table}.{col} + EXCLUDED.{col}" for col in AGGREGATE_COLUMNS]
+    )
+    return f"INSERT INTO {table} ({columns}) VALUES ({values}) ON CONFLICT ({key}) DO UPDATE SET {sets};"
+
+
+CREATE_TRIGGER_FUNCTION_SQL = f"""
+    CREATE OR REPLACE FUNCTION stat_line_apply_aggregates() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            IF COALESCE(OLD.minutes, 0) > 0 THEN
+                {_subtract("player_aggregates", "gp", "player_id", "OLD")}
+            END IF;
+            {_subtract("game_team_totals", "lines", "game_id", "OLD")}
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            IF COALESCE(NEW.minutes, 0) > 0 THEN
+                {_add("player_aggregates", "gp", "player_id", "NEW")}
+            END IF;
+            {_add("game_team_totals", "lines", "game_id", "NEW")}
+        END IF;
+        RETURN NULL;
+    END;
+    $$
+"""
+
+CREATE_TRUNCATE_FUNCTION_SQL = """
+    CREATE OR REPLACE FUNCTION stat_line_truncate_aggregates() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        TRUNCATE player_aggregates, game_team_totals;
+        RETURN NULL;
+    END;
+    $$
+"""
+
+CREATE_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS stat_line_aggregates ON stat_line",
+    """
+    CREATE TRIGGER stat_line_aggregates
+    AFTER INSERT OR UPDATE OR DELETE ON stat_line
+    FOR EACH ROW EXECUTE FUNCTION stat_line_apply_aggregates()
+    """,
+    "DROP TRIGGER IF EXISTS stat_line_truncate_aggregates ON stat_line",
+    """
+    CREATE TRIGGER stat_line_truncate_aggregates
+    AFTER TRUNCATE ON stat_line
+    FOR EACH STATEMENT EXECUTE FUNCTION stat_line_truncate_aggregates()
+    """,
+]
+
+
+def _sums(prefix: str) -> str:
+    return ", ".join(f"COALESCE(SUM({prefix}.{col}), 0) AS {col}" for col in AGGREGATE_COLUMNS)
+
+
+# Recomputed from stat_line. "partition" restricts a query to keys with
+# key % workers = part, so verification can be split across connections.
+
+LIVE_PLAYER_AGGREGATES_SQL = f"""
+    SELECT s.player_id, COUNT(*) AS gp, {_sums("s")}
+    FROM stat_line s
+    WHERE COALESCE(s.minutes, 0) > 0 {{partition}}
+    GROUP BY s.player_id
+"""
+
+LIVE_GAME_TEAM_TOTALS_SQL = f"""
+    SELECT s.game_id, COUNT(*) AS lines, {_sums("s")}
+    FROM stat_line s
+    WHERE TRUE {{partition}}
+    GROUP BY s.game_id
+"""
+
+AGGREGATE_TABLES = {
+    # table: (key, count column, live query)
+    "player_aggregates": ("player_id", "gp", LIVE_PLAYER_AGGREGATES_SQL),
+    "game_team_totals": ("game_id", "lines", LIVE_GAME_TEAM_TOTALS_SQL),
+}
+
+
+def _drift_sql(table: str) -> str:
+    key, count_col, live_sql = AGGREGATE_TABLES[table]
+    columns = [count_col, *AGGREGATE_COLUMNS]
+    live_row = ", ".join(f"COALESCE(l.{col}, 0)" for col in columns)
+    stored_row = ", ".join(f"COALESCE(a.{col}, 0)" for col in columns)
+    live = live_sql.format(partition=f"AND s.{key} %% %s = %s")
+    # One statement, so live and stored values come from the same snapshot.
+    return f"""
+    SELECT COALESCE(l.{key}, a.{key}) AS key
+    FROM ({live}) l
+    FULL JOIN (SELECT * FROM {table} WHERE {key} %% %s = %s) a ON a.{key} = l.{key}
+    WHERE ROW({live_row}) IS DISTINCT FROM ROW({stored_row})
+    ORDER BY 1
+    """
+
+
+def find_drift(conn, table: str, workers: int = 1, part: int = 0) -> list:
+    """
+    Returns the keys of table (in partition part of workers) whose stored
+    aggregates differ from stat_line.
+    """
+    cursor = conn.cursor()
+    cursor.execute(_drift_sql(table), (workers, part, workers, part))
+    keys = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    return keys
+
+
+def rebuild_running_aggregates(conn):
+    """
+    Recomputes both tables from stat_line in one transaction, blocking
+    stat_line writes (not reads) while it runs.
+    """
+    with conn.transaction():
+        cursor = conn.cursor()
+        cursor.execute("LOCK TABLE stat_line IN SHARE MODE")
+        for table, (key, count_col, live_sql) in AGGREGATE_TABLES.items():
+            columns = ", ".join([key, count_col, *AGGREGATE_COLUMNS])
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f"INSERT INTO {table} ({columns}) {live_sql.format(partition='')}")
+
+
+def create_running_aggregates(conn):
+    """
+    Creates the tables and triggers and fills the tables from stat_line,
+    in one transaction.
+    """
+    with conn.transaction():
+        cursor = conn.cursor()
+        cursor.execute(CREATE_PLAYER_AGGREGATES_SQL)
+        cursor.execute(CREATE_GAME_TEAM_TOTALS_SQL)
+        cursor.execute(CREATE_TRIGGER_FUNCTION_SQL)
+        cursor.execute(CREATE_TRUNCATE_FUNCTION_SQL)
+        for sql in CREATE_TRIGGERS_SQL:
+            cursor.execute(sql)
+        rebuild_running_aggregates(conn)
@@ -0,0 +1,69 @@
+import os
+from typing import Any, Callable, NamedTuple
+
+import psycopg
+
+from app.db.rows import mapped_cursor
+from app.db.statements import _batching, aexecute, invalidate, note_round_trip
+
+# Batches registered statements into one network round trip using psycopg
+# pipeline mode. Services describe each read as a Query (statements plus a
+# shaping coroutine); routes combine several Queries into a single
+# run_batch() call. Batch cursors are app.db.rows mapped cursors. Set
+# DB_PIPELINE=0 to run them sequentially instead.
+
+PIPELINE_ENABLED = os.getenv("DB_PIPELINE", "1") != "0"
+
+
+class Query(NamedTuple):
+    statements: tuple
+    shape: Callable[[list], Any]
+
+
+async def _execute_sequential(conn, statements) -> list:
+    cursors = []
+    for name, params in statements:
+        cursor = mapped_cursor(conn)
+        await aexecute(cursor, name, params)
+        cursors.append(cursor)
+    return cursors
+
+
+async def _execute_pipelined(conn, statements) -> list:
+    cursors = []
+    token = _batching.set(True)
+    try:
+        async with conn.pipeline():
+            for name, params in statements:
+                cursor = mapped_cursor(conn)
+                await aexecute(cursor, name, params)
+                cursors.append(cursor)
+    finally:
+        _batching.reset(token)
+    note_round_trip()
+    return cursors
+
+
+async def run_batch(conn, *queries: Query) -> list:
+    """
+    Executes every statement of every query, then shapes each query's
+    cursors into its result. Returns one result per query, in order.
+    """
+    statements = [stmt for query in queries for stmt in query.statements]
+    if PIPELINE_ENABLED and len(statements) > 1:
+        try:
+            cursors = await _execute_pipelined(conn, statements)
+        except psycopg.errors.FeatureNotSupported:
+            # A migration changed a prepared statement's result type.
+            invalidate()
+            cursors = await _execute_sequential(conn, statements)
+    else:
+        cursors = await _execute_sequential(conn, statements)
+
+    results = []
+    offset = 0
+    for query in queries:
+        count = len(query.statements)
+        results.append(await query.shape(cursors[offset:offset + count]))
+        offset += count
+    return results
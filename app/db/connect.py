@@ -2,6 +2,7 @@ import os
 import psycopg
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
 
 def get_connection():
     """
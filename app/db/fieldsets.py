@@ -0,0 +1,61 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Sparse fieldsets (?fields=points,rebounds). Each service whitelists the
+# columns a response may be narrowed to; parse_fields() validates a request
+# against that list, and projection() builds the narrowed statement (or
+# Pager) the first time a fieldset is asked for and reuses it afterwards.
+# Fieldsets are client-chosen, so builds register ad-hoc (unprepared)
+# statements and only the FIELDSET_CACHE_SIZE most recently used ones are
+# kept; the full statements stay prepared.
+
+FIELDSET_CACHE_SIZE = int(os.getenv("FIELDSET_CACHE_SIZE", "128"))
+
+_PROJECTIONS = OrderedDict()
+_lock = threading.Lock()
+
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[tuple]:
+    """
+    Returns the requested columns in allowed's order (matched
+    case-insensitively), or None when fields is empty. Raises ValueError
+    naming any unknown field.
+    """
+    requested = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    if not requested:
+        return None
+    canonical = {col.lower(): col for col in allowed}
+    unknown = sorted({f for f in requested if f.lower() not in canonical})
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    chosen = {canonical[f.lower()] for f in requested}
+    return tuple(col for col in allowed if col in chosen)
+
+
+def with_columns(fields: tuple, allowed, *columns) -> tuple:
+    """
+    Returns fields plus any of columns (a sort key, say) that allowed
+    knows, in allowed's order.
+    """
+    chosen = set(fields) | {col for col in columns if col in allowed}
+    return tuple(col for col in allowed if col in chosen)
+
+
+def projection(name: str, fields: tuple, build):
+    """
+    Returns build(projection_name, fields), reused while (name, fields) is
+    among the FIELDSET_CACHE_SIZE most recently used projections.
+    """
+    key = (name, fields)
+    with _lock:
+        if key in _PROJECTIONS:
+            _PROJECTIONS.move_to_end(key)
+            return _PROJECTIONS[key]
+    built = build(f"{name}__{'_'.join(fields).lower()}", fields)
+    with _lock:
+        _PROJECTIONS[key] = built
+        while len(_PROJECTIONS) > FIELDSET_CACHE_SIZE:
+            _PROJECTIONS.popitem(last=False)
+    return built
@@ -0,0 +1,124 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.db.security import hash_password, verify_and_rehash
+
+# bcrypt runs in a small dedicated process pool, so a burst of logins
+# neither holds the GIL nor fills the event loop's default thread pool.
+# At most PASSWORD_HASH_MAX_CONCURRENCY hashes run or sit queued in the
+# pool; further callers wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds for
+# a slot and then get HashingBusy (the API answers 503). If a worker dies
+# (OOM kill, segfault) the pool is broken for good, so it is replaced and
+# the hash retried once.
+#
+# PASSWORD_HASH_WORKERS=0 hashes in threads instead (tests, tiny hosts).
+
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", str(max(HASH_WORKERS, 1) * 2)))
+HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+_executor = None
+_slots = None
+_stats = {"completed": 0, "rejected": 0, "in_flight": 0, "waiting": 0}
+
+
+class HashingBusy(Exception):
+    """
+    Raised when no hashing slot frees up within the queue timeout.
+    """
+
+
+def _get_executor():
+    global _executor
+    if _executor is None and HASH_WORKERS > 0:
+        # spawn: forking a process that runs an event loop and pool threads
+        # can copy held locks into the child.
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _replace_executor(broken):
+    global _executor
+    # Concurrent callers all see the same broken pool; only the first
+    # replaces it.
+    if _executor is broken:
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    return _get_executor()
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(HASH_MAX_CONCURRENCY)
+    return _slots
+
+
+async def _run(func, *args):
+    slots = _get_slots()
+    _stats["waiting"] += 1
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _stats["rejected"] += 1
+        raise HashingBusy("password hashing is saturated")
+    finally:
+        _stats["waiting"] -= 1
+
+    _stats["in_flight"] += 1
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return await asyncio.to_thread(func, *args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            return await loop.run_in_executor(_replace_executor(executor), func, *args)
+    finally:
+        _stats["in_flight"] -= 1
+        _stats["completed"] += 1
+        slots.release()
+
+
+async def ahash_password(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def averify_and_rehash(password: str, password_hash: str):
+    """
+    Async verify_and_rehash: returns (valid, new_hash or None).
+    """
+    return await _run(verify_and_rehash, password, password_hash)
+
+
+def start_hash_pool():
+    """
+    Starts the worker processes ahead of the first login.
+    """
+    executor = _get_executor()
+    if executor is not None:
+        for _ in range(HASH_WORKERS):
+            executor.submit(int)
+
+
+def shutdown_hash_pool():
+    global _executor, _slots
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _slots = None
+
+
+def hash_pool_stats() -> dict:
+    return {
+        "workers": HASH_WORKERS,
+        "max_concurrency": HASH_MAX_CONCURRENCY,
+        "queue_timeout": HASH_QUEUE_TIMEOUT,
+        **_stats,
+    }
@@ -1,3 +1,10 @@
+from app.db.aggregates import create_running_aggregates
+from app.db.statements import invalidate
+from app.services.analytics_service import (
+    CREATE_SEASON_AGGREGATES_INDEX_SQL,
+    CREATE_SEASON_AGGREGATES_SQL,
+)
+
 def migrate_games_add_unique(conn):
     """
     Adds UNIQUE(date, opponent, location) to games using Postgres-native SQL.
@@ -72,12 +79,23 @@ def migrate_stat_line_add_shooting_columns(conn):
         cursor.execute(f"ALTER TABLE stat_line ADD COLUMN IF NOT EXISTS {column} INTEGER DEFAULT 0;")
 
     conn.commit()
+    invalidate()
 
 def migrate_stat_line_minutes_to_numeric(conn):
     """
     Converts stat_line.minutes to NUMERIC to preserve MM:SS precision.
+    Skipped once done: views built on stat_line pin the column type.
     """
     cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'stat_line' AND column_name = 'minutes'
+        """
+    )
+    row = cursor.fetchone()
+    if row is not None and row[0] == "numeric":
+        return
     cursor.execute(
         """
         ALTER TABLE stat_line
@@ -86,3 +104,109 @@ def migrate_stat_line_minutes_to_numeric(conn):
         """
     )
     conn.commit()
+    invalidate()
+
+def migrate_users_add_token_version(conn):
+    """
+    Adds users.token_version; bumping it revokes the user's issued tokens.
+    """
+    cursor = conn.cursor()
+    cursor.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;")
+    conn.commit()
+
+def migrate_games_date_to_date(conn):
+    """
+    Converts games.date from TEXT to DATE. Fails without changing anything
+    if a row isn't an ISO date. The (date, opponent, location) unique index
+    is rebuilt on the DATE column and serves date range scans.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'games' AND column_name = 'date'
+        """
+    )
+    row = cursor.fetchone()
+    if row is not None and row[0] == "date":
+        return
+
+    cursor.execute(
+        r"SELECT id, date FROM games WHERE date !~ '^\d{4}-\d{2}-\d{2}$' ORDER BY id"
+    )
+    bad = cursor.fetchall()
+    if bad:
+        conn.rollback()
+        raise RuntimeError(f"games.date is not ISO (YYYY-MM-DD) for: {bad[:10]}")
+
+    cursor.execute("ALTER TABLE games ALTER COLUMN date TYPE DATE USING date::date;")
+    conn.commit()
+    invalidate()
+
+STAT_LINE_INCLUDE_COLUMNS = [
+    "game_id", "minutes", "points", "rebounds", "OREB", "assists", "steals", "blocks",
+    "turnovers", "fouls", "FG", "FGA", "FG3", "FGA3", "FT", "FTA", "PM",
+]
+
+ACCESS_PATH_INDEXES = {
+    # Player totals/averages/splits/leaders: filter on player_id and
+    # COALESCE(minutes, 0) > 0, read only stat columns (index-only scans).
+    "stat_line_player_played_idx": f"""
+        ON stat_line (player_id)
+        INCLUDE ({", ".join(STAT_LINE_INCLUDE_COLUMNS)})
+        WHERE COALESCE(minutes, 0) > 0
+    """,
+    # Box scores: stat lines for one game, ordered by player.
+    "stat_line_game_player_idx": "ON stat_line (game_id, player_id)",
+    # Opponent splits group and filter games by opponent.
+    "games_opponent_idx": "ON games (opponent) INCLUDE (location)",
+    # Keyset pages: /players sorted by name, /games by date (id breaks ties).
+    "players_name_id_idx": "ON players (name, id)",
+    "games_date_id_idx": "ON games (date, id)",
+}
+
+def migrate_add_access_path_indexes(conn):
+    """
+    Adds covering/partial indexes for the stat_line and games access paths.
+    Built CONCURRENTLY so writes aren't blocked; an index left INVALID by
+    a failed build is dropped and rebuilt.
+    """
+    conn.commit()
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        cursor = conn.cursor()
+        for name, definition in ACCESS_PATH_INDEXES.items():
+            cursor.execute(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)",
+                (name,),
+            )
+            row = cursor.fetchone()
+            if row is not None and row[0]:
+                continue
+            if row is not None:
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+            cursor.execute(f"CREATE INDEX CONCURRENTLY {name} {definition};")
+        cursor.execute("ANALYZE stat_line;")
+        cursor.execute("ANALYZE games;")
+    finally:
+        conn.autocommit = autocommit
+
+def migrate_create_season_aggregates(conn):
+    """
+    Creates and populates the per-player season aggregates materialized
+    view read by /analytics/players and /analytics/leaders.
+    """
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SEASON_AGGREGATES_SQL)
+    cursor.execute(CREATE_SEASON_AGGREGATES_INDEX_SQL)
+    conn.commit()
+
+def migrate_create_running_aggregates(conn):
+    """
+    Creates the trigger-maintained player_aggregates and game_team_totals
+    tables and backfills them from stat_line. Safe to re-run: the triggers
+    are replaced and the tables recomputed.
+    """
+    conn.commit()
+    create_running_aggregates(conn)
@@ -0,0 +1,191 @@
+import base64
+import json
+import os
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+from app.db.batch import Query
+from app.db.rows import api_key, map_rows, mapped_cursor
+from app.db.statements import execute, register
+
+# Keyset pagination for list queries. A Pager wraps a base query (no
+# ORDER BY) and registers one statement per sort key, direction and
+# first/next page:
+#   SELECT * FROM (<base>) page
+#   WHERE (page.<key>, page.<id>) > (%s, %s)      -- next pages only
+#   ORDER BY page.<key>, page.<id> LIMIT %s
+# Simple base queries are flattened by the planner, so an index on
+# (<key>, id) serves the whole page. Cursors are opaque base64 tokens
+# carrying the sort and the last row's (key, id); a cursor only works with
+# the sort it was issued for. A request with neither a limit nor a cursor
+# is unpaged (LIMIT NULL), so clients that don't follow X-Next-Cursor still
+# get the whole list.
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "200"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "1000"))
+
+
+class Page(NamedTuple):
+    rows: list
+    next_cursor: Optional[str]
+
+
+def page_limit(limit: Optional[int], cursor: Optional[str] = None) -> Optional[int]:
+    """
+    Returns limit clamped to [1, PAGE_MAX_LIMIT]. Without a limit, a cursor's
+    page has PAGE_DEFAULT_LIMIT rows and a first request is unpaged (None).
+    """
+    if limit is None:
+        return min(PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT) if cursor else None
+    return max(1, min(limit, PAGE_MAX_LIMIT))
+
+
+def _cursor_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort: str, key, row_id) -> str:
+    payload = json.dumps([sort, _cursor_value(key), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """
+    Returns (key, id) from cursor. Raises ValueError if it is malformed or
+    was issued for another sort.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        issued_for, key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    if issued_for != sort or not isinstance(row_id, int):
+        raise ValueError("cursor doesn't match this sort")
+    return key, row_id
+
+
+def _page_sql(base_sql: str, column: str, cast: str, id_column: str, descending: bool, after: bool) -> str:
+    direction = "DESC" if descending else "ASC"
+    where = ""
+    if after:
+        op = "<" if descending else ">"
+        where = f"WHERE (page.{column}, page.{id_column}) {op} (%s::{cast}, %s::int)"
+    return f"""
+    SELECT * FROM ({base_sql}) page
+    {where}
+    ORDER BY page.{column} {direction}, page.{id_column} {direction}
+    LIMIT %s
+    """
+
+
+class Pager:
+    """
+    Registers the keyset statements for one list. sorts maps each sort name
+    to (output column, SQL type); "-name" sorts descending. With
+    prepare=False the statements are ad hoc (see app.db.statements).
+    """
+
+    def __init__(
+        self, name: str, base_sql: str, id_column: str, sorts: dict, default_sort: str, params: tuple = (),
+        prepare: bool = True,
+    ):
+        self.base_sql = base_sql
+        self.id_column = id_column
+        self.sorts = sorts
+        self.default_sort = default_sort
+        self.statements = {}
+        for sort_name, (column, cast) in sorts.items():
+            for descending in (False, True):
+                for after in (False, True):
+                    statement = "_".join(
+                        [f"{name}_page", sort_name] + (["desc"] if descending else []) + (["after"] if after else [])
+                    )
+                    extra = ("after_key", "after_id", "limit") if after else ("limit",)
+                    self.statements[(sort_name, descending, after)] = register(
+                        statement, _page_sql(base_sql, column, cast, id_column, descending, after), params + extra,
+                        prepare,
+                    )
+
+    def parse_sort(self, sort: Optional[str]) -> str:
+        """
+        Returns the canonical sort ("date", "-date"). Raises ValueError for
+        unknown keys.
+        """
+        sort = sort or self.default_sort
+        if sort.lstrip("-") not in self.sorts:
+            options = ", ".join(self.sorts)
+            raise ValueError(f"sort must be one of: {options} (prefix - for descending)")
+        return sort
+
+    def sort_column(self, sort: Optional[str]) -> str:
+        return self.sorts[self.parse_sort(sort).lstrip("-")][0]
+
+    def statement(self, base_params: tuple, sort: str, cursor: Optional[str], limit: Optional[int]) -> tuple:
+        """
+        Returns (statement, params) fetching one row past the page, so the
+        shape step can tell whether there is a next page (every row when
+        limit is None).
+        """
+        sort = self.parse_sort(sort)
+        descending = sort.startswith("-")
+        key_params = decode_cursor(cursor, sort) if cursor else ()
+        statement = self.statements[(sort.lstrip("-"), descending, bool(cursor))]
+        return statement, (*base_params, *key_params, None if limit is None else limit + 1)
+
+    def page(self, rows: list, sort: str, limit: Optional[int]) -> Page:
+        sort = self.parse_sort(sort)
+        if limit is None or len(rows) <= limit:
+            return Page(rows, None)
+        rows = rows[:limit]
+        column, _ = self.sorts[sort.lstrip("-")]
+        last = rows[-1]
+        return Page(rows, encode_cursor(sort, last[api_key(column)], last[self.id_column]))
+
+
+def fetch_page(conn, pager: Pager, base_params: tuple, sort=None, cursor=None, limit=None) -> Page:
+    """
+    Runs one page of pager's list. Raises ValueError for a bad sort or cursor.
+    """
+    limit = page_limit(limit, cursor)
+    statement, params = pager.statement(base_params, sort, cursor, limit)
+    cur = mapped_cursor(conn)
+    execute(cur, statement, params)
+    return pager.page(map_rows(cur, cur.fetchall()), sort, limit)
+
+
+def page_query(pager: Pager, base_params: tuple, sort=None, cursor=None, limit=None) -> Query:
+    """
+    One page as a batchable Query (see app.db.batch).
+    """
+    limit = page_limit(limit, cursor)
+    statement, params = pager.statement(base_params, sort, cursor, limit)
+
+    async def shape(cursors) -> Page:
+        cur = cursors[0]
+        return pager.page(map_rows(cur, await cur.fetchall()), sort, limit)
+
+    return Query(((statement, params),), shape)
+
+
+# Total counts come from the planner's row estimate for the base query:
+# one EXPLAIN instead of a COUNT(*) over the whole list.
+
+def _plan_rows(explain_row) -> int:
+    return int(explain_row[0][0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(conn, pager: Pager, base_params: tuple = ()) -> int:
+    cur = conn.cursor()
+    cur.execute("EXPLAIN (FORMAT JSON) " + pager.base_sql, base_params)
+    return _plan_rows(cur.fetchone())
+
+
+async def aestimate_count(conn, pager: Pager, base_params: tuple = ()) -> int:
+    cur = conn.cursor()
+    await cur.execute("EXPLAIN (FORMAT JSON) " + pager.base_sql, base_params)
+    return _plan_rows(await cur.fetchone())
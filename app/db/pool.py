@@ -0,0 +1,262 @@
+import os
+import time
+import weakref
+
+from psycopg.pq import TransactionStatus
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from app.db.connect import DATABASE_REPLICA_URL, DATABASE_URL
+
+# Shared connection pools. The API serves requests from the async pool
+# (plus an optional read-replica pool); scripts use the sync pool. Sizes
+# and timeouts can be tuned per deployment through the DB_POOL_*
+# environment variables.
+
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+_pool = None
+_async_pool = None
+_replica_pool = None
+
+# Connections opened by the replica pool (see is_replica()).
+_replica_connections = weakref.WeakSet()
+
+_acquire_stats = {
+    "acquires": 0,
+    "acquire_ms_total": 0.0,
+    "acquire_ms_max": 0.0,
+}
+
+
+def pool_settings(**overrides) -> dict:
+    """
+    Returns the pool configuration, with any keyword overrides applied.
+    """
+    settings = {
+        "min_size": POOL_MIN_SIZE,
+        "max_size": max(POOL_MAX_SIZE, POOL_MIN_SIZE),
+        "max_idle": POOL_MAX_IDLE,
+        "max_lifetime": POOL_MAX_LIFETIME,
+        "timeout": POOL_TIMEOUT,
+    }
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    if settings["max_size"] < settings["min_size"]:
+        settings["max_size"] = settings["min_size"]
+    return settings
+
+
+def create_pool(name: str = "cdb", open: bool = True, **overrides) -> ConnectionPool:
+    """
+    Builds a connection pool against DATABASE_URL.
+    When open is True the pool is pre-warmed: this waits until min_size
+    connections are established before returning.
+    """
+    if not DATABASE_URL:
+        raise RuntimeError("DATABASE_URL is not set")
+    settings = pool_settings(**overrides)
+    pool = ConnectionPool(
+        DATABASE_URL,
+        name=name,
+        open=False,
+        check=ConnectionPool.check_connection,
+        **settings,
+    )
+    if open:
+        pool.open(wait=True, timeout=settings["timeout"])
+    return pool
+
+
+def create_async_pool(name: str = "cdb-async", conninfo: str = None, **overrides) -> AsyncConnectionPool:
+    """
+    Builds an unopened async pool against conninfo (DATABASE_URL by default).
+    Call open_async_pool() from a running event loop to pre-warm it.
+    """
+    conninfo = conninfo or DATABASE_URL
+    if not conninfo:
+        raise RuntimeError("DATABASE_URL is not set")
+    # Autocommit keeps request connections out of idle transactions, so
+    # returning them doesn't need a ROLLBACK, which would also discard
+    # every server-side prepared statement on the connection.
+    return AsyncConnectionPool(
+        conninfo,
+        name=name,
+        open=False,
+        kwargs={"autocommit": True},
+        check=AsyncConnectionPool.check_connection,
+        **pool_settings(**overrides),
+    )
+
+
+def open_pool(**overrides) -> ConnectionPool:
+    """
+    Opens the process-wide sync pool.
+    """
+    global _pool
+    if _pool is None:
+        _pool = create_pool(**overrides)
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide pool, opening it on first use.
+    """
+    if _pool is None:
+        return open_pool()
+    return _pool
+
+
+async def open_async_pool(**overrides) -> AsyncConnectionPool:
+    """
+    Opens and pre-warms the process-wide async pool used by the API.
+    """
+    global _async_pool
+    if _async_pool is None:
+        pool = create_async_pool(**overrides)
+        await pool.open(wait=True, timeout=pool.timeout)
+        _async_pool = pool
+    return _async_pool
+
+
+async def open_replica_pool(**overrides) -> AsyncConnectionPool:
+    """
+    Opens the read-replica pool when DATABASE_REPLICA_URL is set.
+    Returns None otherwise.
+    """
+    global _replica_pool
+    if _replica_pool is None and DATABASE_REPLICA_URL:
+        pool = create_async_pool(
+            name="cdb-replica", conninfo=DATABASE_REPLICA_URL, configure=_mark_replica, **overrides
+        )
+        await pool.open(wait=True, timeout=pool.timeout)
+        _replica_pool = pool
+    return _replica_pool
+
+
+async def _mark_replica(conn):
+    _replica_connections.add(conn)
+
+
+def is_replica(conn) -> bool:
+    """
+    True for connections from the read-replica pool, whose reads may lag
+    the primary.
+    """
+    return conn in _replica_connections
+
+
+async def close_async_pool():
+    global _async_pool, _replica_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+    if _replica_pool is not None:
+        await _replica_pool.close()
+        _replica_pool = None
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Returns the process-wide async pool, opening it on first use.
+    """
+    if _async_pool is None:
+        return await open_async_pool()
+    return _async_pool
+
+
+async def get_replica_pool() -> AsyncConnectionPool:
+    """
+    Returns the read-replica pool, or None when no replica is configured.
+    """
+    if _replica_pool is None:
+        return await open_replica_pool()
+    return _replica_pool
+
+
+def acquire(pool: ConnectionPool):
+    """
+    Checks a connection out of the pool and records how long it took.
+    """
+    started = time.perf_counter()
+    conn = pool.getconn()
+    _record_acquire(started)
+    return conn
+
+
+async def acquire_async(pool: AsyncConnectionPool):
+    started = time.perf_counter()
+    conn = await pool.getconn()
+    _record_acquire(started)
+    return conn
+
+
+def _record_acquire(started: float):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _acquire_stats["acquires"] += 1
+    _acquire_stats["acquire_ms_total"] += elapsed_ms
+    if elapsed_ms > _acquire_stats["acquire_ms_max"]:
+        _acquire_stats["acquire_ms_max"] = elapsed_ms
+
+
+def release(pool: ConnectionPool, conn):
+    """
+    Returns a connection to the pool, rolling back any open transaction
+    so the next borrower starts clean.
+    """
+    try:
+        if conn.info.transaction_status != TransactionStatus.IDLE:
+            conn.rollback()
+    except Exception:
+        # A broken connection can't roll back; the pool discards it on putconn.
+        pass
+    pool.putconn(conn)
+
+
+async def release_async(pool: AsyncConnectionPool, conn):
+    try:
+        if conn.info.transaction_status != TransactionStatus.IDLE:
+            await conn.rollback()
+    except Exception:
+        pass
+    await pool.putconn(conn)
+
+
+def pool_stats() -> dict:
+    """
+    Returns a snapshot of pool usage: connections in use, requests waiting
+    and checkout latency, alongside the raw psycopg_pool counters.
+    """
+    pool = _async_pool if _async_pool is not None else _pool
+    acquires = _acquire_stats["acquires"]
+    stats = {
+        "open": pool is not None,
+        "acquires": acquires,
+        "acquire_ms_avg": round(_acquire_stats["acquire_ms_total"] / acquires, 3) if acquires else 0.0,
+        "acquire_ms_max": round(_acquire_stats["acquire_ms_max"], 3),
+        **_usage(pool),
+    }
+    if _replica_pool is not None:
+        stats["replica"] = _usage(_replica_pool)
+    return stats
+
+
+def _usage(pool) -> dict:
+    if pool is None:
+        return {"in_use": 0, "waiting": 0}
+    raw = pool.get_stats()
+    return {
+        "in_use": raw.get("pool_size", 0) - raw.get("pool_available", 0),
+        "waiting": raw.get("requests_waiting", 0),
+        "pool": raw,
+    }
@@ -0,0 +1,88 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+# Read-your-writes bookkeeping for read/write splitting. After a user
+# writes, their reads stay on the primary until the replica has replayed
+# past the primary's WAL position at the time of the write, or until
+# DB_REPLICA_STICKY_SECONDS elapse, whichever comes first.
+#
+# State is per process; with several workers a user may briefly read from
+# the replica on a worker that didn't see the write. Only requests that
+# actually wrote (note_write(), called by the write services) pin.
+
+STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "10"))
+
+_sticky: dict[str, tuple[float, str]] = {}
+
+_writes = contextvars.ContextVar("cdb_writes", default=None)
+
+
+@contextmanager
+def track_writes():
+    """
+    Yields {"wrote": bool}, set once a write inside the block calls
+    note_write().
+    """
+    state = {"wrote": False}
+    token = _writes.set(state)
+    try:
+        yield state
+    finally:
+        _writes.reset(token)
+
+
+def note_write():
+    state = _writes.get()
+    if state is not None:
+        state["wrote"] = True
+
+
+async def record_write(subject: str, conn):
+    """
+    Pins subject's reads to the primary, remembering the primary's
+    current WAL position.
+    """
+    if not subject:
+        return
+    cursor = conn.cursor()
+    await cursor.execute("SELECT pg_current_wal_lsn()::text")
+    row = await cursor.fetchone()
+    now = time.monotonic()
+    for expired in [s for s, (expires_at, _) in _sticky.items() if expires_at <= now]:
+        del _sticky[expired]
+    _sticky[subject] = (now + STICKY_SECONDS, row[0])
+
+
+def pinned_lsn(subject: str):
+    """
+    Returns the WAL position subject's reads must wait for, or None when
+    the subject may read from the replica.
+    """
+    if not subject or subject not in _sticky:
+        return None
+    expires_at, lsn = _sticky[subject]
+    if time.monotonic() >= expires_at:
+        _sticky.pop(subject, None)
+        return None
+    return lsn
+
+
+async def replica_caught_up(conn, lsn: str) -> bool:
+    """
+    True when the replica behind conn has replayed past lsn. A server that
+    is not in recovery (a primary standing in for a replica) counts as
+    caught up.
+    """
+    cursor = conn.cursor()
+    await cursor.execute(
+        "SELECT COALESCE(pg_last_wal_replay_lsn() >= %s::pg_lsn, true)",
+        (lsn,),
+    )
+    row = await cursor.fetchone()
+    return bool(row[0])
+
+
+def release_pin(subject: str):
+    _sticky.pop(subject, None)
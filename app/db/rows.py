@@ -0,0 +1,86 @@
+from decimal import Decimal
+from functools import lru_cache
+
+import psycopg
+
+# Row mapping shared by every service. Postgres folds unquoted aliases to
+# lower case (oreb, total_fg); API_KEYS maps them back to the API's casing.
+# A RowMapper is built once per result shape (its column names) and
+# cached, so each row becomes one dict, built straight from the row's
+# values with precomputed keys. NUMERIC values are converted as they are
+# loaded: whole Decimals (SUM of integers) to int, the rest (minutes,
+# ROUND(...)) to float, the same rule jsonable_encoder applies.
+#
+# api_row is the psycopg row factory. map_row()/map_rows() give the same
+# dicts for rows fetched as tuples or sqlite3.Row (the test connections)
+# and pass through rows an api_row cursor has already mapped.
+
+STAT_KEYS = ("OREB", "FG", "FGA", "FG3", "FGA3", "FT", "FTA", "PM")
+API_KEYS = {f"{prefix}{key.lower()}": f"{prefix}{key}" for prefix in ("", "total_", "avg_") for key in STAT_KEYS}
+
+
+def api_key(column: str) -> str:
+    return API_KEYS.get(column, column)
+
+
+def decimal_value(value: Decimal):
+    return int(value) if value.as_tuple().exponent >= 0 else float(value)
+
+
+class RowMapper:
+    """
+    Maps the rows of one result shape to dicts with API keys.
+    """
+
+    __slots__ = ("keys",)
+
+    def __init__(self, columns: tuple):
+        self.keys = tuple(api_key(column) for column in columns)
+
+    def __call__(self, values) -> dict:
+        return {
+            key: decimal_value(value) if type(value) is Decimal else value
+            for key, value in zip(self.keys, values)
+        }
+
+
+@lru_cache(maxsize=1024)
+def _mapper(columns: tuple) -> RowMapper:
+    return RowMapper(columns)
+
+
+def row_mapper(description) -> RowMapper:
+    return _mapper(tuple(column[0] for column in description))
+
+
+def api_row(cursor):
+    """
+    psycopg row factory: rows as dicts with API keys and plain numbers.
+    """
+    description = cursor.description
+    if description is None:
+        return tuple
+    return row_mapper(description)
+
+
+def mapped_cursor(conn):
+    """
+    Returns a cursor whose rows map_row()/map_rows() turn into API dicts
+    (psycopg cursors already produce them).
+    """
+    if isinstance(conn, (psycopg.Connection, psycopg.AsyncConnection)):
+        return conn.cursor(row_factory=api_row)
+    return conn.cursor()
+
+
+def map_row(cursor, row):
+    if row is None or isinstance(row, dict):
+        return row
+    return row_mapper(cursor.description)(row)
+
+
+def map_rows(cursor, rows) -> list:
+    if not rows or isinstance(rows[0], dict):
+        return list(rows)
+    mapper = row_mapper(cursor.description)
+    return [mapper(row) for row in rows]
@@ -1,28 +1,32 @@
+import psycopg
+
 # Initializes database and its layout. 
+#
+# Bump SCHEMA_VERSION whenever SCHEMA_DDL changes. The API records the
+# version it created in schema_version; on boot ensure_schema() reads it
+# with one query and runs the DDL only when the database is behind.
 
-def init_db(conn):
-    cursor = conn.cursor()
+SCHEMA_VERSION = 1
 
-    cursor.execute("""
+SCHEMA_DDL = (
+    """
         CREATE TABLE IF NOT EXISTS players (
             id SERIAL PRIMARY KEY,
             name TEXT NOT NULL,
             jersey_number INTEGER,
             position TEXT
         );
-    """)
-
-    cursor.execute("""
+    """,
+    """
         CREATE TABLE IF NOT EXISTS games (
             id SERIAL PRIMARY KEY,
-            date TEXT NOT NULL,
+            date DATE NOT NULL,
             opponent TEXT NOT NULL,
             location TEXT,
             UNIQUE(date, opponent, location)
         );
-    """)
-
-    cursor.execute("""
+    """,
+    """
         CREATE TABLE IF NOT EXISTS stat_line (
             id SERIAL PRIMARY KEY,
             player_id INTEGER NOT NULL,
@@ -48,16 +52,83 @@ def init_db(conn):
             FOREIGN KEY (game_id) REFERENCES games(id),
             UNIQUE(player_id, game_id)
         );
-    """)
-
-    cursor.execute("""
+    """,
+    """
         CREATE TABLE IF NOT EXISTS users (
             id SERIAL PRIMARY KEY,
             username TEXT NOT NULL UNIQUE,
             password_hash TEXT NOT NULL,
             role TEXT NOT NULL CHECK(role IN ('admin', 'viewer')),
-            created_at TIMESTAMP NOT NULL DEFAULT (now())
+            created_at TIMESTAMP NOT NULL DEFAULT (now()),
+            token_version INTEGER NOT NULL DEFAULT 0
+        );
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS refresh_tokens (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            token_version INTEGER NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            used_at TIMESTAMPTZ
+        );
+    """,
+    "CREATE INDEX IF NOT EXISTS refresh_tokens_user_idx ON refresh_tokens (user_id);",
+    """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        );
+    """,
+)
+
+CREATE_SCHEMA_VERSION_SQL = """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            version INTEGER NOT NULL
         );
-    """)
+    """
 
+RECORD_SCHEMA_VERSION_SQL = """
+    INSERT INTO schema_version (id, version) VALUES (TRUE, %s)
+    ON CONFLICT (id) DO UPDATE SET version = GREATEST(schema_version.version, EXCLUDED.version)
+"""
+
+# Serializes workers booting at once against a database that is behind.
+SCHEMA_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('cdb_schema'))"
+
+
+def init_db(conn):
+    cursor = conn.cursor()
+    for statement in SCHEMA_DDL:
+        cursor.execute(statement)
     conn.commit()
+
+
+async def schema_version(conn) -> int:
+    """
+    Returns the recorded schema version, 0 before the first ensure_schema().
+    """
+    cursor = conn.cursor()
+    try:
+        await cursor.execute("SELECT version FROM schema_version")
+    except psycopg.errors.UndefinedTable:
+        await conn.rollback()
+        return 0
+    row = await cursor.fetchone()
+    return row[0] if row is not None else 0
+
+
+async def ensure_schema(conn) -> bool:
+    """
+    Creates the schema when the recorded version is behind SCHEMA_VERSION,
+    in one transaction. Returns True when the DDL ran.
+    """
+    if await schema_version(conn) >= SCHEMA_VERSION:
+        return False
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(SCHEMA_LOCK_SQL)
+        for statement in (*SCHEMA_DDL, CREATE_SCHEMA_VERSION_SQL):
+            await cursor.execute(statement)
+        await cursor.execute(RECORD_SCHEMA_VERSION_SQL, (SCHEMA_VERSION,))
+    return True
@@ -1,9 +1,33 @@
 from datetime import datetime, timedelta, timezone
-from jose import jwt, JWTError
-from passlib.context import CryptContext
+from functools import lru_cache
 import hashlib
+import os
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# jose and passlib are imported on first use rather than at startup, which
+# keeps them (and the crypto backends they load) off the cold-start path.
+
+# bcrypt cost. Hashes made with any other cost are replaced on the user's
+# next successful login (see verify_and_rehash).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+
+class InvalidToken(Exception):
+    """
+    Raised by decode_token() for a malformed, forged or expired token.
+    """
+
+
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
@@ -14,16 +38,30 @@ def _prehash(password: str) -> bytes:
     return hashlib.sha256(password.encode("utf-8")).digest()
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(_prehash(password))
+    return pwd_context().hash(_prehash(password))
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(_prehash(password), password_hash)
+    return pwd_context().verify(_prehash(password), password_hash)
+
+def verify_and_rehash(password: str, password_hash: str):
+    """
+    Returns (valid, new_hash). new_hash is set when the password is valid
+    but password_hash was made with a different cost.
+    """
+    return pwd_context().verify_and_update(_prehash(password), password_hash)
 
 def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError as exc:
+        raise InvalidToken(str(exc)) from exc
@@ -0,0 +1,179 @@
+import contextvars
+import weakref
+from contextlib import contextmanager
+
+import psycopg
+from psycopg.pq import TransactionStatus
+
+# Registry of hot queries. Each statement is built once at import time and
+# run by name with prepare=True, so Postgres parses and plans it once per
+# pooled connection instead of on every call.
+#
+# Invalidation: after a migration changes stat_line, invalidate() bumps the
+# schema generation. The generation is part of the statement text, so the
+# next call on every connection prepares a fresh statement and the stale one
+# ages out of psycopg's prepared cache. A "cached plan must not change result
+# type" error (a migration run from another process) triggers the same bump
+# and one retry.
+#
+# Ad-hoc statements (register(..., prepare=False), e.g. sparse fieldset
+# projections) stay out of the registry: the returned AdHoc name carries its
+# own SQL and runs unprepared, so rarely used shapes don't pile up as
+# prepared statements on every pooled connection.
+
+_STATEMENTS: dict[str, str] = {}
+_PARAMS: dict[str, tuple] = {}
+_generation = 0
+_connections = weakref.WeakKeyDictionary()
+
+_round_trips = contextvars.ContextVar("cdb_round_trips", default=None)
+_batching = contextvars.ContextVar("cdb_batching", default=False)
+
+
+class AdHoc(str):
+    """
+    The name of an unregistered statement; carries its SQL and params.
+    """
+
+    def __new__(cls, name: str, sql: str, params: tuple):
+        self = super().__new__(cls, name)
+        self.sql = sql
+        self.params = tuple(params)
+        return self
+
+
+def register(name: str, sql: str, params: tuple = (), prepare: bool = True) -> str:
+    """
+    Registers a statement under name and returns the name.
+    params lists the parameter names in placeholder order. With
+    prepare=False nothing is registered and an AdHoc name is returned.
+    """
+    if not prepare:
+        return AdHoc(name, sql, params)
+    _STATEMENTS[name] = sql
+    _PARAMS[name] = tuple(params)
+    return name
+
+
+def get_sql(name: str) -> str:
+    if isinstance(name, AdHoc):
+        return name.sql
+    return _STATEMENTS[name]
+
+
+def registered() -> dict:
+    """
+    Returns {name: (sql, param_names)} for every registered statement.
+    """
+    return {name: (sql, _PARAMS[name]) for name, sql in _STATEMENTS.items()}
+
+
+def invalidate():
+    """
+    Forces every connection to re-prepare registered statements.
+    """
+    global _generation
+    _generation += 1
+
+
+def _versioned_sql(name: str) -> str:
+    return f"/* {name} g{_generation} */ {_STATEMENTS[name]}"
+
+
+@contextmanager
+def track_round_trips():
+    """
+    Counts statements and network round trips issued through this module
+    (and app.db.batch) inside the block.
+    """
+    counter = {"statements": 0, "round_trips": 0}
+    token = _round_trips.set(counter)
+    try:
+        yield counter
+    finally:
+        _round_trips.reset(token)
+
+
+def note_round_trip(statements: int = 0, round_trips: int = 1):
+    counter = _round_trips.get()
+    if counter is not None:
+        counter["statements"] += statements
+        counter["round_trips"] += round_trips
+
+
+def _track(conn, name: str):
+    state = _connections.get(conn)
+    if state is None:
+        state = {"prepared": set(), "hits": 0, "misses": 0}
+        _connections[conn] = state
+    key = (name, _generation)
+    if key in state["prepared"]:
+        state["hits"] += 1
+    else:
+        state["misses"] += 1
+        state["prepared"].add(key)
+
+
+def execute(cursor, name: str, params=()):
+    """
+    Runs a registered statement on cursor. Non-psycopg cursors (the SQLite
+    test connections) run the plain SQL.
+    """
+    if not isinstance(cursor, psycopg.Cursor) or isinstance(name, AdHoc):
+        cursor.execute(get_sql(name), params)
+        return cursor
+
+    conn = cursor.connection
+    _track(conn, name)
+    try:
+        cursor.execute(_versioned_sql(name), params, prepare=True)
+    except psycopg.errors.FeatureNotSupported:
+        if conn.info.transaction_status == TransactionStatus.INERROR:
+            conn.rollback()
+        invalidate()
+        _track(conn, name)
+        cursor.execute(_versioned_sql(name), params, prepare=True)
+    return cursor
+
+
+async def aexecute(cursor, name: str, params=()):
+    """
+    Async counterpart of execute() for psycopg.AsyncCursor.
+    """
+    note_round_trip(statements=1, round_trips=0 if _batching.get() else 1)
+    if isinstance(name, AdHoc):
+        await cursor.execute(name.sql, params)
+        return cursor
+    conn = cursor.connection
+    _track(conn, name)
+    try:
+        await cursor.execute(_versioned_sql(name), params, prepare=True)
+    except psycopg.errors.FeatureNotSupported:
+        if conn.info.transaction_status == TransactionStatus.INERROR:
+            await conn.rollback()
+        invalidate()
+        _track(conn, name)
+        await cursor.execute(_versioned_sql(name), params, prepare=True)
+    return cursor
+
+
+def statement_stats() -> dict:
+    """
+    Returns prepared-statement hit/miss counts per live connection.
+    """
+    connections = []
+    for conn, state in list(_connections.items()):
+        connections.append({
+            "connection": id(conn),
+            "backend_pid": None if conn.closed else conn.info.backend_pid,
+            "prepared": len(state["prepared"]),
+            "hits": state["hits"],
+            "misses": state["misses"],
+        })
+    return {
+        "generation": _generation,
+        "statements": len(_STATEMENTS),
+        "hits": sum(c["hits"] for c in connections),
+        "misses": sum(c["misses"] for c in connections),
+        "connections": connections,
+    }
@@ -0,0 +1,62 @@
+from app.db.routing import note_write
+from app.db.statements import aexecute, register
+
+# Monotonic data versions, stored in data_versions so every worker agrees.
+# Scopes are "global", "player:<id>" and "game:<id>". Write services bump
+# the scopes they touch before committing; read routes derive ETags from
+# the versions of the scopes their response depends on.
+
+GLOBAL_SCOPE = "global"
+
+BUMP_VERSIONS_SQL = """
+    INSERT INTO data_versions (scope, version)
+    SELECT scope, 1 FROM unnest(%s::text[]) AS scope
+    ON CONFLICT (scope) DO UPDATE SET version = data_versions.version + 1
+"""
+
+READ_VERSIONS = register(
+    "read_data_versions",
+    "SELECT scope, version FROM data_versions WHERE scope = ANY(%s::text[])",
+    ("scopes",),
+)
+
+
+def player_scope(player_id) -> str:
+    return f"player:{player_id}"
+
+
+def game_scope(game_id) -> str:
+    return f"game:{game_id}"
+
+
+def change_scopes(player_ids=(), game_ids=()) -> list:
+    """
+    Returns the scopes a write to these players/games invalidates,
+    always including the global scope.
+    """
+    scopes = {GLOBAL_SCOPE}
+    scopes.update(player_scope(p) for p in player_ids)
+    scopes.update(game_scope(g) for g in game_ids)
+    # Sorted so concurrent writers lock the rows in the same order.
+    return sorted(scopes)
+
+
+def bump_versions(conn, player_ids=(), game_ids=()):
+    cursor = conn.cursor()
+    cursor.execute(BUMP_VERSIONS_SQL, (change_scopes(player_ids, game_ids),))
+
+
+async def abump_versions(conn, player_ids=(), game_ids=()):
+    cursor = conn.cursor()
+    await cursor.execute(BUMP_VERSIONS_SQL, (change_scopes(player_ids, game_ids),))
+    note_write()
+
+
+async def read_versions(conn, scopes) -> dict:
+    """
+    Returns {scope: version}; scopes never written are at version 0.
+    """
+    cursor = conn.cursor()
+    await aexecute(cursor, READ_VERSIONS, (list(scopes),))
+    found = dict(await cursor.fetchall())
+    return {scope: found.get(scope, 0) for scope in scopes}
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import time
+
+import psycopg
+
+from app.db.batch import run_batch
+from app.db.pagination import page_query
+from app.db.pool import acquire_async, get_async_pool, release_async
+from app.db.rows import map_rows, mapped_cursor
+from app.db.statements import aexecute
+from app.db.versions import abump_versions
+from app.services.analytics_service import (
+    LEADERS,
+    LEADERS_MATERIALIZED,
+    PLAYER_ANALYTICS,
+    PLAYER_ANALYTICS_MATERIALIZED,
+    REFRESH_SEASON_AGGREGATES_SQL,
+    _group_leaders,
+    leader_metrics,
+    player_analytics_pager,
+)
+from app.services.result_cache import TEAM_TAG, cached, invalidate_tags, team_tags
+
+# Async mirror of app.services.analytics_service for the API request path.
+#
+# /analytics/players and /analytics/leaders read the season aggregates view
+# unless ANALYTICS_MATERIALIZED=0 (or the view hasn't been created yet, in
+# which case they compute live). Stat line writes call
+# schedule_season_refresh(); the view is refreshed once
+# ANALYTICS_REFRESH_DEBOUNCE seconds pass without another write, and at most
+# ANALYTICS_REFRESH_MAX_DELAY seconds after the first pending write.
+
+ANALYTICS_MATERIALIZED = os.getenv("ANALYTICS_MATERIALIZED", "1") != "0"
+REFRESH_DEBOUNCE = float(os.getenv("ANALYTICS_REFRESH_DEBOUNCE", "2"))
+REFRESH_MAX_DELAY = float(os.getenv("ANALYTICS_REFRESH_MAX_DELAY", "30"))
+
+logger = logging.getLogger(__name__)
+
+_view_missing = False
+_refresh = {
+    "first_request": None,
+    "last_request": None,
+    "task": None,
+    "refreshes": 0,
+    "errors": 0,
+    "last_refresh_ms": None,
+}
+
+
+def _use_materialized() -> bool:
+    return ANALYTICS_MATERIALIZED and not _view_missing
+
+
+def _mark_view_missing():
+    global _view_missing
+    if not _view_missing:
+        logger.warning("season aggregates view missing; computing analytics live (run scripts/migrate.py)")
+    _view_missing = True
+
+
+@cached(tags=team_tags)
+async def player_totals_and_averages(conn):
+    """
+    Returns per-player totals and per-game averages across all games.
+    """
+    cursor = mapped_cursor(conn)
+    if _use_materialized():
+        try:
+            await aexecute(cursor, PLAYER_ANALYTICS_MATERIALIZED)
+        except psycopg.errors.UndefinedTable:
+            _mark_view_missing()
+    if not _use_materialized():
+        await aexecute(cursor, PLAYER_ANALYTICS)
+    return map_rows(cursor, await cursor.fetchall())
+
+@cached(tags=team_tags)
+async def player_analytics_page(conn, sort=None, cursor=None, limit=None, fields=None):
+    """
+    Returns one Page of per-player totals and averages, only fields when
+    given. Raises ValueError for a bad sort or cursor.
+    """
+    if _use_materialized():
+        try:
+            pager = player_analytics_pager(fields, sort, materialized=True)
+            return await _player_analytics_page(conn, pager, sort, cursor, limit)
+        except psycopg.errors.UndefinedTable:
+            _mark_view_missing()
+    return await _player_analytics_page(conn, player_analytics_pager(fields, sort), sort, cursor, limit)
+
+async def _player_analytics_page(conn, pager, sort, cursor, limit):
+    (page,) = await run_batch(conn, page_query(pager, (), sort, cursor, limit))
+    return page
+
+def current_player_analytics_pager(fields=None, sort=None):
+    """
+    Returns the pager player_analytics_page() reads, for count estimates.
+    """
+    return player_analytics_pager(fields, sort, materialized=_use_materialized())
+
+@cached(tags=team_tags)
+async def leaders(conn, limit: int = 5, metrics=None):
+    """
+    Returns top-N leaders by totals in key categories (or just metrics),
+    all boards from one statement.
+    """
+    metrics = leader_metrics(metrics)
+    if _use_materialized():
+        try:
+            return await _leaders(conn, LEADERS_MATERIALIZED, limit, metrics)
+        except psycopg.errors.UndefinedTable:
+            _mark_view_missing()
+    return await _leaders(conn, LEADERS, limit, metrics)
+
+async def _leaders(conn, statement: str, limit: int, metrics: tuple):
+    cursor = mapped_cursor(conn)
+    await aexecute(cursor, statement, (list(metrics), limit))
+    return _group_leaders(map_rows(cursor, await cursor.fetchall()), metrics)
+
+
+def schedule_season_refresh():
+    """
+    Requests a debounced refresh of the season aggregates view.
+    """
+    if not _use_materialized():
+        return
+    now = time.monotonic()
+    _refresh["last_request"] = now
+    if _refresh["first_request"] is None:
+        _refresh["first_request"] = now
+    task = _refresh["task"]
+    if task is None or task.done():
+        _refresh["task"] = asyncio.get_running_loop().create_task(_debounced_refresh())
+
+
+async def _debounced_refresh():
+    while _refresh["last_request"] is not None:
+        due = min(_refresh["last_request"] + REFRESH_DEBOUNCE, _refresh["first_request"] + REFRESH_MAX_DELAY)
+        wait = due - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+            continue
+        # Writes arriving while this refresh runs schedule another pass.
+        _refresh["first_request"] = _refresh["last_request"] = None
+        try:
+            await refresh_season_aggregates()
+        except Exception:
+            _refresh["errors"] += 1
+            logger.exception("season aggregates refresh failed")
+
+
+async def refresh_season_aggregates():
+    """
+    Refreshes the view without blocking readers, then moves the global data
+    version and drops cached team-wide results so clients see the new rows.
+    """
+    started = time.perf_counter()
+    pool = await get_async_pool()
+    conn = await acquire_async(pool)
+    try:
+        cursor = conn.cursor()
+        await cursor.execute(REFRESH_SEASON_AGGREGATES_SQL)
+        await abump_versions(conn)
+    finally:
+        await release_async(pool, conn)
+    invalidate_tags(TEAM_TAG)
+    _refresh["refreshes"] += 1
+    _refresh["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+
+async def cancel_season_refresh():
+    task = _refresh["task"]
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    _refresh["task"] = None
+
+
+def season_refresh_stats() -> dict:
+    return {
+        "materialized": _use_materialized(),
+        "pending": _refresh["last_request"] is not None,
+        "refreshes": _refresh["refreshes"],
+        "errors": _refresh["errors"],
+        "last_refresh_ms": _refresh["last_refresh_ms"],
+    }
@@ -0,0 +1,34 @@
+from app.services.export_service import (
+    EXPORT_BATCH_ROWS,
+    EXPORTS,
+    GzipStream,
+    encode_header,
+    encode_rows,
+    export_columns,
+)
+
+# Async mirror of app.services.export_service for the API request path.
+
+
+async def stream_export(conn, kind: str, params: tuple, fmt: str, batch_rows: int = EXPORT_BATCH_ROWS):
+    """
+    Yields the export as encoded byte chunks, one per batch of rows.
+    """
+    async with conn.transaction():
+        async with conn.cursor(name=f"export_{kind}") as cursor:
+            await cursor.execute(EXPORTS[kind], params)
+            columns = export_columns(cursor.description)
+            yield encode_header(fmt, columns)
+            while rows := await cursor.fetchmany(batch_rows):
+                yield encode_rows(fmt, columns, rows)
+
+
+async def gzip_chunks(chunks):
+    stream = GzipStream()
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        compressed = stream.compress(chunk)
+        if compressed:
+            yield compressed
+    yield stream.finish()
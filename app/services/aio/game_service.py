@@ -0,0 +1,80 @@
+import psycopg
+
+from app.db.batch import run_batch
+from app.db.pagination import page_query
+from app.db.rows import map_row, map_rows, mapped_cursor
+from app.db.statements import aexecute
+from app.db.versions import abump_versions
+from app.services.game_service import GAMES_IN_WINDOW, GAMES_PAGER, _row_id
+from app.services.result_cache import TEAM_TAG, game_tag, invalidate_tags
+
+# Async mirror of app.services.game_service for the API request path.
+
+
+async def create_game(conn, date, opponent, location=None):
+    """
+    Inserts a new game into the database.
+    Returns the new game's ID.
+    """
+    try:
+        async with conn.transaction():
+            cursor = conn.cursor()
+            await cursor.execute(
+                """
+                INSERT INTO games (date, opponent, location)
+                VALUES (%s, %s, %s)
+                RETURNING id
+                """,
+                (date, opponent, location)
+            )
+
+            row = await cursor.fetchone()
+            game_id = _row_id(row)
+            await abump_versions(conn, game_ids=[game_id])
+    except psycopg.errors.UniqueViolation:
+        return None
+    invalidate_tags(game_tag(game_id))
+    return game_id
+
+
+async def get_all_games(conn, start=None, end=None):
+    """
+    Returns games in date order, optionally limited to [start, end].
+    """
+    cursor = mapped_cursor(conn)
+
+    await aexecute(cursor, GAMES_IN_WINDOW, (start, end))
+    return map_rows(cursor, await cursor.fetchall())
+
+async def get_games_page(conn, start=None, end=None, sort=None, cursor=None, limit=None):
+    """
+    Returns one Page of games in [start, end]. Raises ValueError for a bad
+    sort or cursor.
+    """
+    (page,) = await run_batch(conn, page_query(GAMES_PAGER, (start, end), sort, cursor, limit))
+    return page
+
+async def get_game_by_id(conn, game_id):
+    """
+    Returns a single game by ID, or None if not found.
+    """
+    cursor = mapped_cursor(conn)
+
+    await cursor.execute(
+        "SELECT * FROM games WHERE id = %s",
+        (game_id,)
+    )
+
+    return map_row(cursor, await cursor.fetchone())
+
+async def delete_game(conn, game_id):
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute("DELETE FROM games WHERE id = %s", (game_id,))
+        changed = cursor.rowcount > 0
+        if changed:
+            await abump_versions(conn, game_ids=[game_id])
+
+    if changed:
+        invalidate_tags(game_tag(game_id), TEAM_TAG)
+    return changed
@@ -0,0 +1,105 @@
+from app.db.batch import Query, run_batch
+from app.db.pagination import page_query
+from app.db.rows import map_row, map_rows, mapped_cursor
+from app.db.versions import abump_versions
+from app.services.player_service import PLAYER_BY_ID, PLAYERS_PAGER, _row_id
+from app.services.result_cache import TEAM_TAG, invalidate_tags, player_tag
+
+# Async mirror of app.services.player_service for the API request path.
+
+
+async def create_player(conn, name, jersey_number=None, position=None):
+    """
+    Inserts a new player into the database.
+    Returns the new player's ID.
+    """
+    async with conn.transaction():
+        cursor = conn.cursor()
+
+        await cursor.execute(
+            """
+            INSERT INTO players (name, jersey_number, position)
+            VALUES (%s, %s, %s)
+            RETURNING id
+            """,
+            (name, jersey_number, position)
+        )
+
+        row = await cursor.fetchone()
+        player_id = _row_id(row)
+        await abump_versions(conn, player_ids=[player_id])
+
+    invalidate_tags(player_tag(player_id), TEAM_TAG)
+    return player_id
+
+async def get_all_players(conn):
+    """
+    Returns all players as a list of rows.
+    """
+    cursor = mapped_cursor(conn)
+
+    await cursor.execute("SELECT * FROM players")
+    return map_rows(cursor, await cursor.fetchall())
+
+async def get_players_page(conn, sort=None, cursor=None, limit=None):
+    """
+    Returns one Page of players. Raises ValueError for a bad sort or cursor.
+    """
+    (page,) = await run_batch(conn, page_query(PLAYERS_PAGER, (), sort, cursor, limit))
+    return page
+
+async def _shape_player(cursors):
+    cursor = cursors[0]
+    return map_row(cursor, await cursor.fetchone())
+
+def player_query(player_id) -> Query:
+    return Query(((PLAYER_BY_ID, (player_id,)),), _shape_player)
+
+async def get_player_by_id(conn, player_id):
+    """
+    Returns a single player by ID, or None if not found.
+    """
+    (player,) = await run_batch(conn, player_query(player_id))
+    return player
+
+async def delete_player(conn, player_id):
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute("DELETE FROM players WHERE id = %s", (player_id,))
+        changed = cursor.rowcount > 0
+        if changed:
+            await abump_versions(conn, player_ids=[player_id])
+
+    if changed:
+        invalidate_tags(player_tag(player_id), TEAM_TAG)
+    return changed
+
+async def update_player(conn, player_id, name=None, jersey_number=None, position=None):
+    updates = []
+    values = []
+
+    if name is not None:
+        updates.append("name = %s")
+        values.append(name)
+    if jersey_number is not None:
+        updates.append("jersey_number = %s")
+        values.append(jersey_number)
+    if position is not None:
+        updates.append("position = %s")
+        values.append(position)
+
+    if not updates:
+        return False
+
+    values.append(player_id)
+    query = f"UPDATE players SET {', '.join(updates)} WHERE id = %s"
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(query, values)
+        changed = cursor.rowcount > 0
+        if changed:
+            await abump_versions(conn, player_ids=[player_id])
+
+    if changed:
+        invalidate_tags(player_tag(player_id), TEAM_TAG)
+    return changed
@@ -0,0 +1,106 @@
+from app.db.aggregates import run_aggregate_batch
+from app.db.batch import Query, run_batch
+from app.db.rows import map_row
+from app.services.aio.player_service import player_query
+from app.services.aio.split_service import splits_query
+from app.services.aio.stat_service import game_log_query
+from app.services.player_stats_service import (
+    DASHBOARD_SECTIONS,
+    PLAYER_AGGREGATE_AVERAGES,
+    PLAYER_AGGREGATE_TOTALS,
+    PLAYER_AVERAGES,
+    PLAYER_TOTALS,
+    STAT_COLUMNS,
+    _empty_stats,
+    build_dashboard,
+    needs_game_log,
+    player_splits_statement,
+    player_stats_statement,
+)
+from app.services.result_cache import cached, player_tags
+from app.services.split_service import split_view
+
+# Async mirror of app.services.player_stats_service for the API request path.
+# Each read is also exposed as a Query so routes can batch it with other
+# reads into one round trip.
+
+
+async def _shape_stats(cursors) -> dict:
+    cursor = cursors[0]
+    row = await cursor.fetchone()
+    return map_row(cursor, row) if row is not None else _empty_stats()
+
+
+def player_totals_query(player_id: int, start=None, end=None) -> Query:
+    statement = player_stats_statement(PLAYER_AGGREGATE_TOTALS, PLAYER_TOTALS, player_id, start, end)
+    return Query((statement,), _shape_stats)
+
+
+def player_averages_query(player_id: int, start=None, end=None) -> Query:
+    statement = player_stats_statement(PLAYER_AGGREGATE_AVERAGES, PLAYER_AVERAGES, player_id, start, end)
+    return Query((statement,), _shape_stats)
+
+
+def player_splits_query(player_id: int, start=None, end=None, fields=None) -> Query:
+    return splits_query(player_splits_statement(fields), (player_id, start, end), fields or STAT_COLUMNS)
+
+
+async def _for_existing_player(conn, player_id: int, build, start=None, end=None):
+    # The player lookup shares the stats query's round trip.
+    player, result = await run_aggregate_batch(
+        conn, lambda: (player_query(player_id), build(player_id, start, end))
+    )
+    return None if player is None else result
+
+
+@cached(tags=player_tags)
+async def get_player_totals(conn, player_id: int, start=None, end=None) -> dict:
+    """
+    Returns the player's totals, or None when the player doesn't exist.
+    """
+    return await _for_existing_player(conn, player_id, player_totals_query, start, end)
+
+
+@cached(tags=player_tags)
+async def get_player_averages(conn, player_id: int, start=None, end=None) -> dict:
+    return await _for_existing_player(conn, player_id, player_averages_query, start, end)
+
+
+@cached(tags=player_tags)
+async def get_player_splits(conn, player_id: int, start=None, end=None, fields=None) -> dict:
+    """
+    Returns totals and averages splits from one scan (only fields when
+    given), or None when the player doesn't exist. Both splits routes share
+    this cache entry.
+    """
+    def build(player_id, start, end):
+        return player_splits_query(player_id, start, end, fields)
+
+    return await _for_existing_player(conn, player_id, build, start, end)
+
+
+async def get_player_splits_totals(conn, player_id: int, start=None, end=None, fields=None) -> dict:
+    splits = await get_player_splits(conn, player_id, start, end, fields)
+    return None if splits is None else split_view(splits, "totals")
+
+
+async def get_player_splits_averages(conn, player_id: int, start=None, end=None, fields=None) -> dict:
+    splits = await get_player_splits(conn, player_id, start, end, fields)
+    return None if splits is None else split_view(splits, "averages")
+
+
+@cached(tags=player_tags)
+async def get_player_dashboard(conn, player_id: int, start=None, end=None, sections=DASHBOARD_SECTIONS) -> dict:
+    """
+    Returns the requested dashboard sections, or None when the player
+    doesn't exist. The player lookup and the one game log scan share a
+    round trip; every other section is derived from that scan.
+    """
+    if not needs_game_log(sections):
+        (player,) = await run_batch(conn, player_query(player_id))
+        game_log = []
+    else:
+        player, game_log = await run_batch(conn, player_query(player_id), game_log_query(player_id, start, end))
+    if player is None:
+        return None
+    return build_dashboard(player, game_log, sections)
@@ -0,0 +1,14 @@
+from app.db.batch import Query
+from app.db.rows import map_rows
+from app.services.split_service import shape_splits
+
+# Async mirror of app.services.split_service: the grouping-sets scan as a
+# Query, so it can share a round trip with the caller's other reads.
+
+
+def splits_query(statement: str, params: tuple, columns) -> Query:
+    async def shape(cursors) -> dict:
+        cursor = cursors[0]
+        return shape_splits(map_rows(cursor, await cursor.fetchall()), columns)
+
+    return Query(((statement, params),), shape)
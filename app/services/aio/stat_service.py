@@ -0,0 +1,360 @@
+from app.db.batch import Query, run_batch
+from app.db.pagination import page_query
+from app.db.rows import map_row, map_rows, mapped_cursor
+from app.db.statements import aexecute
+from app.db.versions import abump_versions
+from app.services.aio.analytics_service import schedule_season_refresh
+from app.services.aio.player_service import player_query
+from app.services.result_cache import cached, invalidate_stat_lines, player_tags
+from app.services.stat_service import (
+    BOX_SCORE_UPSERT_SQL,
+    DELETE_MISSING_LINES_SQL,
+    GAME_LOG,
+    INSERT_STATLINE_SQL,
+    LOCK_GAME_SQL,
+    UNKNOWN_PLAYERS_SQL,
+    UPSERT_STATLINE_SQL,
+    _box_score_params,
+    _box_score_report,
+    _changed_players,
+    _row_id,
+    game_log_pager,
+    game_statlines_statement,
+    validate_box_score,
+)
+
+# Async mirror of app.services.stat_service for the API request path.
+
+
+async def create_statline(
+    conn,
+    player_id,
+    game_id,
+    minutes=0,
+    points=0,
+    rebounds=0,
+    OREB=0,
+    assists=0,
+    steals=0,
+    blocks=0,
+    turnovers=0,
+    fouls=0,
+    FG=0,
+    FGA=0,
+    FG3=0,
+    FGA3=0,
+    FT=0,
+    FTA=0,
+    PM=0,
+    starter=0,
+):
+    """
+    Inserts a stat line for a player in a specific game.
+    Returns the stat line ID.
+    """
+
+    async with conn.transaction():
+        cursor = conn.cursor()
+
+        await cursor.execute(
+            INSERT_STATLINE_SQL,
+            (player_id, game_id, minutes, points, rebounds, OREB, assists,
+                steals, blocks, turnovers, fouls, FG, FGA, FG3, FGA3, FT, FTA, PM, starter)
+        )
+        row = await cursor.fetchone()
+        await abump_versions(conn, [player_id], [game_id])
+
+    invalidate_stat_lines([player_id], [game_id])
+    schedule_season_refresh()
+    return _row_id(row)
+
+async def update_statline(
+    conn,
+    player_id,
+    game_id,
+    minutes=None,
+    points=None,
+    rebounds=None,
+    OREB=None,
+    assists=None,
+    steals=None,
+    blocks=None,
+    turnovers=None,
+    fouls=None,
+    FG=None,
+    FGA=None,
+    FG3=None,
+    FGA3=None,
+    FT=None,
+    FTA=None,
+    PM=None,
+    starter=None,
+):
+    """
+    Updates an existing statline for a player in a game.
+    Only fields provided (not None) are updated.
+    Returns True if a row was updated, False otherwise.
+    """
+    provided = {
+        "minutes": minutes,
+        "points": points,
+        "rebounds": rebounds,
+        "OREB": OREB,
+        "assists": assists,
+        "steals": steals,
+        "blocks": blocks,
+        "turnovers": turnovers,
+        "fouls": fouls,
+        "FG": FG,
+        "FGA": FGA,
+        "FG3": FG3,
+        "FGA3": FGA3,
+        "FT": FT,
+        "FTA": FTA,
+        "PM": PM,
+        "starter": starter,
+    }
+    updates = [f"{column} = %s" for column, value in provided.items() if value is not None]
+    values = [value for value in provided.values() if value is not None]
+
+    if not updates:
+        return False
+
+    values.extend([player_id, game_id])
+
+    query = f"""
+        UPDATE stat_line
+        SET {', '.join(updates)}
+        WHERE player_id = %s
+        AND game_id = %s
+    """
+
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(query, values)
+        changed = cursor.rowcount > 0
+        if changed:
+            await abump_versions(conn, [player_id], [game_id])
+
+    if changed:
+        invalidate_stat_lines([player_id], [game_id])
+        schedule_season_refresh()
+    return changed
+
+
+async def all_player_statlines(conn, player_id):
+    """
+    Returns all statlines for a given player.
+    """
+    cursor = mapped_cursor(conn)
+
+    await cursor.execute(
+        """
+        SELECT * FROM stat_line WHERE player_id = %s
+        """,
+        (player_id,)
+    )
+
+    return map_rows(cursor, await cursor.fetchall())
+
+async def player_stats_for_game(conn, player_id, game_id):
+    """
+    Returns player's stats for specific game.
+    """
+    cursor = mapped_cursor(conn)
+
+    await cursor.execute(
+        """
+        SELECT *
+        FROM stat_line
+        WHERE player_id = %s
+        AND game_id = %s
+        """,
+        (player_id, game_id)
+    )
+
+    return map_row(cursor, await cursor.fetchone())
+
+async def get_stats_for_game(conn, game_id):
+    """
+    Returns all statlines for a given game.
+    """
+    cursor = mapped_cursor(conn)
+
+    await cursor.execute(
+        """
+        SELECT * FROM stat_line WHERE game_id = %s
+        """,
+        (game_id,)
+    )
+
+    return map_rows(cursor, await cursor.fetchall())
+
+async def get_statlines_for_game(conn, game_id: int, fields=None):
+    cursor = mapped_cursor(conn)
+    await aexecute(cursor, game_statlines_statement(fields), (game_id,))
+    return map_rows(cursor, await cursor.fetchall())
+
+async def delete_statline(conn, player_id, game_id):
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(
+            """
+            DELETE FROM stat_line
+            WHERE player_id = %s AND game_id = %s
+            """,
+            (player_id, game_id),
+        )
+        changed = cursor.rowcount > 0
+        if changed:
+            await abump_versions(conn, [player_id], [game_id])
+
+    if changed:
+        invalidate_stat_lines([player_id], [game_id])
+        schedule_season_refresh()
+    return changed
+
+async def delete_statlines_for_player(conn, player_id):
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(
+            """
+            DELETE FROM stat_line
+            WHERE player_id = %s
+            RETURNING game_id
+            """,
+            (player_id,),
+        )
+        game_ids = [r[0] for r in await cursor.fetchall()]
+        if game_ids:
+            await abump_versions(conn, [player_id], game_ids)
+
+    if game_ids:
+        invalidate_stat_lines([player_id], game_ids)
+        schedule_season_refresh()
+    return len(game_ids)
+
+async def delete_statlines_for_game(conn, game_id):
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(
+            "DELETE FROM stat_line WHERE game_id = %s RETURNING player_id",
+            (game_id,),
+        )
+        player_ids = [r[0] for r in await cursor.fetchall()]
+        if player_ids:
+            await abump_versions(conn, player_ids, [game_id])
+
+    if player_ids:
+        invalidate_stat_lines(player_ids, [game_id])
+        schedule_season_refresh()
+    return len(player_ids)
+
+async def upsert_statline(
+    conn,
+    player_id: int,
+    game_id: int,
+    minutes: float = 0,
+    points: int = 0,
+    rebounds: int = 0,
+    OREB: int = 0,
+    assists: int = 0,
+    steals: int = 0,
+    blocks: int = 0,
+    turnovers: int = 0,
+    fouls: int = 0,
+    FG: int = 0,
+    FGA: int = 0,
+    FG3: int = 0,
+    FGA3: int = 0,
+    FT: int = 0,
+    FTA: int = 0,
+    PM: int = 0,
+    starter: int = 0,
+):
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(
+            UPSERT_STATLINE_SQL,
+            (player_id, game_id, minutes, points, rebounds, OREB, assists, steals, blocks, turnovers, fouls,
+             FG, FGA, FG3, FGA3, FT, FTA, PM, starter),
+        )
+        await abump_versions(conn, [player_id], [game_id])
+    invalidate_stat_lines([player_id], [game_id])
+    schedule_season_refresh()
+    return True
+
+async def _written_rows(cursor) -> list:
+    rows = []
+    while True:
+        rows.extend(await cursor.fetchall())
+        if not cursor.nextset():
+            return rows
+
+async def save_box_score(conn, game_id: int, lines: list[dict], delete_missing: bool = False):
+    """
+    Upserts every stat line for a game in one transaction, deleting lines
+    for players not in lines when delete_missing is set. Returns the
+    inserted/updated/unchanged/deleted player IDs, or None when the game
+    doesn't exist. Raises ValueError for invalid lines or unknown players.
+    """
+    errors = validate_box_score(lines)
+    if errors:
+        raise ValueError("; ".join(errors))
+    player_ids = [line["player_id"] for line in lines]
+
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(LOCK_GAME_SQL, (game_id,))
+        if await cursor.fetchone() is None:
+            return None
+        await cursor.execute(UNKNOWN_PLAYERS_SQL, (player_ids,))
+        unknown = [r[0] for r in await cursor.fetchall()]
+        if unknown:
+            raise ValueError(f"unknown players: {', '.join(map(str, unknown))}")
+
+        written = []
+        if lines:
+            await cursor.executemany(BOX_SCORE_UPSERT_SQL, _box_score_params(game_id, lines), returning=True)
+            written = await _written_rows(cursor)
+        deleted = []
+        if delete_missing:
+            await cursor.execute(DELETE_MISSING_LINES_SQL, (game_id, player_ids))
+            deleted = [r[0] for r in await cursor.fetchall()]
+
+        report = _box_score_report(game_id, player_ids, written, deleted)
+        changed = _changed_players(report)
+        if changed:
+            await abump_versions(conn, changed, [game_id])
+
+    if changed:
+        invalidate_stat_lines(changed, [game_id])
+        schedule_season_refresh()
+    return report
+
+async def _shape_rows(cursors):
+    cursor = cursors[0]
+    return map_rows(cursor, await cursor.fetchall())
+
+def game_log_query(player_id: int, start=None, end=None) -> Query:
+    return Query(((GAME_LOG, (player_id, start, end)),), _shape_rows)
+
+async def get_game_log_for_player(conn, player_id: int, start=None, end=None):
+    (rows,) = await run_batch(conn, game_log_query(player_id, start, end))
+    return rows
+
+def game_log_page_query(player_id: int, start=None, end=None, sort=None, cursor=None, limit=None, fields=None) -> Query:
+    return page_query(game_log_pager(fields, sort), (player_id, start, end), sort, cursor, limit)
+
+@cached(tags=player_tags)
+async def get_player_game_log(conn, player_id: int, start=None, end=None, sort=None, cursor=None, limit=None, fields=None):
+    """
+    Returns one Page of the player's game log (narrowed to fields when
+    given), or None when the player doesn't exist. Raises ValueError for a
+    bad sort or cursor.
+    """
+    # The player lookup shares the page's round trip.
+    player, page = await run_batch(
+        conn, player_query(player_id), game_log_page_query(player_id, start, end, sort, cursor, limit, fields)
+    )
+    return None if player is None else page
@@ -0,0 +1,65 @@
+from app.db.aggregates import run_aggregate_batch
+from app.db.batch import Query, run_batch
+from app.db.rows import map_row
+from app.services.aio.split_service import splits_query
+from app.services.team_stats_service import (
+    STAT_COLUMNS,
+    TEAM_AGGREGATE_AVERAGES,
+    TEAM_AGGREGATE_TOTALS,
+    TEAM_AVERAGES,
+    TEAM_TOTALS,
+    _empty_stats,
+    team_splits_statement,
+    team_stats_statement,
+)
+from app.services.result_cache import cached, team_tags
+from app.services.split_service import split_view
+
+# Async mirror of app.services.team_stats_service for the API request path.
+
+
+async def _shape_stats(cursors) -> dict:
+    cursor = cursors[0]
+    row = await cursor.fetchone()
+    return map_row(cursor, row) if row is not None else _empty_stats()
+
+
+def team_totals_query(start=None, end=None) -> Query:
+    statement = team_stats_statement(TEAM_AGGREGATE_TOTALS, TEAM_TOTALS)
+    return Query(((statement, (start, end)),), _shape_stats)
+
+
+def team_averages_query(start=None, end=None) -> Query:
+    statement = team_stats_statement(TEAM_AGGREGATE_AVERAGES, TEAM_AVERAGES)
+    return Query(((statement, (start, end)),), _shape_stats)
+
+
+@cached(tags=team_tags)
+async def get_team_totals(conn, start=None, end=None) -> dict:
+    (totals,) = await run_aggregate_batch(conn, lambda: (team_totals_query(start, end),))
+    return totals
+
+
+@cached(tags=team_tags)
+async def get_team_averages(conn, start=None, end=None) -> dict:
+    (averages,) = await run_aggregate_batch(conn, lambda: (team_averages_query(start, end),))
+    return averages
+
+
+@cached(tags=team_tags)
+async def get_team_splits(conn, start=None, end=None, fields=None) -> dict:
+    """
+    Returns totals and averages splits from one scan (only fields when
+    given); both splits routes share this cache entry.
+    """
+    query = splits_query(team_splits_statement(fields), (start, end), fields or STAT_COLUMNS)
+    (splits,) = await run_batch(conn, query)
+    return splits
+
+
+async def get_team_splits_totals(conn, start=None, end=None, fields=None) -> dict:
+    return split_view(await get_team_splits(conn, start, end, fields), "totals")
+
+
+async def get_team_splits_averages(conn, start=None, end=None, fields=None) -> dict:
+    return split_view(await get_team_splits(conn, start, end, fields), "averages")
@@ -0,0 +1,39 @@
+from app.services.token_service import (
+    CONSUME_REFRESH_TOKEN_SQL,
+    INSERT_REFRESH_TOKEN_SQL,
+    PRUNE_REFRESH_TOKENS_SQL,
+    _new_refresh_token,
+    _user_from_consumed,
+    hash_refresh_token,
+)
+
+# Async mirror of app.services.token_service for the API request path.
+# The API pool is autocommit, so multi-statement writes use transaction().
+
+
+async def issue_refresh_token(conn, user: dict) -> str:
+    """
+    Stores and returns a new refresh token for user.
+    """
+    token, params = _new_refresh_token(user)
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(PRUNE_REFRESH_TOKENS_SQL, (user["id"],))
+        await cursor.execute(INSERT_REFRESH_TOKEN_SQL, params)
+    return token
+
+
+async def rotate_refresh_token(conn, token: str):
+    """
+    Spends token and returns (user, replacement token), or None if the
+    token is unknown, used, expired or revoked.
+    """
+    async with conn.transaction():
+        cursor = conn.cursor()
+        await cursor.execute(CONSUME_REFRESH_TOKEN_SQL, (hash_refresh_token(token),))
+        user = _user_from_consumed(await cursor.fetchone())
+        if user is None:
+            return None
+        replacement, params = _new_refresh_token(user)
+        await cursor.execute(INSERT_REFRESH_TOKEN_SQL, params)
+    return user, replacement
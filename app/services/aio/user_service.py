@@ -0,0 +1,82 @@
+from app.db.hash_pool import ahash_password, averify_and_rehash
+from app.db.routing import note_write
+from app.services.user_cache import forget_user
+from app.services.user_service import _row_field, _row_id, _user_from_row
+
+# Async mirror of app.services.user_service for the API request path.
+# bcrypt is CPU-bound, so hashing runs in app.db.hash_pool's worker
+# processes (and may raise HashingBusy when they are saturated).
+
+
+async def create_user(conn, username: str, password: str, role: str) -> int:
+    cursor = conn.cursor()
+    password_hash = await ahash_password(password)
+    await cursor.execute(
+        """
+        INSERT INTO users (username, password_hash, role)
+        VALUES (%s, %s, %s)
+        RETURNING id
+        """,
+        (username, password_hash, role),
+    )
+    row = await cursor.fetchone()
+    await conn.commit()
+    note_write()
+    forget_user(username)
+    return _row_id(row)
+
+async def get_user_by_username(conn, username: str):
+    cursor = conn.cursor()
+    await cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+    row = await cursor.fetchone()
+    return _user_from_row(row)
+
+async def set_user_role(conn, username: str, role: str) -> bool:
+    """
+    Changes a user's role and revokes the tokens issued under the old one.
+    Returns True if the user exists.
+    """
+    cursor = conn.cursor()
+    await cursor.execute(
+        "UPDATE users SET role = %s, token_version = token_version + 1 WHERE username = %s",
+        (role, username),
+    )
+    await conn.commit()
+    note_write()
+    forget_user(username)
+    return cursor.rowcount > 0
+
+async def revoke_user_tokens(conn, username: str) -> bool:
+    """
+    Invalidates every token issued to the user so far.
+    """
+    cursor = conn.cursor()
+    await cursor.execute(
+        "UPDATE users SET token_version = token_version + 1 WHERE username = %s",
+        (username,),
+    )
+    await conn.commit()
+    note_write()
+    forget_user(username)
+    return cursor.rowcount > 0
+
+async def authenticate_user(conn, username: str, password: str):
+    """
+    Returns the user if the password matches, else None. A hash made with
+    an outdated bcrypt cost is replaced while the password is at hand.
+    """
+    user = await get_user_by_username(conn, username)
+    if user is None:
+        return None
+    password_hash = _row_field(user, "password_hash", 2)
+    valid, new_hash = await averify_and_rehash(password, password_hash)
+    if not valid:
+        return None
+    if new_hash:
+        cursor = conn.cursor()
+        await cursor.execute(
+            "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+            (new_hash, _row_field(user, "id", 0), password_hash),
+        )
+        await conn.commit()
+    return user
@@ -1,155 +1,316 @@
-def player_totals_and_averages(conn):
-    """
-    Returns per-player totals and per-game averages across all games.
+from app.db.fieldsets import projection, with_columns
+from app.db.pagination import Pager, fetch_page
+from app.db.rows import map_rows, mapped_cursor
+from app.db.statements import execute, register
+
+LEADER_METRICS = {
+    "minutes" : "minutes",
+    "points" : "points",
+    "rebounds" : "rebounds",
+    "OREB" : "OREB",
+    "assists" : "assists",
+    "steals" : "steals",
+    "blocks" : "blocks",
+    "turnovers" : "turnovers",
+    "fouls" : "fouls",
+    "FG" : "FG",
+    "FGA" : "FGA",
+    "FG3" : "FG3",
+    "FGA3" : "FGA3",
+    "FT" : "FT",
+    "FTA" : "FTA",
+    "PM" : "PM",
+}
+
+# /analytics/players columns after the player's own (player_id, name,
+# jersey_number, position); ?fields= narrows the response to these.
+PLAYER_ANALYTICS_COLUMNS = (
+    "gp",
+    *[f"total_{column}" for column in LEADER_METRICS.values()],
+    *[f"avg_{column}" for column in LEADER_METRICS.values()],
+)
+
+_COLUMN_SEPARATOR = ",\n        "
+_PLAYER_COLUMNS = """p.id AS player_id,
+        p.name AS name,
+        p.jersey_number AS jersey_number,
+        p.position AS position"""
+
+
+def _live_analytics_column(name: str) -> str:
+    games = "COUNT(sl.game_id)"
+    if name == "gp":
+        return f"{games} AS gp"
+    kind, _, column = name.partition("_")
+    if kind == "total":
+        return f"COALESCE(SUM(sl.{column}), 0) AS {name}"
+    precision = 2 if column == "minutes" else 1
+    return f"CASE WHEN {games} = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.{column}) / {games}, {precision}) END AS {name}"
+
+
+def _player_analytics_sql(columns=PLAYER_ANALYTICS_COLUMNS) -> str:
+    return f"""
+    SELECT
+        {_PLAYER_COLUMNS},
+        {_COLUMN_SEPARATOR.join(_live_analytics_column(name) for name in columns)}
+    FROM players p
+    LEFT JOIN stat_line sl
+        ON sl.player_id = p.id
+        AND COALESCE(sl.minutes, 0) > 0
+    GROUP BY p.id
     """
-    cursor = conn.cursor()
-    cursor.execute(
-        """
+
+
+PLAYER_ANALYTICS_BASE_SQL = _player_analytics_sql()
+PLAYER_ANALYTICS_SQL = PLAYER_ANALYTICS_BASE_SQL + "ORDER BY total_points DESC, avg_points DESC\n"
+
+
+# Every leaderboard comes from one statement: one aggregation pass per
+# player, unpivoted into (metric, value) rows and ranked per metric. Takes
+# (metrics, limit); metrics is the list of boards to build.
+
+def _leaders_sql(totals_select: str, totals_from: str) -> str:
+    unpivot = ",\n                ".join(
+        f"('{metric}', t.{column}::numeric)" for metric, column in LEADER_METRICS.items()
+    )
+    return f"""
+    WITH totals AS (
         SELECT
             p.id AS player_id,
-            p.name AS name,
-            p.jersey_number AS jersey_number,
-            p.position AS position,
-            COUNT(sl.game_id) AS gp,
-        
-            COALESCE(SUM(sl.minutes), 0) AS total_minutes,
-            COALESCE(SUM(sl.points), 0) AS total_points,
-            COALESCE(SUM(sl.rebounds), 0) AS total_rebounds,
-            COALESCE(SUM(sl.OREB), 0) AS total_OREB,
-            COALESCE(SUM(sl.assists), 0) AS total_assists,
-            COALESCE(SUM(sl.steals), 0) AS total_steals,
-            COALESCE(SUM(sl.blocks), 0) AS total_blocks,
-            COALESCE(SUM(sl.turnovers), 0) AS total_turnovers,
-            COALESCE(SUM(sl.fouls), 0) AS total_fouls,
-            COALESCE(SUM(sl.FG), 0) AS total_FG,
-            COALESCE(SUM(sl.FGA), 0) AS total_FGA,
-            COALESCE(SUM(sl.FG3), 0) AS total_FG3,
-            COALESCE(SUM(sl.FGA3), 0) AS total_FGA3,
-            COALESCE(SUM(sl.FT), 0) AS total_FT,
-            COALESCE(SUM(sl.FTA), 0) AS total_FTA,
-            COALESCE(SUM(sl.PM), 0) AS total_PM,
-
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.minutes) / COUNT(sl.game_id), 2) END AS avg_minutes,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.points) / COUNT(sl.game_id), 1) END AS avg_points,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.rebounds) / COUNT(sl.game_id), 1) END AS avg_rebounds,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.OREB) / COUNT(sl.game_id), 1) END AS avg_OREB,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.assists) / COUNT(sl.game_id), 1) END AS avg_assists,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.steals) / COUNT(sl.game_id), 1) END AS avg_steals,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.blocks) / COUNT(sl.game_id), 1) END AS avg_blocks,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.turnovers) / COUNT(sl.game_id), 1) END AS avg_turnovers,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.fouls) / COUNT(sl.game_id), 1) END AS avg_fouls,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.FG) / COUNT(sl.game_id), 1) END AS avg_FG,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.FGA) / COUNT(sl.game_id), 1) END AS avg_FGA,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.FG3) / COUNT(sl.game_id), 1) END AS avg_FG3,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.FGA3) / COUNT(sl.game_id), 1) END AS avg_FGA3,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.FT) / COUNT(sl.game_id), 1) END AS avg_FT,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.FTA) / COUNT(sl.game_id), 1) END AS avg_FTA,
-            CASE WHEN COUNT(sl.game_id) = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.PM) / COUNT(sl.game_id), 1) END AS avg_PM
-
-        FROM players p
+            p.name,
+            p.jersey_number,
+            {totals_select}
+        {totals_from}
+    ),
+    ranked AS (
+        SELECT
+            m.metric,
+            t.player_id,
+            t.name,
+            t.jersey_number,
+            m.value,
+            row_number() OVER (PARTITION BY m.metric ORDER BY m.value DESC, t.player_id) AS position
+        FROM totals t
+        CROSS JOIN LATERAL (
+            VALUES
+                {unpivot}
+        ) AS m(metric, value)
+        WHERE m.metric = ANY(%s::text[])
+    )
+    SELECT metric, player_id, name, jersey_number, value
+    FROM ranked
+    WHERE position <= %s
+    ORDER BY metric, position
+    """
+
+
+def _live_leaders_sql() -> str:
+    sums = ",\n            ".join(
+        f"COALESCE(SUM(sl.{column}), 0) AS {column}" for column in LEADER_METRICS.values()
+    )
+    return _leaders_sql(
+        sums,
+        """FROM players p
         LEFT JOIN stat_line sl
             ON sl.player_id = p.id
             AND COALESCE(sl.minutes, 0) > 0
-        GROUP by p.id
-        ORDER BY total_points DESC, avg_points DESC
-        """
+        GROUP BY p.id""",
     )
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    dict_rows = []
-    for r in rows:
-        if isinstance(r, dict):
-            data = r
-        else:
-            data = {cols[i]: r[i] for i in range(len(cols))}
-        dict_rows.append(_normalize_player_analytics_keys(data))
-    return dict_rows
 
-def leaders(conn, limit: int = 5):
+
+LEADERS_PARAMS = ("metrics", "limit")
+
+
+PLAYER_ANALYTICS = register("player_totals_and_averages", PLAYER_ANALYTICS_SQL)
+
+LEADERS = register("leaders", _live_leaders_sql(), LEADERS_PARAMS)
+
+
+# Season aggregates materialized per player (app.db.migrations creates the
+# view). Only stat_line is materialized; players are joined at read time so
+# roster edits never need a refresh. The read queries reproduce the live
+# queries' columns, rounding and ordering.
+
+SEASON_AGGREGATES_VIEW = "player_season_aggregates"
+
+
+def _season_aggregates_select() -> str:
+    totals = [f"SUM(sl.{column}) AS total_{column}" for column in LEADER_METRICS.values()]
+    averages = [
+        f"ROUND(1.0 * SUM(sl.{column}) / COUNT(*), {2 if column == 'minutes' else 1}) AS avg_{column}"
+        for column in LEADER_METRICS.values()
+    ]
+    return f"""
+    SELECT
+        sl.player_id,
+        COUNT(*) AS gp,
+        {_COLUMN_SEPARATOR.join(totals + averages)}
+    FROM stat_line sl
+    WHERE COALESCE(sl.minutes, 0) > 0
+    GROUP BY sl.player_id
     """
-    Returns top-N leaders by totals in key categories.
+
+
+CREATE_SEASON_AGGREGATES_SQL = f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {SEASON_AGGREGATES_VIEW} AS
+    {_season_aggregates_select()}
+"""
+
+# REFRESH ... CONCURRENTLY needs a unique index and doesn't block readers.
+CREATE_SEASON_AGGREGATES_INDEX_SQL = f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS {SEASON_AGGREGATES_VIEW}_player_idx
+    ON {SEASON_AGGREGATES_VIEW} (player_id)
+"""
+
+REFRESH_SEASON_AGGREGATES_SQL = f"REFRESH MATERIALIZED VIEW CONCURRENTLY {SEASON_AGGREGATES_VIEW}"
+
+
+def _materialized_analytics_column(name: str) -> str:
+    if name.startswith("avg_"):
+        return f"CASE WHEN a.player_id IS NULL THEN 0 ELSE a.{name} END AS {name}"
+    return f"COALESCE(a.{name}, 0) AS {name}"
+
+
+def _materialized_player_analytics_sql(ordered: bool = True, columns=PLAYER_ANALYTICS_COLUMNS) -> str:
+    return f"""
+    SELECT
+        {_PLAYER_COLUMNS},
+        {_COLUMN_SEPARATOR.join(_materialized_analytics_column(name) for name in columns)}
+    FROM players p
+    LEFT JOIN {SEASON_AGGREGATES_VIEW} a ON a.player_id = p.id
+    {"ORDER BY total_points DESC, avg_points DESC" if ordered else ""}
     """
-    cursor = conn.cursor()
 
-    metric_map = {
-        "minutes" : "minutes",
-        "points" : "points",
-        "rebounds" : "rebounds",
-        "OREB" : "OREB",
-        "assists" : "assists",
-        "steals" : "steals",
-        "blocks" : "blocks",
-        "turnovers" : "turnovers",
-        "fouls" : "fouls",
-        "FG" : "FG",
-        "FGA" : "FGA",
-        "FG3" : "FG3",
-        "FGA3" : "FGA3",
-        "FT" : "FT",
-        "FTA" : "FTA",
-        "PM" : "PM",
+
+def _materialized_leaders_sql() -> str:
+    totals = ",\n            ".join(
+        f"COALESCE(a.total_{column}, 0) AS {column}" for column in LEADER_METRICS.values()
+    )
+    return _leaders_sql(
+        totals,
+        f"""FROM players p
+        LEFT JOIN {SEASON_AGGREGATES_VIEW} a ON a.player_id = p.id""",
+    )
+
+
+PLAYER_ANALYTICS_MATERIALIZED = register(
+    "player_totals_and_averages_materialized", _materialized_player_analytics_sql()
+)
+
+LEADERS_MATERIALIZED = register("leaders_materialized", _materialized_leaders_sql(), LEADERS_PARAMS)
+
+
+# Paged /analytics/players. Sort keys are aggregates, so no index can serve
+# them: each page sorts the aggregated rows (one per player) and the
+# cursor keeps later pages from re-reading earlier ones.
+
+PLAYER_ANALYTICS_SORTS = {
+    "points": ("total_points", "numeric"),
+    "avg_points": ("avg_points", "numeric"),
+    "rebounds": ("total_rebounds", "numeric"),
+    "assists": ("total_assists", "numeric"),
+    "minutes": ("total_minutes", "numeric"),
+    "gp": ("gp", "int"),
+    "name": ("name", "text"),
+}
+
+PLAYER_ANALYTICS_PAGER = Pager(
+    "player_analytics", PLAYER_ANALYTICS_BASE_SQL, "player_id", PLAYER_ANALYTICS_SORTS, "-points"
+)
+
+PLAYER_ANALYTICS_MATERIALIZED_PAGER = Pager(
+    "player_analytics_materialized",
+    _materialized_player_analytics_sql(ordered=False),
+    "player_id",
+    PLAYER_ANALYTICS_SORTS,
+    "-points",
+)
+
+
+def _analytics_sorts(fields: tuple) -> dict:
+    return {
+        sort: spec for sort, spec in PLAYER_ANALYTICS_SORTS.items()
+        if spec[0] not in PLAYER_ANALYTICS_COLUMNS or spec[0] in fields
     }
 
-    out = {}
-    for metric, column in metric_map.items():
-        cursor.execute(
-            f"""
-            SELECT
-                p.id AS player_id,
-                p.name,
-                p.jersey_number,
-                COALESCE(SUM(sl.{column}), 0) AS value
-            FROM players p
-            LEFT JOIN stat_line sl
-                ON sl.player_id = p.id
-                AND COALESCE(sl.minutes, 0) > 0
-            GROUP by p.id
-            ORDER BY value DESC
-            LIMIT %s
-            """,
-            (limit,),
+
+def player_analytics_pager(fields=None, sort=None, materialized: bool = False) -> Pager:
+    """
+    Returns the /analytics/players Pager computing only fields (None: every
+    column), live or from the season aggregates view. The sort key is
+    always selected.
+    """
+    full = PLAYER_ANALYTICS_MATERIALIZED_PAGER if materialized else PLAYER_ANALYTICS_PAGER
+    if fields is None:
+        return full
+    fields = with_columns(fields, PLAYER_ANALYTICS_COLUMNS, full.sort_column(sort))
+    if materialized:
+        return projection(
+            "player_analytics_materialized",
+            fields,
+            lambda name, cols: Pager(
+                name, _materialized_player_analytics_sql(False, cols), "player_id", _analytics_sorts(cols), "-points",
+                prepare=False,
+            ),
         )
-        rows = cursor.fetchall()
-        cols = [c[0] for c in cursor.description]
-        dict_rows = []
-        for r in rows:
-            if isinstance(r, dict):
-                data = r
-            else:
-                data = {cols[i]: r[i] for i in range(len(cols))}
-            dict_rows.append(_normalize_leader_keys(data))
-        out[metric] = dict_rows
+    return projection(
+        "player_analytics",
+        fields,
+        lambda name, cols: Pager(
+            name, _player_analytics_sql(cols), "player_id", _analytics_sorts(cols), "-points", prepare=False
+        ),
+    )
 
-    return out
 
+def refresh_season_aggregates(conn):
+    """
+    Refreshes the season aggregates view. Needs an autocommit connection.
+    """
+    cursor = conn.cursor()
+    cursor.execute(REFRESH_SEASON_AGGREGATES_SQL)
 
-def _normalize_player_analytics_keys(data):
-    mapping = {
-        "total_fg": "total_FG",
-        "total_fga": "total_FGA",
-        "total_fg3": "total_FG3",
-        "total_fga3": "total_FGA3",
-        "total_ft": "total_FT",
-        "total_fta": "total_FTA",
-        "total_pm": "total_PM",
-        "total_oreb": "total_OREB",
-        "avg_fg": "avg_FG",
-        "avg_fga": "avg_FGA",
-        "avg_fg3": "avg_FG3",
-        "avg_fga3": "avg_FGA3",
-        "avg_ft": "avg_FT",
-        "avg_fta": "avg_FTA",
-        "avg_pm": "avg_PM",
-        "avg_oreb": "avg_OREB",
-    }
-    out = dict(data)
-    for src, dest in mapping.items():
-        if src in out and dest not in out:
-            out[dest] = out.pop(src)
+
+def player_totals_and_averages(conn):
+    """
+    Returns per-player totals and per-game averages across all games.
+    """
+    cursor = mapped_cursor(conn)
+    execute(cursor, PLAYER_ANALYTICS)
+    return map_rows(cursor, cursor.fetchall())
+
+def player_analytics_page(conn, sort=None, cursor=None, limit=None, fields=None):
+    """
+    Returns one Page of per-player totals and averages (see
+    app.db.pagination), only fields when given. Raises ValueError for a bad
+    sort or cursor.
+    """
+    return fetch_page(conn, player_analytics_pager(fields, sort), (), sort, cursor, limit)
+
+def leader_metrics(metrics=None) -> tuple:
+    """
+    Returns the requested boards in LEADER_METRICS order (all when metrics
+    is empty). Raises ValueError naming any unknown metric.
+    """
+    if not metrics:
+        return tuple(LEADER_METRICS)
+    unknown = sorted(set(metrics) - set(LEADER_METRICS))
+    if unknown:
+        raise ValueError(f"unknown leader metrics: {', '.join(unknown)}")
+    return tuple(metric for metric in LEADER_METRICS if metric in metrics)
+
+
+def _group_leaders(rows, metrics: tuple) -> dict:
+    out = {metric: [] for metric in metrics}
+    for row in rows:
+        out[row.pop("metric")].append(row)
     return out
 
 
-def _normalize_leader_keys(data):
-    if "value" in data:
-        return data
-    return data
+def leaders(conn, limit: int = 5, metrics=None):
+    """
+    Returns top-N leaders by totals in key categories (or just metrics).
+    """
+    metrics = leader_metrics(metrics)
+    cursor = mapped_cursor(conn)
+    execute(cursor, LEADERS, (list(metrics), limit))
+    return _group_leaders(map_rows(cursor, cursor.fetchall()), metrics)
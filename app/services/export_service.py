@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date
+from decimal import Decimal
+
+from app.db.rows import api_key, decimal_value
+from app.services.analytics_service import LEADER_METRICS
+from app.services.game_service import DATE_WINDOW_SQL
+from app.services.stat_service import STATLINE_FIELDS
+
+# Streaming exports. Each export is one query read through a server-side
+# (named) cursor EXPORT_BATCH_ROWS rows at a time; every batch is encoded
+# as CSV or NDJSON and handed on, so memory stays flat whatever the size
+# of the table. Named cursors need a transaction, which the export opens.
+#
+# Every export takes (player_id, game_id, start, end) filters, all
+# optional; see export_params().
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "2000"))
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+_PLAYER_FILTER = "(%s::int IS NULL OR {column} = %s::int)"
+_GAME_FILTER = "(%s::int IS NULL OR {column} = %s::int)"
+
+STAT_LINES_EXPORT_SQL = f"""
+    SELECT
+        s.id,
+        s.player_id,
+        p.name AS player_name,
+        s.game_id,
+        g.date,
+        g.opponent,
+        g.location,
+        {", ".join(f"s.{col}" for col in STATLINE_FIELDS)}
+    FROM stat_line s
+    JOIN games g ON g.id = s.game_id
+    JOIN players p ON p.id = s.player_id
+    WHERE {_PLAYER_FILTER.format(column="s.player_id")}
+        AND {_GAME_FILTER.format(column="s.game_id")}
+        AND {DATE_WINDOW_SQL}
+    ORDER BY g.date, g.id, s.player_id
+"""
+
+GAMES_EXPORT_SQL = f"""
+    SELECT g.id, g.date, g.opponent, g.location
+    FROM games g
+    WHERE (%s::int IS NULL OR EXISTS (
+            SELECT 1 FROM stat_line s WHERE s.game_id = g.id AND s.player_id = %s::int
+        ))
+        AND {_GAME_FILTER.format(column="g.id")}
+        AND {DATE_WINDOW_SQL}
+    ORDER BY g.date, g.id
+"""
+
+
+def _player_analytics_export_sql() -> str:
+    # Same columns and rounding as PLAYER_ANALYTICS, over the filtered lines.
+    games = "COUNT(sl.game_id)"
+    totals = [f"COALESCE(SUM(sl.{col}), 0) AS total_{col}" for col in LEADER_METRICS.values()]
+    averages = [
+        f"CASE WHEN {games} = 0 THEN 0 ELSE ROUND(1.0 * SUM(sl.{col}) / {games}, {2 if col == 'minutes' else 1}) END AS avg_{col}"
+        for col in LEADER_METRICS.values()
+    ]
+    return f"""
+    SELECT
+        p.id AS player_id,
+        p.name AS name,
+        p.jersey_number AS jersey_number,
+        p.position AS position,
+        {games} AS gp,
+        {", ".join(totals + averages)}
+    FROM players p
+    LEFT JOIN (
+        SELECT sl.*
+        FROM stat_line sl
+        JOIN games g ON g.id = sl.game_id
+        WHERE COALESCE(sl.minutes, 0) > 0
+            AND {_GAME_FILTER.format(column="sl.game_id")}
+            AND {DATE_WINDOW_SQL}
+    ) sl ON sl.player_id = p.id
+    WHERE {_PLAYER_FILTER.format(column="p.id")}
+    GROUP BY p.id
+    ORDER BY total_points DESC, avg_points DESC, p.id
+    """
+
+
+PLAYER_ANALYTICS_EXPORT_SQL = _player_analytics_export_sql()
+
+EXPORTS = {
+    "stat_lines": STAT_LINES_EXPORT_SQL,
+    "games": GAMES_EXPORT_SQL,
+    "player_analytics": PLAYER_ANALYTICS_EXPORT_SQL,
+}
+
+def export_params(kind: str, player_id=None, game_id=None, start=None, end=None) -> tuple:
+    if kind == "player_analytics":
+        return (game_id, game_id, start, end, player_id, player_id)
+    return (player_id, player_id, game_id, game_id, start, end)
+
+
+def export_columns(description) -> list:
+    # Postgres folds unquoted names to lower case; exports use the API's names.
+    return [api_key(c[0]) for c in description]
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return decimal_value(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"can't export {type(value).__name__}")
+
+
+def encode_header(fmt: str, columns: list) -> bytes:
+    if fmt != "csv":
+        return b""
+    return encode_rows(fmt, columns, [columns])
+
+
+def encode_rows(fmt: str, columns: list, rows) -> bytes:
+    """
+    Encodes a batch of rows as CSV lines or NDJSON objects.
+    """
+    if fmt == "csv":
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerows(rows)
+        return out.getvalue().encode()
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=_json_value, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode()
+
+
+class GzipStream:
+    """
+    Incremental gzip: each batch is flushed so clients see data as it
+    streams instead of when the compressor's window fills.
+    """
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def iter_export(conn, kind: str, params: tuple, fmt: str, batch_rows: int = EXPORT_BATCH_ROWS):
+    """
+    Yields the export as encoded byte chunks, one per batch of rows.
+    """
+    with conn.transaction():
+        with conn.cursor(name=f"export_{kind}") as cursor:
+            cursor.execute(EXPORTS[kind], params)
+            columns = export_columns(cursor.description)
+            yield encode_header(fmt, columns)
+            while rows := cursor.fetchmany(batch_rows):
+                yield encode_rows(fmt, columns, rows)
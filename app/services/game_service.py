@@ -1,7 +1,34 @@
 import psycopg
 
+from app.db.pagination import Pager, fetch_page
+from app.db.rows import map_row, map_rows, mapped_cursor
+from app.db.statements import execute, register
+from app.db.versions import bump_versions
+from app.services.result_cache import TEAM_TAG, game_tag, invalidate_tags
+
 # Handles logic for creating and fetching games.
 
+# Inclusive date window on games g. Open ends are NULL; COALESCE keeps the
+# condition sargable so a prepared (generic) plan can still range-scan the
+# date index.
+DATE_WINDOW_SQL = "g.date BETWEEN COALESCE(%s::date, '-infinity'::date) AND COALESCE(%s::date, 'infinity'::date)"
+DATE_WINDOW_PARAMS = ("start", "end")
+
+GAMES_IN_WINDOW = register(
+    "games_in_window",
+    f"SELECT g.* FROM games g WHERE {DATE_WINDOW_SQL} ORDER BY g.date, g.id",
+    DATE_WINDOW_PARAMS,
+)
+
+GAMES_PAGER = Pager(
+    "games",
+    f"SELECT g.* FROM games g WHERE {DATE_WINDOW_SQL}",
+    "id",
+    {"date": ("date", "date"), "opponent": ("opponent", "text")},
+    "date",
+    DATE_WINDOW_PARAMS,
+)
+
 
 def _row_id(row):
     if row is None:
@@ -11,13 +38,6 @@ def _row_id(row):
     return row[0]
 
 
-def _row_to_dict(row, columns):
-    if row is None:
-        return None
-    if isinstance(row, dict):
-        return row
-    return {columns[i]: row[i] for i in range(len(columns))}
-
 def create_game(conn, date, opponent, location=None):
     """
     Imserts a new game into the database.
@@ -34,41 +54,51 @@ def create_game(conn, date, opponent, location=None):
             (date, opponent, location)
         )
 
-        conn.commit()
         row = cursor.fetchone()
-        return _row_id(row)
+        game_id = _row_id(row)
+        bump_versions(conn, game_ids=[game_id])
+        conn.commit()
+        invalidate_tags(game_tag(game_id))
+        return game_id
     except psycopg.errors.UniqueViolation:
         return None
 
 
-def get_all_games(conn):
+def get_games_page(conn, start=None, end=None, sort=None, cursor=None, limit=None):
     """
-    Returns all games as a list of rows.
+    Returns one Page of games in [start, end] (see app.db.pagination).
     """
-    cursor = conn.cursor()
+    return fetch_page(conn, GAMES_PAGER, (start, end), sort, cursor, limit)
 
-    cursor.execute("SELECT * FROM games")
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    return [_row_to_dict(r, cols) for r in rows]
+def get_all_games(conn, start=None, end=None):
+    """
+    Returns games in date order, optionally limited to [start, end].
+    """
+    cursor = mapped_cursor(conn)
+
+    execute(cursor, GAMES_IN_WINDOW, (start, end))
+    return map_rows(cursor, cursor.fetchall())
 
 def get_game_by_id(conn, game_id):
     """
     Returns a single game by ID, or None if not found.
     """
-    cursor = conn.cursor()
+    cursor = mapped_cursor(conn)
 
     cursor.execute(
         "SELECT * FROM games WHERE id = %s",
         (game_id,)
     )
 
-    row = cursor.fetchone()
-    cols = [c[0] for c in cursor.description]
-    return _row_to_dict(row, cols)
+    return map_row(cursor, cursor.fetchone())
 
 def delete_game(conn, game_id):
     cursor = conn.cursor()
     cursor.execute("DELETE FROM games WHERE id = %s", (game_id,))
+    changed = cursor.rowcount > 0
+    if changed:
+        bump_versions(conn, game_ids=[game_id])
     conn.commit()
-    return cursor.rowcount > 0
+    if changed:
+        invalidate_tags(game_tag(game_id), TEAM_TAG)
+    return changed
@@ -0,0 +1,321 @@
+import csv
+import json
+import os
+import time
+
+import psycopg
+
+from app.db.aggregates import rebuild_running_aggregates
+from app.db.versions import bump_versions
+from app.services.analytics_service import refresh_season_aggregates
+from app.services.stat_service import STATLINE_FIELDS
+
+# Bulk season import. Players, games and stat lines are streamed from CSV
+# or NDJSON files with COPY into temporary staging tables, then merged into
+# the real tables with set-based statements, all in one transaction:
+#   - players are matched on (name, jersey_number), games on their
+#     UNIQUE(date, opponent, location) key; unmatched ones are created
+#     (players referenced only by stat lines need create_missing);
+#   - stat lines are upserted on (player_id, game_id), the last line in
+#     the file winning, and unchanged lines are left alone.
+# Stat lines identify their player and game by those natural keys, not IDs.
+#
+# With defer_aggregates the per-row aggregate trigger is disabled for the
+# merge and player_aggregates/game_team_totals are rebuilt once at the end;
+# stat_line writes from other sessions wait until the import commits.
+
+COPY_CHUNK_BYTES = int(os.getenv("IMPORT_COPY_CHUNK_BYTES", str(1024 * 1024)))
+PROGRESS_EVERY = int(os.getenv("IMPORT_PROGRESS_EVERY", "100000"))
+
+PLAYER_COLUMNS = ("name", "jersey_number", "position")
+GAME_COLUMNS = ("date", "opponent", "location")
+STAT_LINE_KEY_COLUMNS = ("player_name", "jersey_number", "date", "opponent", "location")
+STAT_LINE_COLUMNS = STAT_LINE_KEY_COLUMNS + tuple(col.lower() for col in STATLINE_FIELDS)
+
+# (staging table, columns, required columns)
+STAGING = {
+    "players": ("import_players", PLAYER_COLUMNS, ("name",)),
+    "games": ("import_games", GAME_COLUMNS, ("date", "opponent")),
+    "stat_lines": ("import_stat_lines", STAT_LINE_COLUMNS, ("player_name", "date", "opponent")),
+}
+
+
+def _stat_column_type(col: str) -> str:
+    return "NUMERIC(6,3)" if col == "minutes" else "INTEGER"
+
+
+CREATE_STAGING_SQL = [
+    """
+    CREATE TEMP TABLE import_players (
+        name TEXT NOT NULL,
+        jersey_number INTEGER,
+        position TEXT
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMP TABLE import_games (
+        date DATE NOT NULL,
+        opponent TEXT NOT NULL,
+        location TEXT
+    ) ON COMMIT DROP
+    """,
+    f"""
+    CREATE TEMP TABLE import_stat_lines (
+        line_no BIGSERIAL,
+        player_name TEXT NOT NULL,
+        jersey_number INTEGER,
+        date DATE NOT NULL,
+        opponent TEXT NOT NULL,
+        location TEXT,
+        {", ".join(f"{col} {_stat_column_type(col)}" for col in STAT_LINE_COLUMNS[len(STAT_LINE_KEY_COLUMNS):])}
+    ) ON COMMIT DROP
+    """,
+]
+
+# NULL jerseys/locations are keys too; COALESCE keeps the joins hashable.
+PLAYER_KEY = "{p}.name = {i}.{name} AND COALESCE({p}.jersey_number, -1) = COALESCE({i}.jersey_number, -1)"
+GAME_KEY = (
+    "{g}.date = {i}.date AND {g}.opponent = {i}.opponent "
+    "AND COALESCE({g}.location, '') = COALESCE({i}.location, '')"
+)
+
+UPDATE_PLAYER_POSITIONS_SQL = f"""
+    UPDATE players p
+    SET position = i.position
+    FROM (SELECT DISTINCT ON (name, jersey_number) * FROM import_players WHERE position IS NOT NULL) i
+    WHERE {PLAYER_KEY.format(p="p", i="i", name="name")}
+        AND p.position IS DISTINCT FROM i.position
+"""
+
+INSERT_PLAYERS_SQL = f"""
+    INSERT INTO players (name, jersey_number, position)
+    SELECT DISTINCT ON (i.name, i.jersey_number) i.name, i.jersey_number, i.position
+    FROM (
+        SELECT name, jersey_number, position FROM import_players
+        UNION ALL
+        SELECT player_name, jersey_number, NULL FROM import_stat_lines WHERE %s
+    ) i
+    WHERE NOT EXISTS (SELECT 1 FROM players p WHERE {PLAYER_KEY.format(p="p", i="i", name="name")})
+    ORDER BY i.name, i.jersey_number, i.position NULLS LAST
+"""
+
+MISSING_PLAYERS_SQL = f"""
+    SELECT DISTINCT s.player_name, s.jersey_number
+    FROM import_stat_lines s
+    WHERE NOT EXISTS (SELECT 1 FROM players p WHERE {PLAYER_KEY.format(p="p", i="s", name="player_name")})
+    ORDER BY s.player_name, s.jersey_number
+    LIMIT 10
+"""
+
+INSERT_GAMES_SQL = f"""
+    INSERT INTO games (date, opponent, location)
+    SELECT DISTINCT ON (k.date, k.opponent, COALESCE(k.location, '')) k.date, k.opponent, k.location
+    FROM (
+        SELECT date, opponent, location FROM import_games
+        UNION
+        SELECT date, opponent, location FROM import_stat_lines
+    ) k
+    WHERE NOT EXISTS (SELECT 1 FROM games g WHERE {GAME_KEY.format(g="g", i="k")})
+    ON CONFLICT (date, opponent, location) DO NOTHING
+"""
+
+_STAT_FIELDS = [col.lower() for col in STATLINE_FIELDS]
+
+MERGE_STAT_LINES_SQL = f"""
+    WITH resolved_players AS (
+        SELECT DISTINCT ON (name, COALESCE(jersey_number, -1)) id, name, jersey_number
+        FROM players
+        ORDER BY name, COALESCE(jersey_number, -1), id
+    ),
+    incoming AS (
+        SELECT DISTINCT ON (p.id, g.id)
+            p.id AS player_id,
+            g.id AS game_id,
+            {", ".join(f"COALESCE(s.{col}, 0) AS {col}" for col in _STAT_FIELDS)}
+        FROM import_stat_lines s
+        JOIN resolved_players p ON {PLAYER_KEY.format(p="p", i="s", name="player_name")}
+        JOIN games g ON {GAME_KEY.format(g="g", i="s")}
+        ORDER BY p.id, g.id, s.line_no DESC
+    ),
+    merged AS (
+        INSERT INTO stat_line (player_id, game_id, {", ".join(_STAT_FIELDS)})
+        SELECT player_id, game_id, {", ".join(_STAT_FIELDS)} FROM incoming
+        ON CONFLICT (player_id, game_id) DO UPDATE SET
+            {", ".join(f"{col} = excluded.{col}" for col in _STAT_FIELDS)}
+        WHERE ({", ".join(f"stat_line.{col}" for col in _STAT_FIELDS)})
+            IS DISTINCT FROM ({", ".join(f"excluded.{col}" for col in _STAT_FIELDS)})
+        RETURNING player_id, game_id, (xmax = 0) AS inserted
+    )
+    SELECT
+        count(*) FILTER (WHERE inserted),
+        count(*) FILTER (WHERE NOT inserted),
+        COALESCE(array_agg(DISTINCT player_id), '{{}}'),
+        COALESCE(array_agg(DISTINCT game_id), '{{}}')
+    FROM merged
+"""
+
+AGGREGATE_TRIGGER_SQL = """
+    SELECT 1 FROM pg_trigger
+    WHERE tgname = 'stat_line_aggregates' AND tgrelid = 'stat_line'::regclass
+"""
+
+
+def source_format(path: str, fmt: str = None) -> str:
+    """
+    Returns "csv" or "ndjson" for path, from fmt or the file extension.
+    """
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".ndjson", ".jsonl", ".json"):
+        return "ndjson"
+    raise ValueError(f"{path}: can't tell the format from the extension; pass csv or ndjson")
+
+
+def copy_columns(header, allowed: tuple, required: tuple, source: str) -> list:
+    """
+    Maps a CSV header onto staging columns (case-insensitively). Raises
+    ValueError for unknown or missing columns.
+    """
+    columns = [name.strip().lower() for name in header]
+    unknown = [name for name in columns if name not in allowed]
+    if unknown:
+        raise ValueError(f"{source}: unknown columns: {', '.join(unknown)}")
+    missing = [name for name in required if name not in columns]
+    if missing:
+        raise ValueError(f"{source}: missing columns: {', '.join(missing)}")
+    return columns
+
+
+def _copy_csv(cursor, table: str, path: str, allowed: tuple, required: tuple, report) -> int:
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        columns = copy_columns(header, allowed, required, path)
+        with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)") as copy:
+            while chunk := f.read(COPY_CHUNK_BYTES):
+                copy.write(chunk)
+    # Counting newlines in the chunks overcounts quoted newlines and CRLF
+    # split across chunks; only the server knows how many rows it read.
+    report(cursor.rowcount)
+    return cursor.rowcount
+
+
+def _copy_ndjson(cursor, table: str, path: str, allowed: tuple, required: tuple, report) -> int:
+    rows = 0
+    with open(path, encoding="utf-8") as f:
+        with cursor.copy(f"COPY {table} ({', '.join(allowed)}) FROM STDIN") as copy:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = {key.lower(): value for key, value in json.loads(line).items()}
+                missing = [name for name in required if record.get(name) is None]
+                if missing:
+                    raise ValueError(f"{path}:{rows + 1}: missing {', '.join(missing)}")
+                copy.write_row([record.get(name) for name in allowed])
+                rows += 1
+                if rows % PROGRESS_EVERY == 0:
+                    report(rows)
+    report(rows)
+    return rows
+
+
+def stage(cursor, kind: str, path: str, fmt: str = None, progress=None) -> int:
+    """
+    COPYs one source file into its staging table and returns the row count.
+    progress(kind, rows, elapsed_seconds) is called as rows stream in (for CSV,
+    once the COPY finishes).
+    """
+    table, allowed, required = STAGING[kind]
+    started = time.perf_counter()
+
+    def report(rows):
+        if progress is not None:
+            progress(kind, rows, time.perf_counter() - started)
+
+    copy = _copy_csv if source_format(path, fmt) == "csv" else _copy_ndjson
+    rows = copy(cursor, table, path, allowed, required, report)
+    cursor.execute(f"ANALYZE {table}")
+    return rows
+
+
+def _merge(cursor, create_missing: bool) -> dict:
+    cursor.execute(UPDATE_PLAYER_POSITIONS_SQL)
+    cursor.execute(INSERT_PLAYERS_SQL, (create_missing,))
+    players_created = cursor.rowcount
+    cursor.execute(MISSING_PLAYERS_SQL)
+    missing = cursor.fetchall()
+    if missing:
+        names = ", ".join(f"{name} #{jersey}" if jersey is not None else name for name, jersey in missing)
+        raise ValueError(f"stat lines reference unknown players (pass create_missing to add them): {names}")
+    cursor.execute(INSERT_GAMES_SQL)
+    games_created = cursor.rowcount
+    cursor.execute(MERGE_STAT_LINES_SQL)
+    inserted, updated, player_ids, game_ids = cursor.fetchone()
+    return {
+        "players_created": players_created,
+        "games_created": games_created,
+        "stat_lines_inserted": inserted,
+        "stat_lines_updated": updated,
+        "player_ids": player_ids,
+        "game_ids": game_ids,
+    }
+
+
+def import_season(
+    conn,
+    players: str = None,
+    games: str = None,
+    stat_lines: str = None,
+    fmt: str = None,
+    create_missing: bool = False,
+    defer_aggregates: bool = True,
+    progress=None,
+) -> dict:
+    """
+    Stages the given files and merges them in one transaction. Returns
+    staged row counts and what the merge created, inserted and updated.
+    Raises ValueError (nothing is written) for bad files or unknown players.
+    """
+    sources = {"players": players, "games": games, "stat_lines": stat_lines}
+    result = {}
+    with conn.transaction():
+        cursor = conn.cursor()
+        for sql in CREATE_STAGING_SQL:
+            cursor.execute(sql)
+        for kind, path in sources.items():
+            if path:
+                result[f"{kind}_staged"] = stage(cursor, kind, path, fmt, progress)
+
+        cursor.execute(AGGREGATE_TRIGGER_SQL)
+        defer = defer_aggregates and cursor.fetchone() is not None
+        if defer:
+            cursor.execute("ALTER TABLE stat_line DISABLE TRIGGER stat_line_aggregates")
+
+        started = time.perf_counter()
+        merged = _merge(cursor, create_missing)
+        if defer:
+            cursor.execute("ALTER TABLE stat_line ENABLE TRIGGER stat_line_aggregates")
+            rebuild_running_aggregates(conn)
+        player_ids, game_ids = merged.pop("player_ids"), merged.pop("game_ids")
+        changed = bool(player_ids or game_ids or merged["players_created"] or merged["games_created"])
+        if changed:
+            bump_versions(conn, player_ids, game_ids)
+        result.update(merged, merge_seconds=time.perf_counter() - started)
+
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        conn.cursor().execute("ANALYZE stat_line")
+        refresh_season_aggregates(conn)
+        if changed:
+            # Reads between the merge's commit and the refresh saw the old
+            # view under the new global version; move it again, as the
+            # API's background refresh does.
+            bump_versions(conn)
+    except psycopg.errors.UndefinedTable:
+        pass
+    finally:
+        conn.autocommit = autocommit
+    return result
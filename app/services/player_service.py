@@ -1,3 +1,9 @@
+from app.db.pagination import Pager, fetch_page
+from app.db.rows import map_row, map_rows, mapped_cursor
+from app.db.statements import execute, register
+from app.db.versions import bump_versions
+from app.services.result_cache import TEAM_TAG, invalidate_tags, player_tag
+
 # Handles logic for creating and fetching players. 
 
 
@@ -9,12 +15,9 @@ def _row_id(row):
     return row[0]
 
 
-def _row_to_dict(row, columns):
-    if row is None:
-        return None
-    if isinstance(row, dict):
-        return row
-    return {columns[i]: row[i] for i in range(len(columns))}
+PLAYER_BY_ID = register("player_by_id", "SELECT * FROM players WHERE id = %s", ("player_id",))
+
+PLAYERS_PAGER = Pager("players", "SELECT * FROM players", "id", {"id": ("id", "int"), "name": ("name", "text")}, "id")
 
 def create_player(conn, name, jersey_number=None, position=None):
     """
@@ -32,41 +35,48 @@ def create_player(conn, name, jersey_number=None, position=None):
         (name, jersey_number, position)
     )
 
-    conn.commit()
     row = cursor.fetchone()
-    return _row_id(row)
+    player_id = _row_id(row)
+    bump_versions(conn, player_ids=[player_id])
+    conn.commit()
+    invalidate_tags(player_tag(player_id), TEAM_TAG)
+    return player_id
 
 def get_all_players(conn):
     """
     Returns all players as a list of rows.
     """
-    cursor = conn.cursor()
+    cursor = mapped_cursor(conn)
 
     cursor.execute("SELECT * FROM players")
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    return [_row_to_dict(r, cols) for r in rows]
+    return map_rows(cursor, cursor.fetchall())
+
+def get_players_page(conn, sort=None, cursor=None, limit=None):
+    """
+    Returns one Page of players (see app.db.pagination).
+    """
+    return fetch_page(conn, PLAYERS_PAGER, (), sort, cursor, limit)
 
 def get_player_by_id(conn, player_id):
     """
     Returns a single player by ID, or None if not found.
     """
-    cursor = conn.cursor()
+    cursor = mapped_cursor(conn)
 
-    cursor.execute(
-        "SELECT * FROM players WHERE id = %s",
-        (player_id,)
-    )
+    execute(cursor, PLAYER_BY_ID, (player_id,))
 
-    row = cursor.fetchone()
-    cols = [c[0] for c in cursor.description]
-    return _row_to_dict(row, cols)
+    return map_row(cursor, cursor.fetchone())
 
 def delete_player(conn, player_id):
     cursor = conn.cursor()
     cursor.execute("DELETE FROM players WHERE id = %s", (player_id,))
+    changed = cursor.rowcount > 0
+    if changed:
+        bump_versions(conn, player_ids=[player_id])
     conn.commit()
-    return cursor.rowcount > 0
+    if changed:
+        invalidate_tags(player_tag(player_id), TEAM_TAG)
+    return changed
 
 def update_player(conn, player_id, name=None, jersey_number=None, position=None):
     updates = []
@@ -89,5 +99,10 @@ def update_player(conn, player_id, name=None, jersey_number=None, position=None)
     query = f"UPDATE players SET {', '.join(updates)} WHERE id = %s"
     cursor = conn.cursor()
     cursor.execute(query, values)
+    changed = cursor.rowcount > 0
+    if changed:
+        bump_versions(conn, player_ids=[player_id])
     conn.commit()
-    return cursor.rowcount > 0
+    if changed:
+        invalidate_tags(player_tag(player_id), TEAM_TAG)
+    return changed
@@ -1,3 +1,14 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from app.db.aggregates import use_running_aggregates
+from app.db.fieldsets import projection
+from app.db.rows import decimal_value, map_row, map_rows, mapped_cursor
+from app.db.statements import execute, register
+from app.services.game_service import DATE_WINDOW_PARAMS, DATE_WINDOW_SQL
+from app.services.player_service import get_player_by_id
+from app.services.split_service import AVERAGE_PREFIX, TOTAL_PREFIX, get_splits, split_sql, split_view
+from app.services.stat_service import GAME_LOG
+
 STAT_COLUMNS = [
     "minutes",
     "points",
@@ -18,107 +29,150 @@ STAT_COLUMNS = [
 ]
 
 
-def _sum_select(prefix: str) -> str:
+def _sum_select(prefix: str, alias: str = "", columns=STAT_COLUMNS) -> str:
     return ",\n            ".join(
-        [f"COALESCE(SUM({prefix}.{col}), 0) AS {col}" for col in STAT_COLUMNS]
+        [f"COALESCE(SUM({prefix}.{col}), 0) AS {alias}{col}" for col in columns]
     )
 
 
-def _avg_select(prefix: str) -> str:
+def _avg_select(prefix: str, alias: str = "", columns=STAT_COLUMNS) -> str:
+    # A NULL stat counts as 0, as in player_aggregates, so windowed and
+    # stored averages divide by the same games played.
+    parts = []
+    for col in columns:
+        precision = 2 if col == "minutes" else 1
+        parts.append(f"COALESCE(ROUND(AVG(COALESCE({prefix}.{col}, 0)), {precision}), 0) AS {alias}{col}")
+    return ",\n            ".join(parts)
+
+
+def _stored_select(prefix: str) -> str:
+    return ",\n            ".join([f"{prefix}.{col} AS {col}" for col in STAT_COLUMNS])
+
+
+def _stored_avg_select(prefix: str) -> str:
     parts = []
     for col in STAT_COLUMNS:
         precision = 2 if col == "minutes" else 1
-        parts.append(f"COALESCE(ROUND(AVG({prefix}.{col}), {precision}), 0) AS {col}")
+        parts.append(f"CASE WHEN {prefix}.gp = 0 THEN 0 ELSE ROUND(1.0 * {prefix}.{col} / {prefix}.gp, {precision}) END AS {col}")
     return ",\n            ".join(parts)
 
 
-def _empty_stats() -> dict:
-    return {col: 0 for col in STAT_COLUMNS}
+# Hot queries, built once at import and prepared per pooled connection.
+# Every query takes (player_id, start, end); the date window is optional.
 
+PLAYER_WINDOW_PARAMS = ("player_id", *DATE_WINDOW_PARAMS)
 
-def _row_to_dict(row, columns):
-    if row is None:
-        return None
-    if isinstance(row, dict):
-        data = row
-    else:
-        data = {columns[i]: row[i] for i in range(len(columns))}
-    return _normalize_stat_keys(data)
+PLAYER_TOTALS = register(
+    "player_totals",
+    f"""
+    SELECT
+        {_sum_select("s")}
+    FROM stat_line s
+    JOIN games g ON g.id = s.game_id
+    WHERE s.player_id = %s
+        AND COALESCE(s.minutes, 0) > 0
+        AND {DATE_WINDOW_SQL}
+    """,
+    PLAYER_WINDOW_PARAMS,
+)
 
+PLAYER_AVERAGES = register(
+    "player_averages",
+    f"""
+    SELECT
+        {_avg_select("s")}
+    FROM stat_line s
+    JOIN games g ON g.id = s.game_id
+    WHERE s.player_id = %s
+        AND COALESCE(s.minutes, 0) > 0
+        AND {DATE_WINDOW_SQL}
+    """,
+    PLAYER_WINDOW_PARAMS,
+)
 
-def _normalize_stat_keys(data):
-    if data is None:
-        return None
-    mapping = {
-        "oreb": "OREB",
-        "fg": "FG",
-        "fga": "FGA",
-        "fg3": "FG3",
-        "fga3": "FGA3",
-        "ft": "FT",
-        "fta": "FTA",
-        "pm": "PM",
-    }
-    out = dict(data)
-    for src, dest in mapping.items():
-        if src in out and dest not in out:
-            out[dest] = out.pop(src)
-    return out
+
+# Unwindowed totals/averages are one-row lookups in player_aggregates
+# (see app.db.aggregates).
+
+PLAYER_AGGREGATE_TOTALS = register(
+    "player_aggregate_totals",
+    f"""
+    SELECT
+        {_stored_select("a")}
+    FROM player_aggregates a
+    WHERE a.player_id = %s
+    """,
+    ("player_id",),
+)
+
+PLAYER_AGGREGATE_AVERAGES = register(
+    "player_aggregate_averages",
+    f"""
+    SELECT
+        {_stored_avg_select("a")}
+    FROM player_aggregates a
+    WHERE a.player_id = %s
+    """,
+    ("player_id",),
+)
 
 
-def get_player_totals(conn, player_id: int) -> dict:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            {_sum_select("s")}
-        FROM stat_line s
-        WHERE s.player_id = %s
-            AND COALESCE(s.minutes, 0) > 0
-        """,
-        (player_id,),
+def player_stats_statement(aggregate: str, live: str, player_id: int, start=None, end=None) -> tuple:
+    """
+    Returns (statement, params): the player_aggregates lookup when there is
+    no date window, the stat_line query otherwise.
+    """
+    if start is None and end is None and use_running_aggregates():
+        return aggregate, (player_id,)
+    return live, (player_id, start, end)
+
+
+# Location and opponent splits, totals and averages, in one grouping-sets
+# scan (see app.services.split_service).
+
+def _player_splits_sql(columns=STAT_COLUMNS) -> str:
+    return split_sql(
+        _sum_select("s", TOTAL_PREFIX, columns),
+        _avg_select("s", AVERAGE_PREFIX, columns),
+        f"s.player_id = %s AND COALESCE(s.minutes, 0) > 0 AND {DATE_WINDOW_SQL}",
     )
-    row = cursor.fetchone()
-    cols = [c[0] for c in cursor.description]
-    return _row_to_dict(row, cols) if row is not None else _empty_stats()
-
-
-def get_player_averages(conn, player_id: int) -> dict:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            {_avg_select("s")}
-        FROM stat_line s
-        WHERE s.player_id = %s
-            AND COALESCE(s.minutes, 0) > 0
-        """,
-        (player_id,),
+
+
+PLAYER_SPLITS = register("player_splits", _player_splits_sql(), PLAYER_WINDOW_PARAMS)
+
+
+def player_splits_statement(fields=None) -> str:
+    """
+    Returns the splits statement computing only fields (None: STAT_COLUMNS).
+    """
+    if fields is None:
+        return PLAYER_SPLITS
+    return projection(
+        "player_splits",
+        fields,
+        lambda name, cols: register(name, _player_splits_sql(cols), PLAYER_WINDOW_PARAMS, prepare=False),
     )
+
+
+def _empty_stats() -> dict:
+    return {col: 0 for col in STAT_COLUMNS}
+
+
+def get_player_totals(conn, player_id: int, start=None, end=None) -> dict:
+    cursor = mapped_cursor(conn)
+    execute(cursor, *player_stats_statement(PLAYER_AGGREGATE_TOTALS, PLAYER_TOTALS, player_id, start, end))
     row = cursor.fetchone()
-    cols = [c[0] for c in cursor.description]
-    return _row_to_dict(row, cols) if row is not None else _empty_stats()
-
-
-def _location_splits(conn, player_id: int, agg_select: str) -> list[dict]:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            g.location AS label,
-            {agg_select}
-        FROM stat_line s
-        JOIN games g ON g.id = s.game_id
-        WHERE s.player_id = %s
-            AND COALESCE(s.minutes, 0) > 0
-            AND g.location IN ('Home', 'Away')
-        GROUP BY g.location
-        """,
-        (player_id,),
-    )
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    dict_rows = [_row_to_dict(r, cols) for r in rows]
+    return map_row(cursor, row) if row is not None else _empty_stats()
+
+
+def get_player_averages(conn, player_id: int, start=None, end=None) -> dict:
+    cursor = mapped_cursor(conn)
+    execute(cursor, *player_stats_statement(PLAYER_AGGREGATE_AVERAGES, PLAYER_AVERAGES, player_id, start, end))
+    row = cursor.fetchone()
+    return map_row(cursor, row) if row is not None else _empty_stats()
+
+
+def _fill_location_rows(dict_rows: list[dict]) -> list[dict]:
     by_label = {r["label"]: r for r in dict_rows if r["label"] in ("Home", "Away")}
 
     out = []
@@ -131,37 +185,123 @@ def _location_splits(conn, player_id: int, agg_select: str) -> list[dict]:
     return out
 
 
-def _opponent_splits(conn, player_id: int, agg_select: str) -> list[dict]:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            g.opponent AS label,
-            {agg_select}
-        FROM stat_line s
-        JOIN games g ON g.id = s.game_id
-        WHERE s.player_id = %s
-            AND COALESCE(s.minutes, 0) > 0
-        GROUP BY g.opponent
-        ORDER BY g.opponent
-        """,
-        (player_id,),
-    )
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    dict_rows = [_row_to_dict(r, cols) for r in rows]
+def _labelled_rows(dict_rows: list[dict]) -> list[dict]:
     return [r for r in dict_rows if r["label"] is not None]
 
 
-def get_player_splits_totals(conn, player_id: int) -> dict:
+def get_player_splits(conn, player_id: int, start=None, end=None, fields=None) -> dict:
+    """
+    Returns {"totals": ..., "averages": ...} splits from one scan.
+    """
+    statement = player_splits_statement(fields)
+    return get_splits(conn, statement, (player_id, start, end), fields or STAT_COLUMNS)
+
+
+def get_player_splits_totals(conn, player_id: int, start=None, end=None, fields=None) -> dict:
+    return split_view(get_player_splits(conn, player_id, start, end, fields), "totals")
+
+
+def get_player_splits_averages(conn, player_id: int, start=None, end=None, fields=None) -> dict:
+    return split_view(get_player_splits(conn, player_id, start, end, fields), "averages")
+
+
+# Player dashboard: every section is derived from one scan of the player's
+# game log (stat_line JOIN games), with the same rules as the SQL above:
+# totals/averages/splits only count lines with minutes > 0, averages skip
+# NULLs and round half away from zero like ROUND(numeric).
+
+DASHBOARD_SECTIONS = ("player", "game_log", "totals", "averages", "splits_totals", "splits_averages")
+
+
+def dashboard_sections(include=None) -> tuple:
+    """
+    Returns the requested sections in DASHBOARD_SECTIONS order (all when
+    include is empty). Raises ValueError naming any unknown section.
+    """
+    if not include:
+        return DASHBOARD_SECTIONS
+    unknown = sorted(set(include) - set(DASHBOARD_SECTIONS))
+    if unknown:
+        raise ValueError(f"unknown dashboard sections: {', '.join(unknown)}")
+    return tuple(section for section in DASHBOARD_SECTIONS if section in include)
+
+
+def _exact(value) -> Decimal:
+    # Loaded rows carry floats for NUMERIC columns; sum them exactly.
+    return Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+
+
+def _sum_lines(lines: list[dict]) -> dict:
+    out = _empty_stats()
+    for col in STAT_COLUMNS:
+        values = [_exact(line[col]) for line in lines if line[col] is not None]
+        if values:
+            out[col] = decimal_value(sum(values))
+    return out
+
+
+def _avg_lines(lines: list[dict]) -> dict:
+    out = _empty_stats()
+    for col in STAT_COLUMNS:
+        values = [_exact(line[col]) for line in lines if line[col] is not None]
+        if values:
+            places = Decimal("0.01") if col == "minutes" else Decimal("0.1")
+            mean = sum(values) / len(values)
+            out[col] = decimal_value(mean.quantize(places, rounding=ROUND_HALF_UP))
+    return out
+
+
+def _played(game_log: list[dict]) -> list[dict]:
+    return [line for line in game_log if (line["minutes"] or 0) > 0]
+
+
+def _split_rows(lines: list[dict], key: str, aggregate) -> list[dict]:
+    groups = {}
+    for line in lines:
+        groups.setdefault(line[key], []).append(line)
+    return [{"label": label, **aggregate(rows)} for label, rows in groups.items()]
+
+
+def _dashboard_splits(played: list[dict], aggregate) -> dict:
+    location = _split_rows([l for l in played if l["location"] in ("Home", "Away")], "location", aggregate)
+    opponents = sorted(_split_rows(played, "opponent", aggregate), key=lambda r: r["label"] or "")
     return {
-        "location": _location_splits(conn, player_id, _sum_select("s")),
-        "opponents": _opponent_splits(conn, player_id, _sum_select("s")),
+        "location": _fill_location_rows(location),
+        "opponents": _labelled_rows(opponents),
     }
 
 
-def get_player_splits_averages(conn, player_id: int) -> dict:
-    return {
-        "location": _location_splits(conn, player_id, _avg_select("s")),
-        "opponents": _opponent_splits(conn, player_id, _avg_select("s")),
+def build_dashboard(player: dict, game_log: list[dict], sections: tuple) -> dict:
+    """
+    Assembles the requested dashboard sections from the player row and
+    their game log.
+    """
+    played = _played(game_log)
+    builders = {
+        "player": lambda: dict(player),
+        "game_log": lambda: [dict(line) for line in game_log],
+        "totals": lambda: _sum_lines(played),
+        "averages": lambda: _avg_lines(played),
+        "splits_totals": lambda: _dashboard_splits(played, _sum_lines),
+        "splits_averages": lambda: _dashboard_splits(played, _avg_lines),
     }
+    return {section: builders[section]() for section in sections}
+
+
+def needs_game_log(sections: tuple) -> bool:
+    return any(section != "player" for section in sections)
+
+
+def get_player_dashboard(conn, player_id: int, start=None, end=None, sections=DASHBOARD_SECTIONS) -> dict:
+    """
+    Returns the player's dashboard, or None when the player doesn't exist.
+    """
+    player = get_player_by_id(conn, player_id)
+    if player is None:
+        return None
+    game_log = []
+    if needs_game_log(sections):
+        cursor = mapped_cursor(conn)
+        execute(cursor, GAME_LOG, (player_id, start, end))
+        game_log = map_rows(cursor, cursor.fetchall())
+    return build_dashboard(player, game_log, sections)
@@ -0,0 +1,325 @@
+import asyncio
+import functools
+import inspect
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from app.db.pool import acquire_async, get_async_pool, is_replica, release_async
+
+# In-process cache for aggregate reads on the API path. Entries are LRU
+# bounded, expire after RESULT_CACHE_TTL seconds and carry tags
+# ("team", "player:<id>", "game:<id>"); the write services invalidate only
+# the tags a write touches.
+#
+# With RESULT_CACHE_STALE_SECONDS > 0, an expired entry is still served for
+# that long while a single background task recomputes it.
+#
+# Backends (RESULT_CACHE_BACKEND):
+#   memory    per process: each worker keeps its own copy, and a write made
+#             by another process only shows up once the entry expires.
+#   postgres  one UNLOGGED table shared by every worker (see
+#             app.services.shared_cache); entries are checked against
+#             data_versions, so writes from any process invalidate them.
+
+CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") != "0"
+CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+CACHE_STALE_SECONDS = float(os.getenv("RESULT_CACHE_STALE_SECONDS", "0"))
+
+TEAM_TAG = "team"
+
+
+def player_tag(player_id) -> str:
+    return f"player:{player_id}"
+
+
+def game_tag(game_id) -> str:
+    return f"game:{game_id}"
+
+
+def team_tags(**_) -> tuple:
+    return (TEAM_TAG,)
+
+
+def player_tags(player_id, **_) -> tuple:
+    return (player_tag(player_id),)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "tags")
+
+    def __init__(self, value, expires_at, tags):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+
+
+class ResultCache:
+    """
+    LRU + TTL map from key to value, with tag-based invalidation.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL, stale_seconds: float = CACHE_STALE_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self._entries = OrderedDict()
+        self._keys_by_tag = {}
+        self._tag_generations = {}
+        self._refreshing = set()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    def lookup(self, key):
+        """
+        Returns (found, value, stale). Stale entries are past their TTL but
+        inside the stale window.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return True, entry.value, False
+            if now < entry.expires_at + self.stale_seconds:
+                self._entries.move_to_end(key)
+                self._counters["stale_hits"] += 1
+                return True, entry.value, True
+            self._remove(key)
+        self._counters["misses"] += 1
+        return False, None, False
+
+    def snapshot(self, tags) -> tuple:
+        """
+        Returns the current generation of each tag. Pass it to store() so a
+        result computed before an invalidation isn't cached after it.
+        """
+        return tuple(self._tag_generations.get(tag, 0) for tag in tags)
+
+    def store(self, key, value, tags, snapshot=None) -> bool:
+        tags = tuple(tags)
+        if snapshot is not None and snapshot != self.snapshot(tags):
+            return False
+        self._remove(key)
+        self._entries[key] = _Entry(value, time.monotonic() + self.ttl, tags)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters["evictions"] += 1
+        return True
+
+    def invalidate(self, *tags) -> int:
+        """
+        Drops every entry carrying any of tags. Returns how many were dropped.
+        """
+        dropped = 0
+        for tag in tags:
+            self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+            for key in self._keys_by_tag.pop(tag, ()):
+                if self._remove(key):
+                    dropped += 1
+        self._counters["invalidations"] += dropped
+        return dropped
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def begin_refresh(self, key) -> bool:
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def end_refresh(self, key, ok: bool):
+        self._refreshing.discard(key)
+        self._counters["refreshes" if ok else "refresh_errors"] += 1
+
+    def _remove(self, key) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+        return True
+
+    def stats(self) -> dict:
+        lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"]
+        hits = self._counters["hits"] + self._counters["stale_hits"]
+        return {
+            "enabled": CACHE_ENABLED,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale_seconds": self.stale_seconds,
+            "refreshing": len(self._refreshing),
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            **self._counters,
+        }
+
+
+result_cache = ResultCache()
+_refresh_tasks = set()
+
+
+class MemoryBackend:
+    """
+    Backend over this process's ResultCache. conn is unused.
+    """
+    name = "memory"
+    # Tag generations only catch invalidations made while a value is being
+    # computed, not replica lag: a replica's result could be older than a
+    # write this process has already invalidated.
+    stores_replica_results = False
+
+    async def setup(self):
+        pass
+
+    async def lookup(self, conn, key, tags) -> tuple:
+        """
+        Returns (found, value, stale, snapshot); pass snapshot to store().
+        """
+        found, value, stale = result_cache.lookup(key)
+        return found, value, stale, result_cache.snapshot(tags)
+
+    async def snapshot(self, conn, tags):
+        return result_cache.snapshot(tags)
+
+    async def store(self, conn, key, value, tags, snapshot) -> bool:
+        return result_cache.store(key, value, tags, snapshot)
+
+    def invalidate(self, *tags) -> int:
+        return result_cache.invalidate(*tags)
+
+    def stats(self) -> dict:
+        return result_cache.stats()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if CACHE_BACKEND == "postgres":
+            from app.services.shared_cache import PostgresBackend
+            _backend = PostgresBackend()
+        elif CACHE_BACKEND == "memory":
+            _backend = MemoryBackend()
+        else:
+            raise RuntimeError(f"unknown RESULT_CACHE_BACKEND {CACHE_BACKEND!r}")
+    return _backend
+
+
+def invalidate_tags(*tags) -> int:
+    return get_backend().invalidate(*tags)
+
+
+def invalidate_stat_lines(player_ids=(), game_ids=()) -> int:
+    """
+    Drops results that depend on stat lines of the given players/games,
+    plus every team-wide result.
+    """
+    return invalidate_tags(TEAM_TAG, *map(player_tag, player_ids), *map(game_tag, game_ids))
+
+
+def cache_stats() -> dict:
+    return {"backend": get_backend().name, **get_backend().stats()}
+
+
+@asynccontextmanager
+async def refresh_connection():
+    """
+    Background refreshes run after the request's connection is gone, so
+    they borrow their own from the primary, whose results every backend
+    can store.
+    """
+    pool = await get_async_pool()
+    conn = await acquire_async(pool)
+    try:
+        yield conn
+    finally:
+        await release_async(pool, conn)
+
+
+async def _refresh(key, func, arguments, tags):
+    ok = False
+    backend = get_backend()
+    try:
+        async with refresh_connection() as conn:
+            snapshot = await backend.snapshot(conn, tags)
+            value = await func(conn, **arguments)
+            await backend.store(conn, key, value, tags, snapshot)
+        ok = True
+    except Exception:
+        # The stale value keeps being served; the next lookup retries.
+        pass
+    finally:
+        result_cache.end_refresh(key, ok)
+
+
+def _schedule_refresh(key, func, arguments, tags):
+    # Refreshes are single-flight per process, whatever the backend.
+    if not result_cache.begin_refresh(key):
+        return
+    task = asyncio.get_running_loop().create_task(_refresh(key, func, arguments, tags))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+def cached(tags):
+    """
+    Caches an async service function taking (conn, ...). tags receives the
+    call's arguments (without conn) by name and returns the entry's tags.
+    Callers must treat cached results as read-only.
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        async def wrapper(conn, *args, **kwargs):
+            if not CACHE_ENABLED:
+                return await func(conn, *args, **kwargs)
+            bound = signature.bind(conn, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(list(bound.arguments.items())[1:])
+            key = (name, *arguments.values())
+            entry_tags = tuple(tags(**arguments))
+
+            backend = get_backend()
+            found, value, stale, snapshot = await backend.lookup(conn, key, entry_tags)
+            if found:
+                if stale:
+                    _schedule_refresh(key, func, arguments, entry_tags)
+                return value
+
+            if not backend.stores_replica_results and is_replica(conn):
+                return await func(conn, **arguments)
+            if snapshot is None:
+                snapshot = await backend.snapshot(conn, entry_tags)
+            value = await func(conn, **arguments)
+            await backend.store(conn, key, value, entry_tags, snapshot)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorate
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import time
+from contextlib import asynccontextmanager
+
+import orjson
+
+from app.api.responses import dumps
+from app.db.pagination import Page
+from app.db.pool import acquire_async, get_async_pool, get_replica_pool, release_async
+from app.db.versions import GLOBAL_SCOPE, read_versions
+from app.services.result_cache import CACHE_STALE_SECONDS, CACHE_TTL, TEAM_TAG
+
+# Result cache backend shared by every worker: one UNLOGGED table (no WAL,
+# emptied after a crash, not replicated), so a result computed by one
+# worker is served by all of them.
+#
+# Entries record the data_versions of their tags ("team" is the global
+# scope) when the computation started, and a lookup only returns an entry
+# whose versions are still current. Write services bump those versions in
+# their transaction, so invalidation needs no extra step and covers writes
+# from every process. Lookups and the version check are one round trip,
+# always on the primary (replicas can't read UNLOGGED tables). The versions
+# an entry is stored under are read on the connection that computed it, so
+# a result computed on a lagging replica carries the replica's versions and
+# simply misses on the primary until the replica catches up.
+#
+# Values are stored as JSON (never pickle: the table is shared, so its bytes
+# can't be trusted to run code). Cached results are rows, dicts and Pages,
+# which come back as the same JSON the routes send; dates come back as ISO
+# strings.
+#
+# Limits: RESULT_CACHE_SHARED_MAX_ENTRIES, RESULT_CACHE_SHARED_MAX_BYTES
+# (oldest entries go first) and RESULT_CACHE_MAX_VALUE_BYTES (larger
+# results aren't stored). Expired entries are pruned with them, at most every
+# RESULT_CACHE_PRUNE_INTERVAL seconds per worker.
+
+SHARED_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_SHARED_MAX_ENTRIES", "10000"))
+SHARED_MAX_BYTES = int(os.getenv("RESULT_CACHE_SHARED_MAX_BYTES", str(64 * 1024 * 1024)))
+MAX_VALUE_BYTES = int(os.getenv("RESULT_CACHE_MAX_VALUE_BYTES", str(1024 * 1024)))
+PRUNE_INTERVAL = float(os.getenv("RESULT_CACHE_PRUNE_INTERVAL", "5"))
+
+CREATE_SHARED_CACHE_SQL = [
+    """
+    CREATE UNLOGGED TABLE IF NOT EXISTS result_cache_entries (
+        key TEXT PRIMARY KEY,
+        value BYTEA NOT NULL,
+        tag_versions BIGINT[] NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        stored_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        expires_at TIMESTAMPTZ NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS result_cache_entries_stored_idx ON result_cache_entries (stored_at)",
+]
+
+# Current versions of the entry's scopes, plus the entry if it is within
+# TTL + stale window and was computed against exactly those versions.
+LOOKUP_SQL = """
+    WITH current AS (
+        SELECT COALESCE(array_agg(COALESCE(d.version, 0) ORDER BY t.i), '{}') AS versions
+        FROM unnest(%s::text[]) WITH ORDINALITY AS t(scope, i)
+        LEFT JOIN data_versions d ON d.scope = t.scope
+    )
+    SELECT current.versions, c.value, c.expires_at > now() AS fresh
+    FROM current
+    LEFT JOIN result_cache_entries c
+        ON c.key = %s
+        AND c.tag_versions = current.versions
+        AND c.expires_at + make_interval(secs => %s) > now()
+"""
+
+STORE_SQL = """
+    INSERT INTO result_cache_entries (key, value, tag_versions, size_bytes, expires_at)
+    VALUES (%s, %s, %s, %s, now() + make_interval(secs => %s))
+    ON CONFLICT (key) DO UPDATE SET
+        value = EXCLUDED.value,
+        tag_versions = EXCLUDED.tag_versions,
+        size_bytes = EXCLUDED.size_bytes,
+        stored_at = now(),
+        expires_at = EXCLUDED.expires_at
+"""
+
+PRUNE_SQL = """
+    DELETE FROM result_cache_entries
+    WHERE key IN (
+        SELECT key FROM (
+            SELECT
+                key,
+                expires_at,
+                row_number() OVER newest AS position,
+                sum(size_bytes) OVER newest AS bytes
+            FROM result_cache_entries
+            WINDOW newest AS (ORDER BY stored_at DESC, key)
+        ) ranked
+        WHERE position > %s
+            OR bytes > %s
+            OR expires_at + make_interval(secs => %s) <= now()
+    )
+"""
+
+
+def _scope(tag: str) -> str:
+    return GLOBAL_SCOPE if tag == TEAM_TAG else tag
+
+
+def _key_text(key) -> str:
+    return hashlib.blake2b(repr(key).encode(), digest_size=20).hexdigest()
+
+
+def encode_value(value) -> bytes:
+    if isinstance(value, Page):
+        return dumps(["page", value.rows, value.next_cursor])
+    return dumps(["value", value])
+
+
+def decode_value(payload: bytes):
+    """
+    Returns the value encode_value() stored. Raises ValueError for any
+    other payload.
+    """
+    decoded = orjson.loads(payload)
+    if isinstance(decoded, list) and len(decoded) == 3 and decoded[0] == "page":
+        return Page(decoded[1], decoded[2])
+    if isinstance(decoded, list) and len(decoded) == 2 and decoded[0] == "value":
+        return decoded[1]
+    raise ValueError("not a cached value")
+
+
+class PostgresBackend:
+    name = "postgres"
+    # Entries carry the versions read where they were computed (see above).
+    stores_replica_results = True
+
+    def __init__(self, ttl: float = CACHE_TTL, stale_seconds: float = CACHE_STALE_SECONDS):
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self._last_prune = 0.0
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "oversized": 0,
+            "evictions": 0,
+        }
+
+    async def setup(self):
+        async with self._connection(None) as conn:
+            async with conn.transaction():
+                cursor = conn.cursor()
+                for sql in CREATE_SHARED_CACHE_SQL:
+                    await cursor.execute(sql)
+
+    async def _is_primary(self, conn) -> bool:
+        # The request's connection is the primary unless a replica is configured.
+        return conn is not None and await get_replica_pool() is None
+
+    @asynccontextmanager
+    async def _connection(self, conn):
+        if await self._is_primary(conn):
+            yield conn
+            return
+        pool = await get_async_pool()
+        primary = await acquire_async(pool)
+        try:
+            yield primary
+        finally:
+            await release_async(pool, primary)
+
+    async def lookup(self, conn, key, tags) -> tuple:
+        """
+        Returns (found, value, stale, snapshot). snapshot is None when conn
+        isn't the primary: the caller takes it with snapshot(conn, tags).
+        """
+        async with self._connection(conn) as primary:
+            cursor = primary.cursor()
+            await cursor.execute(LOOKUP_SQL, ([_scope(t) for t in tags], _key_text(key), self.stale_seconds))
+            versions, value, fresh = await cursor.fetchone()
+        if value is not None:
+            try:
+                value = decode_value(value)
+            except ValueError:
+                # Written in an older format; recompute and overwrite it.
+                fresh = None
+        if fresh is None:
+            self._counters["misses"] += 1
+            return False, None, False, versions if primary is conn else None
+        self._counters["hits" if fresh else "stale_hits"] += 1
+        return True, value, not fresh, versions
+
+    async def snapshot(self, conn, tags):
+        # Read where the value is computed, which may be a replica.
+        scopes = [_scope(t) for t in tags]
+        versions = await read_versions(conn, scopes)
+        return [versions[s] for s in scopes]
+
+    async def store(self, conn, key, value, tags, snapshot) -> bool:
+        payload = encode_value(value)
+        if len(payload) > MAX_VALUE_BYTES:
+            self._counters["oversized"] += 1
+            return False
+        async with self._connection(conn) as primary:
+            cursor = primary.cursor()
+            await cursor.execute(STORE_SQL, (_key_text(key), payload, list(snapshot), len(payload), self.ttl))
+            self._counters["stores"] += 1
+            if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+                self._last_prune = time.monotonic()
+                await cursor.execute(PRUNE_SQL, (SHARED_MAX_ENTRIES, SHARED_MAX_BYTES, self.stale_seconds))
+                self._counters["evictions"] += max(cursor.rowcount, 0)
+        return True
+
+    def invalidate(self, *tags) -> int:
+        # The write already bumped these scopes in data_versions.
+        return 0
+
+    def stats(self) -> dict:
+        lookups = self._counters["hits"] + self._counters["stale_hits"] + self._counters["misses"]
+        hits = self._counters["hits"] + self._counters["stale_hits"]
+        return {
+            "ttl": self.ttl,
+            "stale_seconds": self.stale_seconds,
+            "max_entries": SHARED_MAX_ENTRIES,
+            "max_bytes": SHARED_MAX_BYTES,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            **self._counters,
+        }
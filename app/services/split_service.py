@@ -0,0 +1,81 @@
+from app.db.rows import map_rows, mapped_cursor
+from app.db.statements import execute
+
+# Split engine shared by player and team splits. One scan grouped by
+# GROUPING SETS ((), (location), (opponent)) returns the overall row, each
+# location and each opponent, with totals and averages side by side
+# (total_<col> / avg_<col>). shape_splits() turns the rows back into the
+# {"location": [...], "opponents": [...]} responses, Home/Away zero-filled.
+
+TOTAL_PREFIX = "total_"
+AVERAGE_PREFIX = "avg_"
+
+# GROUPING(g.location, g.opponent) sets one bit per rolled-up column.
+LOCATION_SET = 1
+OPPONENT_SET = 2
+OVERALL_SET = 3
+
+LOCATION_LABELS = ("Home", "Away")
+
+
+def split_sql(totals_select: str, averages_select: str, where: str) -> str:
+    return f"""
+    SELECT
+        GROUPING(g.location, g.opponent) AS split_set,
+        COALESCE(g.location, g.opponent) AS label,
+        {totals_select},
+        {averages_select}
+    FROM stat_line s
+    JOIN games g ON g.id = s.game_id
+    WHERE {where}
+    GROUP BY GROUPING SETS ((), (g.location), (g.opponent))
+    ORDER BY split_set, label
+    """
+
+
+def _section(row: dict, prefix: str) -> dict:
+    return {k[len(prefix):]: v for k, v in row.items() if k.startswith(prefix)}
+
+
+def _shape_kind(rows: list[dict], prefix: str, columns) -> dict:
+    empty = {col: 0 for col in columns}
+    overall = dict(empty)
+    location = {}
+    opponents = []
+    for row in rows:
+        stats = _section(row, prefix)
+        if row["split_set"] == OVERALL_SET:
+            overall = stats
+        elif row["split_set"] == LOCATION_SET:
+            location[row["label"]] = {"label": row["label"], **stats}
+        elif row["label"] is not None:
+            opponents.append({"label": row["label"], **stats})
+    return {
+        "overall": overall,
+        "location": [location.get(label) or {"label": label, **empty} for label in LOCATION_LABELS],
+        "opponents": opponents,
+    }
+
+
+def shape_splits(rows: list[dict], columns) -> dict:
+    """
+    Returns {"totals": ..., "averages": ...}, each with the overall stats
+    and the location/opponent split rows, from rows mapped by app.db.rows.
+    """
+    return {
+        "totals": _shape_kind(rows, TOTAL_PREFIX, columns),
+        "averages": _shape_kind(rows, AVERAGE_PREFIX, columns),
+    }
+
+
+def split_view(splits: dict, kind: str) -> dict:
+    """
+    Returns the existing splits response for kind ("totals" or "averages").
+    """
+    return {"location": splits[kind]["location"], "opponents": splits[kind]["opponents"]}
+
+
+def get_splits(conn, statement: str, params: tuple, columns) -> dict:
+    cursor = mapped_cursor(conn)
+    execute(cursor, statement, params)
+    return shape_splits(map_rows(cursor, cursor.fetchall()), columns)
@@ -1,3 +1,11 @@
+from app.db.fieldsets import projection, with_columns
+from app.db.pagination import Pager, fetch_page
+from app.db.rows import map_row, map_rows, mapped_cursor
+from app.db.statements import execute, register
+from app.db.versions import bump_versions
+from app.services.game_service import DATE_WINDOW_PARAMS, DATE_WINDOW_SQL
+from app.services.result_cache import invalidate_stat_lines
+
 # Handles logic for creating and fetching statlines for 
 # individual games. 
 
@@ -9,34 +17,252 @@ def _row_id(row):
     return row[0]
 
 
-def _row_to_dict(row, columns):
-    if row is None:
-        return None
-    if isinstance(row, dict):
-        data = row
-    else:
-        data = {columns[i]: row[i] for i in range(len(columns))}
-    return _normalize_stat_keys(data)
+INSERT_STATLINE_SQL = """
+    INSERT INTO stat_line (
+        player_id, game_id, minutes, points, rebounds, OREB, assists,
+        steals, blocks, turnovers, fouls, FG, FGA, FG3, FGA3, FT, FTA, PM, starter)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    RETURNING id
+"""
 
+UPSERT_STATLINE_SQL = """
+    INSERT INTO stat_line (
+        player_id, game_id, minutes, points, rebounds, OREB, assists, steals, blocks, turnovers, fouls,
+        FG, FGA, FG3, FGA3, FT, FTA, PM, starter
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT(player_id, game_id) DO UPDATE SET
+        minutes=excluded.minutes,
+        points=excluded.points,
+        rebounds=excluded.rebounds,
+        OREB=excluded.OREB,
+        assists=excluded.assists,
+        steals=excluded.steals,
+        blocks=excluded.blocks,
+        turnovers=excluded.turnovers,
+        fouls=excluded.fouls,
+        FG=excluded.FG,
+        FGA=excluded.FGA,
+        FG3=excluded.FG3,
+        FGA3=excluded.FGA3,
+        FT=excluded.FT,
+        FTA=excluded.FTA,
+        PM=excluded.PM,
+        starter=excluded.starter
+"""
+
+STATLINE_FIELDS = (
+    "minutes", "points", "rebounds", "OREB", "assists", "steals", "blocks", "turnovers", "fouls",
+    "FG", "FGA", "FG3", "FGA3", "FT", "FTA", "PM", "starter",
+)
+
+# Columns ?fields= can narrow the game log to (it never returns starter).
+GAME_LOG_FIELDS = STATLINE_FIELDS[:-1]
+
+def _game_log_select(coalesced=(), fields=GAME_LOG_FIELDS) -> str:
+    # Sort keys are coalesced so keyset comparisons never meet a NULL.
+    stats = [f"COALESCE(s.{col}, 0) AS {col}" if col in coalesced else f"s.{col} AS {col}" for col in fields]
+    return f"""
+    SELECT
+        g.id AS game_id,
+        g.date AS date,
+        g.opponent AS opponent,
+        g.location AS location,
+        {", ".join(stats)}
+    FROM stat_line s
+    JOIN games g ON g.id = s.game_id
+    WHERE s.player_id = %s
+        AND {DATE_WINDOW_SQL}
+    """
 
-def _normalize_stat_keys(data):
-    if data is None:
-        return None
-    mapping = {
-        "oreb": "OREB",
-        "fg": "FG",
-        "fga": "FGA",
-        "fg3": "FG3",
-        "fga3": "FGA3",
-        "ft": "FT",
-        "fta": "FTA",
-        "pm": "PM",
+
+GAME_LOG_SQL = _game_log_select() + "ORDER BY g.date\n"
+
+GAME_LOG = register("player_game_log", GAME_LOG_SQL, ("player_id", *DATE_WINDOW_PARAMS))
+
+GAME_LOG_SORTS = {"date": ("date", "date"), "points": ("points", "int"), "minutes": ("minutes", "numeric")}
+GAME_LOG_SORT_KEYS = ("minutes", "points")
+
+GAME_LOG_PAGER = Pager(
+    "player_game_log",
+    _game_log_select(coalesced=GAME_LOG_SORT_KEYS),
+    "game_id",
+    GAME_LOG_SORTS,
+    "date",
+    ("player_id", *DATE_WINDOW_PARAMS),
+)
+
+
+def _game_log_pager(name: str, fields: tuple) -> Pager:
+    sorts = {sort: spec for sort, spec in GAME_LOG_SORTS.items() if spec[0] not in GAME_LOG_FIELDS or spec[0] in fields}
+    return Pager(
+        name,
+        _game_log_select(coalesced=GAME_LOG_SORT_KEYS, fields=fields),
+        "game_id",
+        sorts,
+        "date",
+        ("player_id", *DATE_WINDOW_PARAMS),
+        prepare=False,
+    )
+
+
+def game_log_pager(fields=None, sort=None) -> Pager:
+    """
+    Returns the game log Pager for fields (None: every column). The sort
+    key is always selected.
+    """
+    if fields is None:
+        return GAME_LOG_PAGER
+    fields = with_columns(fields, GAME_LOG_FIELDS, GAME_LOG_PAGER.sort_column(sort))
+    return projection("player_game_log", fields, _game_log_pager)
+
+
+GAME_STATLINES = register(
+    "game_statlines", "SELECT * FROM stat_line WHERE game_id = %s ORDER BY player_id", ("game_id",)
+)
+
+
+def game_statlines_statement(fields=None) -> str:
+    """
+    Returns the game's stat lines statement narrowed to fields (None: every
+    column); id, player_id and game_id are always selected.
+    """
+    if fields is None:
+        return GAME_STATLINES
+    return projection(
+        "game_statlines",
+        fields,
+        lambda name, cols: register(
+            name,
+            f"SELECT id, player_id, game_id, {', '.join(cols)} FROM stat_line WHERE game_id = %s ORDER BY player_id",
+            ("game_id",),
+            prepare=False,
+        ),
+    )
+
+# Whole-game box scores: every line for the game is validated up front and
+# written in one transaction. The upsert runs through executemany, which
+# psycopg sends in pipeline mode, and skips lines that haven't changed so
+# the aggregate triggers and data versions only see real changes.
+
+# (made, attempted) pairs and other "part <= whole" checks on a line.
+BOX_SCORE_BOUNDS = (("FG", "FGA"), ("FG3", "FGA3"), ("FT", "FTA"), ("FG3", "FG"), ("OREB", "rebounds"))
+
+BOX_SCORE_UPSERT_SQL = f"""
+    INSERT INTO stat_line (player_id, game_id, {", ".join(STATLINE_FIELDS)})
+    VALUES (%s, %s, {", ".join(["%s"] * len(STATLINE_FIELDS))})
+    ON CONFLICT (player_id, game_id) DO UPDATE SET
+        {", ".join(f"{col} = excluded.{col}" for col in STATLINE_FIELDS)}
+    WHERE ({", ".join(f"stat_line.{col}" for col in STATLINE_FIELDS)})
+        IS DISTINCT FROM ({", ".join(f"excluded.{col}" for col in STATLINE_FIELDS)})
+    RETURNING player_id, (xmax = 0) AS inserted
+"""
+
+LOCK_GAME_SQL = "SELECT id FROM games WHERE id = %s FOR UPDATE"
+
+UNKNOWN_PLAYERS_SQL = """
+    SELECT p.id
+    FROM unnest(%s::int[]) AS p(id)
+    LEFT JOIN players ON players.id = p.id
+    WHERE players.id IS NULL
+    ORDER BY p.id
+"""
+
+DELETE_MISSING_LINES_SQL = """
+    DELETE FROM stat_line
+    WHERE game_id = %s AND player_id <> ALL(%s::int[])
+    RETURNING player_id
+"""
+
+
+def validate_box_score(lines: list[dict]) -> list[str]:
+    """
+    Checks every line in one pass and returns the problems found.
+    """
+    errors = []
+    seen = set()
+    for i, line in enumerate(lines):
+        player_id = line["player_id"]
+        if player_id in seen:
+            errors.append(f"line {i}: duplicate player {player_id}")
+        seen.add(player_id)
+        for col in STATLINE_FIELDS:
+            if col != "PM" and (line.get(col) or 0) < 0:
+                errors.append(f"line {i}: {col} is negative")
+        for part, whole in BOX_SCORE_BOUNDS:
+            if (line.get(part) or 0) > (line.get(whole) or 0):
+                errors.append(f"line {i}: {part} exceeds {whole}")
+    return errors
+
+
+def _box_score_params(game_id: int, lines: list[dict]) -> list[tuple]:
+    return [(line["player_id"], game_id, *[line.get(col, 0) for col in STATLINE_FIELDS]) for line in lines]
+
+
+def _box_score_report(game_id: int, player_ids: list, written: list, deleted: list) -> dict:
+    inserted = sorted(player_id for player_id, was_insert in written if was_insert)
+    updated = sorted(player_id for player_id, was_insert in written if not was_insert)
+    changed = set(inserted) | set(updated)
+    return {
+        "game_id": game_id,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": sorted(p for p in player_ids if p not in changed),
+        "deleted": sorted(deleted),
     }
-    out = dict(data)
-    for src, dest in mapping.items():
-        if src in out and dest not in out:
-            out[dest] = out.pop(src)
-    return out
+
+
+def _changed_players(report: dict) -> list:
+    return report["inserted"] + report["updated"] + report["deleted"]
+
+
+def _written_rows(cursor) -> list:
+    rows = []
+    while True:
+        rows.extend(cursor.fetchall())
+        if not cursor.nextset():
+            return rows
+
+
+def save_box_score(conn, game_id: int, lines: list[dict], delete_missing: bool = False):
+    """
+    Upserts every stat line for a game in one transaction, deleting lines
+    for players not in lines when delete_missing is set. Returns the
+    inserted/updated/unchanged/deleted player IDs, or None when the game
+    doesn't exist. Raises ValueError for invalid lines or unknown players.
+    """
+    errors = validate_box_score(lines)
+    if errors:
+        raise ValueError("; ".join(errors))
+    player_ids = [line["player_id"] for line in lines]
+
+    with conn.transaction():
+        cursor = conn.cursor()
+        cursor.execute(LOCK_GAME_SQL, (game_id,))
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(UNKNOWN_PLAYERS_SQL, (player_ids,))
+        unknown = [r[0] for r in cursor.fetchall()]
+        if unknown:
+            raise ValueError(f"unknown players: {', '.join(map(str, unknown))}")
+
+        written = []
+        if lines:
+            cursor.executemany(BOX_SCORE_UPSERT_SQL, _box_score_params(game_id, lines), returning=True)
+            written = _written_rows(cursor)
+        deleted = []
+        if delete_missing:
+            cursor.execute(DELETE_MISSING_LINES_SQL, (game_id, player_ids))
+            deleted = [r[0] for r in cursor.fetchall()]
+
+        report = _box_score_report(game_id, player_ids, written, deleted)
+        changed = _changed_players(report)
+        if changed:
+            bump_versions(conn, changed, [game_id])
+
+    if changed:
+        invalidate_stat_lines(changed, [game_id])
+    return report
 
 def create_statline(
     conn,
@@ -68,18 +294,14 @@ def create_statline(
     cursor = conn.cursor()
 
     cursor.execute(
-        """
-        INSERT INTO stat_line (
-            player_id, game_id, minutes, points, rebounds, OREB, assists,
-            steals, blocks, turnovers, fouls, FG, FGA, FG3, FGA3, FT, FTA, PM, starter)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id
-        """,
+        INSERT_STATLINE_SQL,
         (player_id, game_id, minutes, points, rebounds, OREB, assists,
             steals, blocks, turnovers, fouls, FG, FGA, FG3, FGA3, FT, FTA, PM, starter)
     )
 
+    bump_versions(conn, [player_id], [game_id])
     conn.commit()
+    invalidate_stat_lines([player_id], [game_id])
     row = cursor.fetchone()
     return _row_id(row)
 
@@ -202,16 +424,21 @@ def update_statline(
     """
 
     cursor.execute(query, values)
+    changed = cursor.rowcount > 0
+    if changed:
+        bump_versions(conn, [player_id], [game_id])
     conn.commit()
+    if changed:
+        invalidate_stat_lines([player_id], [game_id])
 
-    return cursor.rowcount > 0
+    return changed
 
 
 def all_player_statlines(conn, player_id):
     """
     Returns all statlines for a given player.
     """
-    cursor = conn.cursor()
+    cursor = mapped_cursor(conn)
 
     cursor.execute(
         """
@@ -220,15 +447,13 @@ def all_player_statlines(conn, player_id):
         (player_id,)
     )
 
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    return [_row_to_dict(r, cols) for r in rows]
+    return map_rows(cursor, cursor.fetchall())
 
 def player_stats_for_game(conn, player_id, game_id):
     """
     Returns player's stats for specific game.
     """
-    cursor = conn.cursor()
+    cursor = mapped_cursor(conn)
 
     cursor.execute(
         """
@@ -240,15 +465,13 @@ def player_stats_for_game(conn, player_id, game_id):
         (player_id, game_id)
     )
 
-    row = cursor.fetchone()
-    cols = [c[0] for c in cursor.description]
-    return _row_to_dict(row, cols)
+    return map_row(cursor, cursor.fetchone())
 
 def get_stats_for_game(conn, game_id):
     """
     Returns all statlines for a given game.
     """
-    cursor = conn.cursor()
+    cursor = mapped_cursor(conn)
 
     cursor.execute(
         """
@@ -257,19 +480,12 @@ def get_stats_for_game(conn, game_id):
         (game_id,)
     )    
 
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    return [_row_to_dict(r, cols) for r in rows]
+    return map_rows(cursor, cursor.fetchall())
 
-def get_statlines_for_game(conn, game_id: int):
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT * FROM stat_line WHERE game_id = %s ORDER BY player_id",
-        (game_id,),
-    )
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    return [_row_to_dict(r, cols) for r in rows]
+def get_statlines_for_game(conn, game_id: int, fields=None):
+    cursor = mapped_cursor(conn)
+    execute(cursor, game_statlines_statement(fields), (game_id,))
+    return map_rows(cursor, cursor.fetchall())
 
 def delete_statline(conn, player_id, game_id):
     cursor = conn.cursor()
@@ -280,8 +496,13 @@ def delete_statline(conn, player_id, game_id):
         """,
         (player_id, game_id),
     )
+    changed = cursor.rowcount > 0
+    if changed:
+        bump_versions(conn, [player_id], [game_id])
     conn.commit()
-    return cursor.rowcount > 0
+    if changed:
+        invalidate_stat_lines([player_id], [game_id])
+    return changed
 
 def delete_statlines_for_player(conn, player_id):
     cursor = conn.cursor()
@@ -289,20 +510,31 @@ def delete_statlines_for_player(conn, player_id):
         """
         DELETE FROM stat_line
         WHERE player_id = %s
+        RETURNING game_id
         """,
         (player_id,),
     )
+    game_ids = [r[0] for r in cursor.fetchall()]
+    if game_ids:
+        bump_versions(conn, [player_id], game_ids)
     conn.commit()
-    return cursor.rowcount
+    if game_ids:
+        invalidate_stat_lines([player_id], game_ids)
+    return len(game_ids)
 
 def delete_statlines_for_game(conn, game_id):
     cursor = conn.cursor()
     cursor.execute(
-        "DELETE FROM stat_line WHERE game_id = %s",
+        "DELETE FROM stat_line WHERE game_id = %s RETURNING player_id",
         (game_id,),
     )
+    player_ids = [r[0] for r in cursor.fetchall()]
+    if player_ids:
+        bump_versions(conn, player_ids, [game_id])
     conn.commit()
-    return cursor.rowcount
+    if player_ids:
+        invalidate_stat_lines(player_ids, [game_id])
+    return len(player_ids)
 
 def upsert_statline(
     conn, 
@@ -328,70 +560,23 @@ def upsert_statline(
 ):
     cursor = conn.cursor()
     cursor.execute(
-        """
-        INSERT INTO stat_line (
-            player_id, game_id, minutes, points, rebounds, OREB, assists, steals, blocks, turnovers, fouls,
-            FG, FGA, FG3, FGA3, FT, FTA, PM, starter
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT(player_id, game_id) DO UPDATE SET
-            minutes=excluded.minutes,
-            points=excluded.points,
-            rebounds=excluded.rebounds,
-            OREB=excluded.OREB,
-            assists=excluded.assists,
-            steals=excluded.steals,
-            blocks=excluded.blocks,
-            turnovers=excluded.turnovers,
-            fouls=excluded.fouls,
-            FG=excluded.FG,
-            FGA=excluded.FGA,
-            FG3=excluded.FG3,
-            FGA3=excluded.FGA3,
-            FT=excluded.FT,
-            FTA=excluded.FTA,
-            PM=excluded.PM,
-            starter=excluded.starter
-            """,
-            (player_id, game_id, minutes, points, rebounds, OREB, assists, steals, blocks, turnovers, fouls,
-             FG, FGA, FG3, FGA3, FT, FTA, PM, starter),
+        UPSERT_STATLINE_SQL,
+        (player_id, game_id, minutes, points, rebounds, OREB, assists, steals, blocks, turnovers, fouls,
+         FG, FGA, FG3, FGA3, FT, FTA, PM, starter),
     )
+    bump_versions(conn, [player_id], [game_id])
     conn.commit()
+    invalidate_stat_lines([player_id], [game_id])
     return True
 
-def get_game_log_for_player(conn, player_id: int):
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT
-            g.id AS game_id,
-            g.date AS date,
-            g.opponent AS opponent,
-            g.location AS location,
-            s.minutes AS minutes,
-            s.points AS points,
-            s.rebounds AS rebounds,
-            s.OREB AS OREB,
-            s.assists AS assists,
-            s.steals AS steals,
-            s.blocks AS blocks,
-            s.turnovers AS turnovers,
-            s.fouls AS fouls,
-            s.FG AS FG,
-            s.FGA AS FGA,
-            s.FG3 AS FG3,
-            s.FGA3 AS FGA3,
-            s.FT AS FT,
-            s.FTA AS FTA,
-            s.PM AS PM
-        FROM stat_line s
-        JOIN games g ON g.id = s.game_id
-        WHERE s.player_id = %s
-        ORDER BY g.date
-        """,
-        (player_id,),
-    )
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    return [_row_to_dict(r, cols) for r in rows]
-    
+def get_game_log_for_player(conn, player_id: int, start=None, end=None):
+    cursor = mapped_cursor(conn)
+    execute(cursor, GAME_LOG, (player_id, start, end))
+    return map_rows(cursor, cursor.fetchall())
+
+def get_game_log_page(conn, player_id: int, start=None, end=None, sort=None, cursor=None, limit=None, fields=None):
+    """
+    Returns one Page of the player's game log (see app.db.pagination),
+    narrowed to fields when given.
+    """
+    return fetch_page(conn, game_log_pager(fields, sort), (player_id, start, end), sort, cursor, limit)
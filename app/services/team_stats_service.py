@@ -1,3 +1,10 @@
+from app.db.aggregates import use_running_aggregates
+from app.db.fieldsets import projection
+from app.db.rows import map_row, mapped_cursor
+from app.db.statements import execute, register
+from app.services.game_service import DATE_WINDOW_PARAMS, DATE_WINDOW_SQL
+from app.services.split_service import AVERAGE_PREFIX, TOTAL_PREFIX, get_splits, split_sql, split_view
+
 STAT_COLUMNS = [
     "minutes",
     "points",
@@ -18,146 +25,148 @@ STAT_COLUMNS = [
 ]
 
 
-def _sum_select(prefix: str) -> str:
+def _sum_select(prefix: str, alias: str = "", columns=STAT_COLUMNS) -> str:
     parts = []
-    for col in STAT_COLUMNS:
+    for col in columns:
         if col == "PM":
-            parts.append(f"COALESCE(ROUND(SUM({prefix}.{col}) / 5.0, 2), 0) AS {col}")
+            parts.append(f"COALESCE(ROUND(SUM({prefix}.{col}) / 5.0, 2), 0) AS {alias}{col}")
         else:
-            parts.append(f"COALESCE(SUM({prefix}.{col}), 0) AS {col}")
+            parts.append(f"COALESCE(SUM({prefix}.{col}), 0) AS {alias}{col}")
     return ",\n            ".join(parts)
 
 
-def _avg_select(prefix: str, game_count_expr: str) -> str:
+def _avg_select(prefix: str, game_count_expr: str, alias: str = "", columns=STAT_COLUMNS) -> str:
     parts = []
-    for col in STAT_COLUMNS:
+    for col in columns:
         if col == "PM":
             base = f"CASE WHEN {game_count_expr} = 0 THEN 0 ELSE (1.0 * SUM({prefix}.{col}) / 5.0) / {game_count_expr} END"
         else:
             base = f"CASE WHEN {game_count_expr} = 0 THEN 0 ELSE 1.0 * SUM({prefix}.{col}) / {game_count_expr} END"
         precision = 2 if col == "minutes" else 1
-        parts.append(f"COALESCE(ROUND({base}, {precision}), 0) AS {col}")
+        parts.append(f"COALESCE(ROUND({base}, {precision}), 0) AS {alias}{col}")
     return ",\n            ".join(parts)
 
 
+# Hot queries, built once at import and prepared per pooled connection.
+# Every query takes (start, end); the date window is optional.
+
+TEAM_GAME_COUNT = "COUNT(DISTINCT s.game_id)"
+
+TEAM_TOTALS = register(
+    "team_totals",
+    f"""
+    SELECT
+        {_sum_select("s")}
+    FROM stat_line s
+    JOIN games g ON g.id = s.game_id
+    WHERE {DATE_WINDOW_SQL}
+    """,
+    DATE_WINDOW_PARAMS,
+)
+
+TEAM_AVERAGES = register(
+    "team_averages",
+    f"""
+    SELECT
+        {_avg_select("s", TEAM_GAME_COUNT)}
+    FROM stat_line s
+    JOIN games g ON g.id = s.game_id
+    WHERE {DATE_WINDOW_SQL}
+    """,
+    DATE_WINDOW_PARAMS,
+)
+
+
+# The same totals/averages summed over game_team_totals (one row per game,
+# see app.db.aggregates) instead of every stat line.
+
+STORED_GAME_COUNT = "COUNT(*) FILTER (WHERE t.lines > 0)"
+
+TEAM_AGGREGATE_TOTALS = register(
+    "team_aggregate_totals",
+    f"""
+    SELECT
+        {_sum_select("t")}
+    FROM game_team_totals t
+    JOIN games g ON g.id = t.game_id
+    WHERE {DATE_WINDOW_SQL}
+    """,
+    DATE_WINDOW_PARAMS,
+)
+
+TEAM_AGGREGATE_AVERAGES = register(
+    "team_aggregate_averages",
+    f"""
+    SELECT
+        {_avg_select("t", STORED_GAME_COUNT)}
+    FROM game_team_totals t
+    JOIN games g ON g.id = t.game_id
+    WHERE {DATE_WINDOW_SQL}
+    """,
+    DATE_WINDOW_PARAMS,
+)
+
+
+def team_stats_statement(aggregate: str, live: str) -> str:
+    return aggregate if use_running_aggregates() else live
+
+
+# Location and opponent splits, totals and averages, in one grouping-sets
+# scan (see app.services.split_service). Averages divide by the games in
+# each group.
+
+def _team_splits_sql(columns=STAT_COLUMNS) -> str:
+    return split_sql(
+        _sum_select("s", TOTAL_PREFIX, columns),
+        _avg_select("s", TEAM_GAME_COUNT, AVERAGE_PREFIX, columns),
+        DATE_WINDOW_SQL,
+    )
+
+
+TEAM_SPLITS = register("team_splits", _team_splits_sql(), DATE_WINDOW_PARAMS)
+
+
+def team_splits_statement(fields=None) -> str:
+    """
+    Returns the splits statement computing only fields (None: STAT_COLUMNS).
+    """
+    if fields is None:
+        return TEAM_SPLITS
+    return projection(
+        "team_splits",
+        fields,
+        lambda name, cols: register(name, _team_splits_sql(cols), DATE_WINDOW_PARAMS, prepare=False),
+    )
+
+
 def _empty_stats() -> dict:
     return {col: 0 for col in STAT_COLUMNS}
 
 
-def _row_to_dict(row, columns):
-    if row is None:
-        return None
-    if isinstance(row, dict):
-        data = row
-    else:
-        data = {columns[i]: row[i] for i in range(len(columns))}
-    return _normalize_stat_keys(data)
-
-
-def _normalize_stat_keys(data):
-    if data is None:
-        return None
-    mapping = {
-        "oreb": "OREB",
-        "fg": "FG",
-        "fga": "FGA",
-        "fg3": "FG3",
-        "fga3": "FGA3",
-        "ft": "FT",
-        "fta": "FTA",
-        "pm": "PM",
-    }
-    out = dict(data)
-    for src, dest in mapping.items():
-        if src in out and dest not in out:
-            out[dest] = out.pop(src)
-    return out
-
-
-def get_team_totals(conn) -> dict:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            {_sum_select("s")}
-        FROM stat_line s
-        """
-    )
+def get_team_totals(conn, start=None, end=None) -> dict:
+    cursor = mapped_cursor(conn)
+    execute(cursor, team_stats_statement(TEAM_AGGREGATE_TOTALS, TEAM_TOTALS), (start, end))
     row = cursor.fetchone()
-    cols = [c[0] for c in cursor.description]
-    return _row_to_dict(row, cols) if row is not None else _empty_stats()
-
-
-def get_team_averages(conn) -> dict:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            {_avg_select("s", "COUNT(DISTINCT s.game_id)")}
-        FROM stat_line s
-        """
-    )
+    return map_row(cursor, row) if row is not None else _empty_stats()
+
+
+def get_team_averages(conn, start=None, end=None) -> dict:
+    cursor = mapped_cursor(conn)
+    execute(cursor, team_stats_statement(TEAM_AGGREGATE_AVERAGES, TEAM_AVERAGES), (start, end))
     row = cursor.fetchone()
-    cols = [c[0] for c in cursor.description]
-    return _row_to_dict(row, cols) if row is not None else _empty_stats()
-
-
-def _location_splits(conn, agg_select: str) -> list[dict]:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            g.location AS label,
-            {agg_select}
-        FROM stat_line s
-        JOIN games g ON g.id = s.game_id
-        WHERE g.location IN ('Home', 'Away')
-        GROUP BY g.location
-        """,
-    )
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    dict_rows = [_row_to_dict(r, cols) for r in rows]
-    by_label = {r["label"]: r for r in dict_rows if r["label"] in ("Home", "Away")}
-
-    out = []
-    for label in ("Home", "Away"):
-        if label in by_label:
-            out.append(by_label[label])
-        else:
-            row = {"label": label, **_empty_stats()}
-            out.append(row)
-    return out
-
-
-def _opponent_splits(conn, agg_select: str) -> list[dict]:
-    cursor = conn.cursor()
-    cursor.execute(
-        f"""
-        SELECT
-            g.opponent AS label,
-            {agg_select}
-        FROM stat_line s
-        JOIN games g ON g.id = s.game_id
-        GROUP BY g.opponent
-        ORDER BY g.opponent
-        """,
-    )
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    dict_rows = [_row_to_dict(r, cols) for r in rows]
-    return [r for r in dict_rows if r["label"] is not None]
+    return map_row(cursor, row) if row is not None else _empty_stats()
+
+
+def get_team_splits(conn, start=None, end=None, fields=None) -> dict:
+    """
+    Returns {"totals": ..., "averages": ...} splits from one scan.
+    """
+    return get_splits(conn, team_splits_statement(fields), (start, end), fields or STAT_COLUMNS)
 
 
-def get_team_splits_totals(conn) -> dict:
-    return {
-        "location": _location_splits(conn, _sum_select("s")),
-        "opponents": _opponent_splits(conn, _sum_select("s")),
-    }
+def get_team_splits_totals(conn, start=None, end=None, fields=None) -> dict:
+    return split_view(get_team_splits(conn, start, end, fields), "totals")
 
 
-def get_team_splits_averages(conn) -> dict:
-    return {
-        "location": _location_splits(conn, _avg_select("s", "COUNT(DISTINCT s.game_id)")),
-        "opponents": _opponent_splits(conn, _avg_select("s", "COUNT(DISTINCT s.game_id)")),
-    }
+def get_team_splits_averages(conn, start=None, end=None, fields=None) -> dict:
+    return split_view(get_team_splits(conn, start, end, fields), "averages")
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+
+# Refresh tokens let a returning client get a new access token without
+# sending its password (and paying for bcrypt) again. They are opaque random
+# strings; only their SHA-256 is stored. Each one works once: refreshing
+# marks it used and issues a replacement. A token stops working when the
+# user's token_version moves (role change or revocation).
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+INSERT_REFRESH_TOKEN_SQL = """
+    INSERT INTO refresh_tokens (token_hash, user_id, token_version, expires_at)
+    VALUES (%s, %s, %s, %s)
+"""
+
+# Used and expired tokens are pruned whenever the user gets a new one.
+PRUNE_REFRESH_TOKENS_SQL = """
+    DELETE FROM refresh_tokens
+    WHERE user_id = %s AND (used_at IS NOT NULL OR expires_at <= now())
+"""
+
+CONSUME_REFRESH_TOKEN_SQL = """
+    UPDATE refresh_tokens r
+    SET used_at = now()
+    FROM users u
+    WHERE r.token_hash = %s
+        AND r.used_at IS NULL
+        AND r.expires_at > now()
+        AND u.id = r.user_id
+        AND u.token_version = r.token_version
+    RETURNING u.id, u.username, u.role, u.token_version
+"""
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _new_refresh_token(user: dict):
+    token = secrets.token_urlsafe(32)
+    expires_at = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    params = (hash_refresh_token(token), user["id"], user.get("token_version") or 0, expires_at)
+    return token, params
+
+
+def _user_from_consumed(row):
+    if row is None:
+        return None
+    if isinstance(row, dict):
+        return row
+    return {"id": row[0], "username": row[1], "role": row[2], "token_version": row[3]}
+
+
+def issue_refresh_token(conn, user: dict) -> str:
+    """
+    Stores and returns a new refresh token for user.
+    """
+    token, params = _new_refresh_token(user)
+    cursor = conn.cursor()
+    cursor.execute(PRUNE_REFRESH_TOKENS_SQL, (user["id"],))
+    cursor.execute(INSERT_REFRESH_TOKEN_SQL, params)
+    conn.commit()
+    return token
+
+
+def rotate_refresh_token(conn, token: str):
+    """
+    Spends token and returns (user, replacement token), or None if the
+    token is unknown, used, expired or revoked.
+    """
+    cursor = conn.cursor()
+    cursor.execute(CONSUME_REFRESH_TOKEN_SQL, (hash_refresh_token(token),))
+    user = _user_from_consumed(cursor.fetchone())
+    if user is None:
+        conn.rollback()
+        return None
+    replacement, params = _new_refresh_token(user)
+    cursor.execute(INSERT_REFRESH_TOKEN_SQL, params)
+    conn.commit()
+    return user, replacement
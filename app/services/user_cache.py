@@ -0,0 +1,68 @@
+import os
+import time
+from collections import OrderedDict
+
+# In-process cache of authenticated users, keyed by username, so
+# get_current_user doesn't look the user up on every request. Entries
+# expire after AUTH_USER_CACHE_TTL seconds and never hold the password hash.
+#
+# create_user and role changes drop the entry in the process that made
+# them; other workers pick the change up when their entry expires. Tokens
+# carry the user's token_version ("ver"), so bumping it revokes every token
+# issued before, within the same bound.
+
+USER_CACHE_ENABLED = os.getenv("AUTH_USER_CACHE_ENABLED", "1") != "0"
+USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "1024"))
+
+_users = OrderedDict()
+_counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get_cached_user(username: str):
+    """
+    Returns the cached user dict, or None on a miss or expired entry.
+    """
+    entry = _users.get(username)
+    if entry is not None:
+        user, expires_at = entry
+        if USER_CACHE_ENABLED and time.monotonic() < expires_at:
+            _users.move_to_end(username)
+            _counters["hits"] += 1
+            return user
+        del _users[username]
+    _counters["misses"] += 1
+    return None
+
+
+def cache_user(user: dict) -> dict:
+    """
+    Caches user and returns the cached copy (without the password hash).
+    """
+    cached = {k: v for k, v in user.items() if k != "password_hash"}
+    if not USER_CACHE_ENABLED:
+        return cached
+    _users[user["username"]] = (cached, time.monotonic() + USER_CACHE_TTL)
+    _users.move_to_end(user["username"])
+    while len(_users) > USER_CACHE_MAX_ENTRIES:
+        _users.popitem(last=False)
+    return cached
+
+
+def forget_user(username: str):
+    if _users.pop(username, None) is not None:
+        _counters["invalidations"] += 1
+
+
+def clear_user_cache():
+    _users.clear()
+
+
+def user_cache_stats() -> dict:
+    return {
+        "enabled": USER_CACHE_ENABLED,
+        "entries": len(_users),
+        "max_entries": USER_CACHE_MAX_ENTRIES,
+        "ttl": USER_CACHE_TTL,
+        **_counters,
+    }
@@ -1,4 +1,5 @@
-from app.db.security import hash_password, verify_password
+from app.db.security import hash_password, verify_and_rehash
+from app.services.user_cache import forget_user
 
 
 def _row_id(row):
@@ -16,6 +17,20 @@ def _row_field(row, field: str, index: int):
         return row.get(field)
     return row[index]
 
+def _user_from_row(row):
+    if row is None:
+        return None
+    if isinstance(row, dict):
+        return row
+    return {
+        "id": row[0],
+        "username": row[1],
+        "password_hash": row[2],
+        "role": row[3],
+        "created_at": row[4],
+        "token_version": row[5] if len(row) > 5 else 0,
+    }
+
 def create_user(conn, username: str, password: str, role: str) -> int:
     cursor = conn.cursor()
     password_hash = hash_password(password)
@@ -27,31 +42,61 @@ def create_user(conn, username: str, password: str, role: str) -> int:
         """,
         (username, password_hash, role),
     )
-    conn.commit()
     row = cursor.fetchone()
+    conn.commit()
+    forget_user(username)
     return _row_id(row)
 
 def get_user_by_username(conn, username: str):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
     row = cursor.fetchone()
-    if row is None:
-        return None
-    if isinstance(row, dict):
-        return row
-    return {
-        "id": row[0],
-        "username": row[1],
-        "password_hash": row[2],
-        "role": row[3],
-        "created_at": row[4],
-    }
+    return _user_from_row(row)
+
+def set_user_role(conn, username: str, role: str) -> bool:
+    """
+    Changes a user's role and revokes the tokens issued under the old one.
+    Returns True if the user exists.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE users SET role = %s, token_version = token_version + 1 WHERE username = %s",
+        (role, username),
+    )
+    conn.commit()
+    forget_user(username)
+    return cursor.rowcount > 0
+
+def revoke_user_tokens(conn, username: str) -> bool:
+    """
+    Invalidates every token issued to the user so far.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE users SET token_version = token_version + 1 WHERE username = %s",
+        (username,),
+    )
+    conn.commit()
+    forget_user(username)
+    return cursor.rowcount > 0
 
 def authenticate_user(conn, username: str, password: str):
+    """
+    Returns the user if the password matches, else None. A hash made with
+    an outdated bcrypt cost is replaced while the password is at hand.
+    """
     user = get_user_by_username(conn, username)
     if user is None:
         return None
     password_hash = _row_field(user, "password_hash", 2)
-    if not verify_password(password, password_hash):
+    valid, new_hash = verify_and_rehash(password, password_hash)
+    if not valid:
         return None
+    if new_hash:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s",
+            (new_hash, _row_field(user, "id", 0), password_hash),
+        )
+        conn.commit()
     return user
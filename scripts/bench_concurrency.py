@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+# Measures API throughput under concurrent clients.
+# Start the API first (uvicorn main:app), then run e.g.:
+#   python3 scripts/bench_concurrency.py --username recruiter --password seemyproject
+
+DEFAULT_PATHS = [
+    "/players/",
+    "/games/",
+    "/analytics/players",
+    "/analytics/team/totals",
+]
+
+
+async def _login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    r = await client.post(
+        "/auth/token",
+        data={"username": username, "password": password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def _worker(client, paths, headers, deadline, counts):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        try:
+            r = await client.get(path, headers=headers)
+            key = "ok" if r.status_code < 400 else "errors"
+        except httpx.HTTPError:
+            key = "errors"
+        counts[key] += 1
+
+
+async def run_level(base_url, token, paths, concurrency, duration) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    counts = {"ok": 0, "errors": 0}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(
+            *[_worker(client, paths, headers, deadline, counts) for _ in range(concurrency)]
+        )
+        elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": counts["ok"] + counts["errors"],
+        "errors": counts["errors"],
+        "rps": round(counts["ok"] / elapsed, 1),
+    }
+
+
+async def main_async(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        token = await _login(client, args.username, args.password)
+
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>9}")
+    for level in args.concurrency:
+        result = await run_level(args.base_url, token, args.paths, level, args.duration)
+        print(f"{result['concurrency']:>8} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-client throughput benchmark for the CDB API.")
+    parser.add_argument("--base-url", default=os.getenv("CDB_API_URL", "http://localhost:8000"))
+    parser.add_argument("--username", default=os.getenv("CDB_BENCH_USER", "recruiter"))
+    parser.add_argument("--password", default=os.getenv("CDB_BENCH_PASSWORD", ""))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency level")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    args = parser.parse_args()
+    if not args.password:
+        print("Pass --password or set CDB_BENCH_PASSWORD.")
+        sys.exit(1)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import gzip
+import json
+import random
+import time
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from app.api.responses import dumps
+from app.services.analytics_service import LEADER_METRICS, PLAYER_ANALYTICS_COLUMNS
+
+# Compares the old and new /analytics/players encodings on a synthetic
+# season payload (rows shaped like the service's, NUMERIC values as
+# Decimal), without a database or a server:
+#   old: [dict(r) for r in rows] -> jsonable_encoder -> json.dumps
+#   new: orjson.dumps(rows) (app.api.responses.dumps)
+# e.g. python3 scripts/bench_serialization.py --players 600
+
+
+def season_rows(players: int, games: int) -> list:
+    rng = random.Random(7)
+    rows = []
+    for player_id in range(1, players + 1):
+        gp = rng.randint(0, games)
+        row = {
+            "player_id": player_id,
+            "name": f"Player {player_id}",
+            "jersey_number": rng.randint(0, 99),
+            "position": rng.choice(("G", "F", "C")),
+        }
+        for column in PLAYER_ANALYTICS_COLUMNS:
+            if column == "gp":
+                row[column] = gp
+                continue
+            kind, _, stat = column.partition("_")
+            total = Decimal(rng.randint(0, 40 * gp)) if stat != "minutes" else Decimal(rng.randint(0, 3600 * gp)) / 100
+            if kind == "total":
+                row[column] = total
+            else:
+                places = Decimal("0.01") if stat == "minutes" else Decimal("0.1")
+                row[column] = (total / gp).quantize(places) if gp else Decimal(0)
+        rows.append(row)
+    return rows
+
+
+def encode_old(rows) -> bytes:
+    # Starlette's JSONResponse.render after FastAPI's jsonable_encoder.
+    content = jsonable_encoder([dict(r) for r in rows])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def encode_new(rows) -> bytes:
+    return dumps(rows)
+
+
+def _time(fn, rows, repeat: int) -> float:
+    fn(rows)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Old vs new JSON encoding of /analytics/players.")
+    parser.add_argument("--players", type=int, default=600)
+    parser.add_argument("--games", type=int, default=len(LEADER_METRICS) * 5)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = season_rows(args.players, args.games)
+    old_body, new_body = encode_old(rows), encode_new(rows)
+    if json.loads(old_body) != json.loads(new_body):
+        raise SystemExit("encodings disagree")
+
+    old_ms = _time(encode_old, rows, args.repeat)
+    new_ms = _time(encode_new, rows, args.repeat)
+    print(f"{len(rows)} players x {len(rows[0])} columns, {len(new_body):,} bytes")
+    print(f"{'encoder':<26} {'ms/response':>12}")
+    print(f"{'jsonable_encoder + json':<26} {old_ms:>12.2f}")
+    print(f"{'orjson':<26} {new_ms:>12.2f}   ({old_ms / new_ms:.1f}x)")
+
+    print(f"{'encoding':<26} {'bytes':>12} {'ms':>8}")
+    started = time.perf_counter()
+    gzipped = gzip.compress(new_body, compresslevel=GZIP_LEVEL)
+    print(f"{f'gzip (level {GZIP_LEVEL})':<26} {len(gzipped):>12,} {(time.perf_counter() - started) * 1000:>8.2f}")
+    if brotli is not None:
+        started = time.perf_counter()
+        compressed = brotli.compress(new_body, quality=BROTLI_QUALITY)
+        print(f"{f'br (quality {BROTLI_QUALITY})':<26} {len(compressed):>12,} {(time.perf_counter() - started) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
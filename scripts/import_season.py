@@ -0,0 +1,64 @@
+import argparse
+import sys
+import time
+
+from app.db.pool import create_pool
+from app.services.import_service import import_season
+
+# Loads a season from CSV or NDJSON files (see app/services/import_service.py
+# for the columns and merge rules), e.g.:
+#   python3 scripts/import_season.py --players players.csv --games games.csv \
+#       --stat-lines stat_lines.csv
+# Stat line files name the player (player_name, jersey_number) and the game
+# (date, opponent, location) instead of using IDs.
+
+
+def _progress(kind: str, rows: int, elapsed: float):
+    rate = rows / elapsed if elapsed > 0 else 0
+    print(f"\r{kind:<10} {rows:>12,} rows  {rate:>12,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load players, games and stat lines with COPY.")
+    parser.add_argument("--players", help="players file (name, jersey_number, position)")
+    parser.add_argument("--games", help="games file (date, opponent, location)")
+    parser.add_argument("--stat-lines", help="stat lines file (player_name, jersey_number, date, opponent, location, stats)")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="file format (default: from the extension)")
+    parser.add_argument("--create-missing", action="store_true", help="create players only named in stat lines")
+    parser.add_argument(
+        "--keep-triggers",
+        action="store_true",
+        help="maintain running aggregates per row instead of rebuilding them after the merge",
+    )
+    args = parser.parse_args()
+    if not (args.players or args.games or args.stat_lines):
+        parser.error("give at least one of --players, --games, --stat-lines")
+
+    with create_pool(name="cdb-import", min_size=1, max_size=1) as pool:
+        with pool.connection() as conn:
+            started = time.perf_counter()
+            try:
+                result = import_season(
+                    conn,
+                    players=args.players,
+                    games=args.games,
+                    stat_lines=args.stat_lines,
+                    fmt=args.format,
+                    create_missing=args.create_missing,
+                    defer_aggregates=not args.keep_triggers,
+                    progress=_progress,
+                )
+            except ValueError as exc:
+                print(f"\nimport failed, nothing written: {exc}", file=sys.stderr)
+                sys.exit(1)
+            elapsed = time.perf_counter() - started
+
+    print(file=sys.stderr)
+    for key, value in result.items():
+        print(f"{key:<22} {value:>12,.2f}" if isinstance(value, float) else f"{key:<22} {value:>12,}")
+    staged = result.get("stat_lines_staged", 0)
+    print(f"imported in {elapsed:.2f}s ({staged / elapsed:,.0f} stat lines/s)")
+
+
+if __name__ == "__main__":
+    main()
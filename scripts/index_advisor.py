@@ -0,0 +1,180 @@
+import argparse
+import sys
+
+import psycopg
+
+from app.db.connect import DATABASE_URL
+from app.db.migrations import migrate_add_access_path_indexes, migrate_create_running_aggregates, migrate_create_season_aggregates
+from app.db.schema import init_db
+from app.db.statements import registered
+from app.services import (  # noqa: F401  importing registers their statements
+    analytics_service,
+    player_service,
+    player_stats_service,
+    stat_service,
+    team_stats_service,
+)
+from app.services.analytics_service import LEADER_METRICS
+
+# Runs EXPLAIN on every registered service query against a synthetic season
+# built in a scratch schema, and flags sequential scans on tables above a
+# row threshold. Exits 1 when anything is flagged. Example:
+#   python3 scripts/index_advisor.py --seasons 3 --min-rows 1000
+
+SCHEMA = "cdb_index_advisor"
+
+OPPONENTS = [
+    "Bears", "Bulldogs", "Cardinals", "Cougars", "Eagles", "Falcons", "Hawks",
+    "Hornets", "Huskies", "Knights", "Lions", "Panthers", "Pirates", "Raiders",
+    "Rams", "Spartans", "Tigers", "Titans", "Vikings", "Wildcats",
+]
+
+
+def seed_synthetic_season(cursor, players: int, games: int, seasons: int):
+    """
+    Fills players, games and stat_line with random box scores.
+    About one line in six is a DNP (minutes = 0).
+    """
+    cursor.execute(
+        """
+        INSERT INTO players (name, jersey_number, position)
+        SELECT 'Player ' || n, n, (ARRAY['G', 'F', 'C'])[1 + n %% 3]
+        FROM generate_series(1, %s) AS n
+        """,
+        (players,),
+    )
+    cursor.execute(
+        """
+        INSERT INTO games (date, opponent, location)
+        SELECT DATE '2000-11-01' + n,
+               (%s::text[])[1 + n %% array_length(%s::text[], 1)],
+               CASE WHEN n %% 2 = 0 THEN 'Home' ELSE 'Away' END
+        FROM generate_series(1, %s) AS n
+        """,
+        (OPPONENTS, OPPONENTS, games * seasons),
+    )
+    cursor.execute(
+        """
+        INSERT INTO stat_line (
+            player_id, game_id, minutes, points, rebounds, OREB, assists, steals,
+            blocks, turnovers, fouls, FG, FGA, FG3, FGA3, FT, FTA, PM, starter
+        )
+        SELECT p.id, g.id,
+               CASE WHEN random() < 0.16 THEN 0 ELSE round((random() * 36)::numeric, 3) END,
+               (random() * 25)::int, (random() * 10)::int, (random() * 4)::int,
+               (random() * 8)::int, (random() * 3)::int, (random() * 2)::int,
+               (random() * 4)::int, (random() * 5)::int, (random() * 10)::int,
+               (random() * 20)::int, (random() * 4)::int, (random() * 9)::int,
+               (random() * 6)::int, (random() * 8)::int, (random() * 30)::int - 15,
+               (random() < 0.4)::int
+        FROM players p
+        CROSS JOIN games g
+        """
+    )
+
+
+def sample_params(cursor) -> dict:
+    cursor.execute("SELECT min(id) + (max(id) - min(id)) / 2 FROM players")
+    player_id = cursor.fetchone()[0]
+    cursor.execute("SELECT min(id) + (max(id) - min(id)) / 2 FROM games")
+    game_id = cursor.fetchone()[0]
+    return {
+        "player_id": player_id,
+        "game_id": game_id,
+        "limit": 5,
+        "start": None,
+        "end": None,
+        "after_key": None,
+        "after_id": None,
+        "metrics": list(LEADER_METRICS),
+        "scopes": ["global"],
+    }
+
+
+def _scan_nodes(plan: dict):
+    if "Relation Name" in plan:
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from _scan_nodes(child)
+
+
+def _describe(node: dict) -> str:
+    if node.get("Index Name"):
+        return f"{node['Node Type']} {node['Index Name']}"
+    return f"{node['Node Type']} {node['Relation Name']}"
+
+
+def table_rows(cursor) -> dict:
+    cursor.execute(
+        """
+        SELECT c.relname, c.reltuples::bigint
+        FROM pg_class c
+        WHERE c.relnamespace = current_schema()::regnamespace
+            AND c.relkind = 'r'
+        """
+    )
+    return dict(cursor.fetchall())
+
+
+def advise(cursor, min_rows: int) -> list:
+    """
+    Returns (statement, scans, flagged tables) for every registered statement.
+    """
+    params_by_name = sample_params(cursor)
+    rows_by_table = table_rows(cursor)
+    report = []
+    for name, (sql, param_names) in sorted(registered().items()):
+        params = tuple(params_by_name[p] for p in param_names)
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0][0]["Plan"]
+        nodes = list(_scan_nodes(plan))
+        flagged = sorted({
+            node["Relation Name"]
+            for node in nodes
+            if node["Node Type"] == "Seq Scan"
+            and rows_by_table.get(node["Relation Name"], 0) >= min_rows
+        })
+        report.append((name, [_describe(n) for n in nodes], flagged))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag sequential scans in service queries on a synthetic season.")
+    parser.add_argument("--players", type=int, default=15)
+    parser.add_argument("--games", type=int, default=82, help="games per season")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--min-rows", type=int, default=1000, help="only flag seq scans on tables at least this big")
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+    if not DATABASE_URL:
+        print("DATABASE_URL is not set.")
+        sys.exit(1)
+
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        try:
+            init_db(conn)
+            seed_synthetic_season(cursor, args.players, args.games, args.seasons)
+            migrate_add_access_path_indexes(conn)
+            migrate_create_season_aggregates(conn)
+            migrate_create_running_aggregates(conn)
+            cursor.execute("VACUUM ANALYZE players, games, stat_line, player_aggregates, game_team_totals")
+            report = advise(cursor, args.min_rows)
+        finally:
+            if not args.keep:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+    flagged_count = 0
+    for name, scans, flagged in report:
+        marker = "SEQ SCAN " + ", ".join(flagged) if flagged else "ok"
+        flagged_count += bool(flagged)
+        print(f"{name:<28} {marker:<28} {'; '.join(scans)}")
+    print(f"\n{len(report)} statements, {flagged_count} flagged (tables >= {args.min_rows} rows)")
+    sys.exit(1 if flagged_count else 0)
+
+
+if __name__ == "__main__":
+    main()
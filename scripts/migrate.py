@@ -1,13 +1,18 @@
-from app.db.connect import get_connection
-from app.db.migrations import migrate_games_add_unique, migrate_stat_line_add_shooting_columns, migrate_stat_line_minutes_to_numeric
+from app.db.pool import create_pool
+from app.db.migrations import migrate_add_access_path_indexes, migrate_create_running_aggregates, migrate_create_season_aggregates, migrate_games_add_unique, migrate_games_date_to_date, migrate_stat_line_add_shooting_columns, migrate_stat_line_minutes_to_numeric, migrate_users_add_token_version
 
 def main():
-    conn = get_connection()
-    migrate_games_add_unique(conn)
-    migrate_stat_line_add_shooting_columns(conn)
-    migrate_stat_line_minutes_to_numeric(conn)
-    conn.close()
-    print("Migration complete: games unique + stat_line shooting columns")
+    with create_pool(name="cdb-migrate", min_size=1, max_size=1) as pool:
+        with pool.connection() as conn:
+            migrate_games_add_unique(conn)
+            migrate_stat_line_add_shooting_columns(conn)
+            migrate_stat_line_minutes_to_numeric(conn)
+            migrate_games_date_to_date(conn)
+            migrate_users_add_token_version(conn)
+            migrate_add_access_path_indexes(conn)
+            migrate_create_season_aggregates(conn)
+            migrate_create_running_aggregates(conn)
+    print("Migration complete: games unique + stat_line shooting columns + games.date DATE + users.token_version + access path indexes + season aggregates + running aggregates")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import sys
+
+import psycopg
+from fastapi import Response
+
+from app.api import analytics, players
+from app.api.deps import DateRange
+from app.db import batch
+from app.db.connect import DATABASE_URL
+from app.db.statements import track_round_trips
+from app.services import result_cache
+from app.services.aio import stat_service
+
+# Reports database round trips per request for the multi-query routes,
+# with statement batching off (one round trip per statement) and on
+# (pipelined). Run against a seeded database, e.g.:
+#   python3 scripts/roundtrip_report.py --player-id 1
+
+
+def _routes(player_id: int):
+    window = DateRange(None, None)
+    return [
+        (f"/players/{player_id}/game-log", lambda conn: stat_service.get_player_game_log(conn, player_id)),
+        (f"/players/{player_id}/totals", lambda conn: players.player_totals(player_id, window, conn)),
+        (f"/players/{player_id}/averages", lambda conn: players.player_averages(player_id, window, conn)),
+        (f"/players/{player_id}/splits/totals", lambda conn: players.player_splits_totals(player_id, window, conn, None)),
+        (f"/players/{player_id}/splits/averages", lambda conn: players.player_splits_averages(player_id, window, conn, None)),
+        (f"/players/{player_id}/dashboard", lambda conn: players.player_dashboard(player_id, None, window, conn)),
+        ("/analytics/team/splits/totals", lambda conn: analytics.team_splits_totals(window, conn, None)),
+        ("/analytics/leaders", lambda conn: analytics.analytics_leaders(Response(), conn, 5, None)),
+    ]
+
+
+async def _measure(conn, handler, pipelined: bool) -> dict:
+    batch.PIPELINE_ENABLED = pipelined
+    with track_round_trips() as counter:
+        await handler(conn)
+    return counter
+
+
+async def main_async(args):
+    # Count what the database does, not what the result cache saves.
+    result_cache.CACHE_ENABLED = False
+    conn = await psycopg.AsyncConnection.connect(DATABASE_URL, autocommit=True)
+    try:
+        print(f"{'route':<36} {'statements':>10} {'before':>7} {'after':>6}")
+        for path, handler in _routes(args.player_id):
+            before = await _measure(conn, handler, pipelined=False)
+            after = await _measure(conn, handler, pipelined=True)
+            print(f"{path:<36} {after['statements']:>10} {before['round_trips']:>7} {after['round_trips']:>6}")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-route database round trips, sequential vs pipelined.")
+    parser.add_argument("--player-id", type=int, default=1)
+    args = parser.parse_args()
+    if not DATABASE_URL:
+        print("DATABASE_URL is not set.")
+        sys.exit(1)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
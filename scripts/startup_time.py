@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+# Measures cold start the way a spin-from-idle deployment sees it:
+#   import   a fresh interpreter importing app.api.app (median of --runs)
+#   serve    spawning uvicorn until the first response to --path, which
+#            includes the lifespan (pools, schema check); needs DATABASE_URL
+# --record appends the results as one JSON line, so runs can be compared
+# across commits. e.g.
+#   PYTHONPATH=. python3 scripts/startup_time.py --serve --record startup.jsonl
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.api.app; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def import_ms(runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], check=True, capture_output=True, text=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return round(statistics.median(times), 1)
+
+
+def first_response_ms(port: int, path: str, timeout: float) -> float:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api.app:app", "--port", str(port), "--log-level", "warning"],
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            if server.poll() is not None:
+                raise SystemExit(f"uvicorn exited with {server.returncode}")
+            try:
+                r = httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1)
+                if r.status_code < 500:
+                    return round((time.perf_counter() - started) * 1000, 1)
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise SystemExit(f"no response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _commit() -> str:
+    out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+    return out.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time to first response of the API.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn to its first response")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/openapi.json")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--record", help="append the results to this JSON lines file")
+    args = parser.parse_args()
+
+    result = {
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "import_ms": import_ms(args.runs),
+    }
+    print(f"{'import (median of ' + str(args.runs) + ')':<28} {result['import_ms']:>10.1f} ms")
+    if args.serve:
+        if not os.getenv("DATABASE_URL"):
+            raise SystemExit("--serve needs DATABASE_URL")
+        result["first_response_ms"] = first_response_ms(args.port, args.path, args.timeout)
+        print(f"{'spawn to first response':<28} {result['first_response_ms']:>10.1f} ms")
+
+    if args.record:
+        with open(args.record, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
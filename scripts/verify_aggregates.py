@@ -0,0 +1,62 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db.aggregates import AGGREGATE_TABLES, find_drift, rebuild_running_aggregates
+from app.db.pool import create_pool
+
+# Recomputes player_aggregates and game_team_totals from stat_line and
+# reports rows that drifted from the trigger-maintained values. Each table
+# is split into --workers key partitions checked on separate connections.
+#   python3 scripts/verify_aggregates.py --workers 4
+#   python3 scripts/verify_aggregates.py --rebuild   # recompute if drifted
+
+
+def _check(pool, table: str, workers: int, part: int) -> list:
+    with pool.connection() as conn:
+        return find_drift(conn, table, workers, part)
+
+
+def verify(pool, workers: int) -> dict:
+    """
+    Returns {table: drifted keys}.
+    """
+    jobs = [(table, part) for table in AGGREGATE_TABLES for part in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda job: _check(pool, job[0], workers, job[1]), jobs)
+        drift = {table: [] for table in AGGREGATE_TABLES}
+        for (table, _), keys in zip(jobs, results):
+            drift[table].extend(keys)
+    return {table: sorted(keys) for table, keys in drift.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify (and optionally rebuild) the running aggregate tables.")
+    parser.add_argument("--workers", type=int, default=4, help="parallel connections")
+    parser.add_argument("--rebuild", action="store_true", help="recompute both tables if any drift is found")
+    args = parser.parse_args()
+    workers = max(args.workers, 1)
+
+    with create_pool(name="cdb-verify-aggregates", min_size=workers, max_size=workers) as pool:
+        started = time.perf_counter()
+        drift = verify(pool, workers)
+        elapsed = time.perf_counter() - started
+
+        drifted = sum(len(keys) for keys in drift.values())
+        for table, keys in drift.items():
+            sample = ", ".join(map(str, keys[:10])) + (" ..." if len(keys) > 10 else "")
+            print(f"{table:<20} {len(keys):>6} drifted" + (f"  [{sample}]" if keys else ""))
+        print(f"verified in {elapsed:.2f}s with {workers} workers")
+
+        if drifted and args.rebuild:
+            with pool.connection() as conn:
+                rebuild_running_aggregates(conn)
+            print("rebuilt player_aggregates and game_team_totals from stat_line")
+            return
+
+    sys.exit(1 if drifted else 0)
+
+
+if __name__ == "__main__":
+    main()
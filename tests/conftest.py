@@ -1,7 +1,17 @@
+import os
 import sqlite3
+from contextlib import asynccontextmanager, contextmanager
+from types import SimpleNamespace
+
+import psycopg
 import pytest
+from psycopg.pq import TransactionStatus
+
+from app.db.migrations import migrate_create_running_aggregates, migrate_create_season_aggregates
 from app.db.schema import init_db
 
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
 @pytest.fixture
 def db_conn():
     """
@@ -12,4 +22,217 @@ def db_conn():
     conn.execute("PRAGMA foreign_keys = ON;")
     init_db(conn)
     yield conn
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+
+@pytest.fixture
+def pg_url():
+    """
+    TEST_DATABASE_URL with the schema and aggregates created and every
+    table emptied. Skips when it isn't set or can't be reached; the
+    database is wiped, so never point it at real data.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    try:
+        conn = psycopg.connect(TEST_DATABASE_URL)
+    except psycopg.OperationalError as e:
+        pytest.skip(f"no Postgres at TEST_DATABASE_URL: {e}")
+    with conn:
+        init_db(conn)
+        migrate_create_season_aggregates(conn)
+        migrate_create_running_aggregates(conn)
+        # DELETE, not TRUNCATE ... CASCADE: stat_line's truncate trigger
+        # can't truncate the aggregate tables inside the same TRUNCATE.
+        for table in ("stat_line", "games", "players", "data_versions"):
+            conn.execute(f"DELETE FROM {table}")
+        for table in ("stat_line", "games", "players"):
+            conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), 1, false)")
+        conn.commit()
+    return TEST_DATABASE_URL
+
+
+class FakeCopy:
+    def __init__(self, sql):
+        self.sql = sql
+        self.rows = []
+        self.chunks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write_row(self, row):
+        self.rows.append(row)
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+
+
+class FakeCursor:
+    """
+    Async cursor of a FakeConn. Each execute() is recorded on the
+    connection and answered with its next scripted result (a list of rows,
+    or an exception to raise).
+    """
+
+    def __init__(self, conn, name=None):
+        self.connection = conn
+        self.name = name
+        self.description = conn.description
+        self.rowcount = conn.rowcount
+        self.result_sets = []
+
+    def _record(self, sql, params, prepare=None):
+        self.connection.executed.append((sql, params))
+        if prepare:
+            self.connection.prepared.append(sql)
+
+    def _result(self):
+        results = self.connection.results
+        result = results.pop(0) if results else []
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _next_rows(self, size=None):
+        if size is not None:
+            self.connection.fetches.append(size)
+        if not self.result_sets:
+            return []
+        rows = self.result_sets[0]
+        if size is None:
+            return rows
+        batch, self.result_sets[0] = rows[:size], rows[size:]
+        return batch
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None, prepare=None):
+        self._record(sql, params, prepare)
+        self.result_sets = [self._result()]
+        return self
+
+    async def executemany(self, sql, params_seq, returning=False):
+        self._record(sql, params_seq)
+        self.result_sets = [self._result() for _ in params_seq]
+
+    async def fetchone(self):
+        rows = self._next_rows()
+        return rows[0] if rows else None
+
+    async def fetchall(self):
+        return self._next_rows()
+
+    async def fetchmany(self, size):
+        return self._next_rows(size)
+
+    def nextset(self):
+        self.result_sets.pop(0)
+        return True if self.result_sets else None
+
+
+class FakeSyncCursor(FakeCursor):
+    def execute(self, sql, params=None, prepare=None):
+        self._record(sql, params, prepare)
+        self.result_sets = [self._result()]
+        return self
+
+    def fetchone(self):
+        rows = self._next_rows()
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        return self._next_rows()
+
+    def copy(self, sql):
+        self.connection.copies.append(FakeCopy(sql))
+        return self.connection.copies[-1]
+
+
+class FakeConn:
+    """
+    Stands in for a psycopg AsyncConnection: scripted results, and a
+    record of statements, cursors, transactions and pipelines.
+    """
+
+    cursor_class = FakeCursor
+
+    def __init__(self, results=(), description=None, rowcount=1):
+        self.results = list(results)
+        self.description = description
+        self.rowcount = rowcount
+        self.closed = False
+        self.info = SimpleNamespace(backend_pid=1, transaction_status=TransactionStatus.IDLE)
+        self.executed = []
+        self.prepared = []
+        self.fetches = []
+        self.copies = []
+        self.cursor_names = []
+        self.transactions = 0
+        self.pipelines = 0
+        self.commits = 0
+        self.rolled_back = False
+
+    def cursor(self, name=None, row_factory=None):
+        self.cursor_names.append(name)
+        return self.cursor_class(self, name)
+
+    @property
+    def statements(self) -> list:
+        return [sql for sql, _ in self.executed]
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rolled_back = True
+        self.info.transaction_status = TransactionStatus.IDLE
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    @asynccontextmanager
+    async def pipeline(self):
+        self.pipelines += 1
+        yield
+
+
+class FakeSyncConn(FakeConn):
+    """
+    FakeConn for the synchronous psycopg API.
+    """
+
+    cursor_class = FakeSyncCursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rolled_back = True
+        self.info.transaction_status = TransactionStatus.IDLE
+
+    @contextmanager
+    def transaction(self):
+        self.transactions += 1
+        yield
+
+
+@pytest.fixture
+def fake_conn():
+    """
+    Returns a FakeConn factory: fake_conn(results, description=...,
+    rowcount=..., sync=False).
+    """
+    def make(results=(), description=None, rowcount=1, sync=False):
+        return (FakeSyncConn if sync else FakeConn)(results, description, rowcount)
+
+    return make
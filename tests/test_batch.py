@@ -0,0 +1,49 @@
+import asyncio
+
+from app.db import batch, statements
+from app.db.batch import Query, run_batch
+
+
+async def _first_value(cursors):
+    return [(await c.fetchone())[0] for c in cursors]
+
+
+def _query(*values):
+    name = statements.register("test_batch_value", "SELECT %s")
+    return Query(tuple((name, (v,)) for v in values), _first_value)
+
+
+def _run(conn, *queries):
+    with statements.track_round_trips() as counter:
+        results = asyncio.run(run_batch(conn, *queries))
+    return results, counter
+
+def test_run_batch_pipelines_queries_into_one_round_trip(monkeypatch, fake_conn):
+    monkeypatch.setattr(batch, "PIPELINE_ENABLED", True)
+    conn = fake_conn([[(1,)], [(2,)], [(3,)]], description=[("value",)])
+
+    results, counter = _run(conn, _query(1), _query(2, 3))
+
+    assert results == [[1], [2, 3]]
+    assert conn.pipelines == 1
+    assert counter == {"statements": 3, "round_trips": 1}
+
+def test_run_batch_sequential_when_disabled(monkeypatch, fake_conn):
+    monkeypatch.setattr(batch, "PIPELINE_ENABLED", False)
+    conn = fake_conn([[(1,)], [(2,)], [(3,)]], description=[("value",)])
+
+    results, counter = _run(conn, _query(1), _query(2, 3))
+
+    assert results == [[1], [2, 3]]
+    assert conn.pipelines == 0
+    assert counter == {"statements": 3, "round_trips": 3}
+
+def test_single_statement_skips_pipeline(monkeypatch, fake_conn):
+    monkeypatch.setattr(batch, "PIPELINE_ENABLED", True)
+    conn = fake_conn([[(7,)]], description=[("value",)])
+
+    results, counter = _run(conn, _query(7))
+
+    assert results == [[7]]
+    assert conn.pipelines == 0
+    assert counter["round_trips"] == 1
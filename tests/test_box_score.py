@@ -0,0 +1,92 @@
+import asyncio
+
+import psycopg
+import pytest
+
+from app.services.aio import stat_service
+from app.services.stat_service import BOX_SCORE_UPSERT_SQL, DELETE_MISSING_LINES_SQL, validate_box_score
+
+
+def test_validate_box_score_reports_every_problem():
+    lines = [
+        {"player_id": 1, "FG": 5, "FGA": 4},
+        {"player_id": 2, "points": -2, "PM": -7},
+        {"player_id": 1},
+    ]
+
+    assert validate_box_score(lines) == [
+        "line 0: FG exceeds FGA",
+        "line 1: points is negative",
+        "line 2: duplicate player 1",
+    ]
+
+
+@pytest.fixture()
+def quiet_writes(monkeypatch):
+    bumped = []
+
+    async def fake_bump(conn, player_ids=(), game_ids=()):
+        bumped.append((sorted(player_ids), list(game_ids)))
+
+    monkeypatch.setattr(stat_service, "abump_versions", fake_bump)
+    monkeypatch.setattr(stat_service, "invalidate_stat_lines", lambda *a: None)
+    monkeypatch.setattr(stat_service, "schedule_season_refresh", lambda: None)
+    return bumped
+
+
+def test_box_score_is_one_transaction_and_reports_changes(quiet_writes, fake_conn):
+    # game lock, unknown players, one result per upserted line, delete.
+    conn = fake_conn([[(9,)], [], [(1, True)], [(2, False)], [], [(4,)]])
+    lines = [{"player_id": 1}, {"player_id": 2, "points": 3}, {"player_id": 3}]
+
+    report = asyncio.run(stat_service.save_box_score(conn, 9, lines, delete_missing=True))
+
+    assert conn.transactions == 1
+    assert conn.statements.count(BOX_SCORE_UPSERT_SQL) == 1
+    assert conn.statements[-1] == DELETE_MISSING_LINES_SQL
+    assert report == {"game_id": 9, "inserted": [1], "updated": [2], "unchanged": [3], "deleted": [4]}
+    assert quiet_writes == [([1, 2, 4], [9])]
+
+
+def test_box_score_rejects_unknown_players_and_missing_games(quiet_writes, fake_conn):
+    with pytest.raises(ValueError, match="unknown players: 5"):
+        asyncio.run(stat_service.save_box_score(fake_conn([[(9,)], [(5,)]]), 9, [{"player_id": 5}]))
+
+    assert asyncio.run(stat_service.save_box_score(fake_conn([[]]), 9, [{"player_id": 5}])) is None
+    assert quiet_writes == []
+
+
+def test_missing_stat_line_edits_bump_nothing(quiet_writes, fake_conn):
+    conn = fake_conn(rowcount=0)
+
+    assert asyncio.run(stat_service.update_statline(conn, 1, 9, points=3)) is False
+    assert asyncio.run(stat_service.delete_statline(conn, 1, 9)) is False
+    assert quiet_writes == []
+
+
+def test_box_score_upsert_against_postgres(pg_url, monkeypatch):
+    monkeypatch.setattr(stat_service, "schedule_season_refresh", lambda: None)
+    with psycopg.connect(pg_url) as setup:
+        setup.execute("INSERT INTO players (name) VALUES ('A'), ('B'), ('C')")
+        setup.execute("INSERT INTO games (date, opponent) VALUES ('2024-01-05', 'Duke')")
+
+    async def scenario():
+        async with await psycopg.AsyncConnection.connect(pg_url, autocommit=True) as conn:
+            first = await stat_service.save_box_score(conn, 1, [{"player_id": 1, "points": 10}, {"player_id": 2}])
+            second = await stat_service.save_box_score(
+                conn, 1, [{"player_id": 1, "points": 10}, {"player_id": 3, "FG": 2, "FGA": 3}], delete_missing=True
+            )
+            third = await stat_service.save_box_score(conn, 1, [{"player_id": 1, "points": 12}])
+            cursor = conn.cursor()
+            await cursor.execute("SELECT player_id, points, FG FROM stat_line ORDER BY player_id")
+            lines = await cursor.fetchall()
+            await cursor.execute("SELECT version FROM data_versions WHERE scope = 'game:1'")
+            return first, second, third, lines, (await cursor.fetchone())[0]
+
+    first, second, third, lines, version = asyncio.run(scenario())
+
+    assert first == {"game_id": 1, "inserted": [1, 2], "updated": [], "unchanged": [], "deleted": []}
+    assert second == {"game_id": 1, "inserted": [3], "updated": [], "unchanged": [1], "deleted": [2]}
+    assert third == {"game_id": 1, "inserted": [], "updated": [1], "unchanged": [], "deleted": []}
+    assert lines == [(1, 12, 0), (3, 0, 2)]
+    assert version == 3
@@ -0,0 +1,52 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_db
+from app.api.etag import PLAYER, conditional, etag_matches, make_etag
+
+
+def _client(conn, calls):
+    app = FastAPI()
+
+    async def override_get_db():
+        yield conn
+
+    @app.get("/players/{player_id}/totals", dependencies=[conditional(PLAYER)])
+    async def totals(player_id: int, conn=Depends(get_db)):
+        calls.append(player_id)
+        return {"points": 10}
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+def test_etag_changes_with_versions_and_query():
+    base = make_etag("/players/7/totals", "", {"player:7": 3})
+    assert base.startswith('W/"')
+    assert make_etag("/players/7/totals", "", {"player:7": 4}) != base
+    assert make_etag("/players/7/totals", "start=2026-01-01", {"player:7": 3}) != base
+
+def test_etag_matches_lists_weak_and_wildcard():
+    assert etag_matches('"abc", W/"def"', 'W/"def"')
+    assert etag_matches("*", 'W/"def"')
+    assert not etag_matches('W/"abc"', 'W/"def"')
+    assert not etag_matches(None, 'W/"def"')
+
+def test_matching_if_none_match_returns_304_without_running_route(fake_conn):
+    # One data_versions read per request.
+    conn, calls = fake_conn([[("player:7", 3)], [("player:7", 3)], [("player:7", 4)]]), []
+    client = _client(conn, calls)
+
+    first = client.get("/players/7/totals")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    etag = first.headers["etag"]
+
+    again = client.get("/players/7/totals", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert calls == [7]
+    assert conn.executed[-1][1] == (["player:7"],)
+
+    changed = client.get("/players/7/totals", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
@@ -0,0 +1,45 @@
+import asyncio
+import gzip
+from datetime import date
+from decimal import Decimal
+
+from app.api.compression import negotiate_encoding
+from app.services.aio.export_service import gzip_chunks, stream_export
+from app.services.export_service import EXPORTS, encode_rows, export_params
+
+
+def test_rows_encode_as_csv_and_ndjson():
+    rows = [(1, date(2024, 1, 5), Decimal("31.500"), Decimal("12"), "Home, Court")]
+    cols = ["id", "date", "minutes", "points", "location"]
+
+    assert encode_rows("csv", cols, rows) == b'1,2024-01-05,31.500,12,"Home, Court"\n'
+    assert encode_rows("ndjson", cols, rows) == (
+        b'{"id":1,"date":"2024-01-05","minutes":31.5,"points":12,"location":"Home, Court"}\n'
+    )
+
+
+def test_exports_negotiate_gzip_like_responses():
+    def accepts_gzip(accept_encoding):
+        return negotiate_encoding(accept_encoding, ("gzip",)) == "gzip"
+
+    assert accepts_gzip("br, gzip;q=0.8")
+    assert accepts_gzip("*;q=0, gzip")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip;q=x")
+    assert not accepts_gzip(None)
+
+
+def test_export_streams_batches_from_a_named_cursor(fake_conn):
+    conn = fake_conn([[(i, i * 2) for i in range(5)]], description=[("id",), ("oreb",)])
+    params = export_params("stat_lines", player_id=3)
+
+    async def collect():
+        return [chunk async for chunk in gzip_chunks(stream_export(conn, "stat_lines", params, "csv", batch_rows=2))]
+
+    chunks = asyncio.run(collect())
+
+    assert conn.cursor_names == ["export_stat_lines"]
+    assert conn.transactions == 1
+    assert conn.executed == [(EXPORTS["stat_lines"], (3, 3, None, None, None, None))]
+    assert conn.fetches == [2, 2, 2, 2]
+    assert gzip.decompress(b"".join(chunks)) == b"id,OREB\n0,0\n1,2\n2,4\n3,6\n4,8\n"
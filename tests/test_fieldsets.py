@@ -0,0 +1,55 @@
+import pytest
+
+from app.db import fieldsets
+from app.db.fieldsets import parse_fields
+from app.db.statements import AdHoc, get_sql, registered
+from app.services.analytics_service import PLAYER_ANALYTICS_COLUMNS, player_analytics_pager
+from app.services.player_stats_service import STAT_COLUMNS, player_splits_statement
+from app.services.stat_service import GAME_LOG_FIELDS, GAME_LOG_PAGER, game_log_pager
+
+
+def test_fields_are_validated_and_put_in_column_order():
+    assert parse_fields(None, STAT_COLUMNS) is None
+    assert parse_fields("oreb, points,points", STAT_COLUMNS) == ("points", "OREB")
+    with pytest.raises(ValueError, match="unknown fields: starter"):
+        parse_fields("points,starter", GAME_LOG_FIELDS)
+
+
+def test_splits_compute_only_the_requested_columns():
+    statement = player_splits_statement(("points", "FG"))
+    sql = get_sql(statement)
+
+    assert statement == player_splits_statement(("points", "FG"))
+    assert "AS total_points" in sql and "AS avg_FG" in sql
+    assert "rebounds" not in sql
+    assert player_splits_statement(None) == "player_splits"
+
+
+def test_pagers_always_select_the_sort_key():
+    assert game_log_pager(None) is GAME_LOG_PAGER
+    pager = game_log_pager(("rebounds",), "-points")
+    assert set(pager.sorts) == {"date", "points"}
+    assert "COALESCE(s.points, 0) AS points" in pager.base_sql
+    assert "s.minutes" not in pager.base_sql
+
+    pager = player_analytics_pager(("avg_FG",))
+    assert set(pager.sorts) == {"points", "name"}
+    assert "total_points" in pager.base_sql and "total_rebounds" not in pager.base_sql
+    with pytest.raises(ValueError):
+        pager.statement((), "rebounds", None, 10)
+    assert len(PLAYER_ANALYTICS_COLUMNS) == 33
+
+
+def test_projections_are_ad_hoc_and_bounded(monkeypatch):
+    monkeypatch.setattr(fieldsets, "_PROJECTIONS", type(fieldsets._PROJECTIONS)())
+    monkeypatch.setattr(fieldsets, "FIELDSET_CACHE_SIZE", 2)
+
+    statement = player_splits_statement(("points",))
+    pager = player_analytics_pager(("avg_FG",))
+    assert isinstance(statement, AdHoc) and statement not in registered()
+    assert all(isinstance(name, AdHoc) for name in pager.statements.values())
+
+    assert player_splits_statement(("points",)) is statement
+    player_splits_statement(("FG",))
+    assert len(fieldsets._PROJECTIONS) == 2
+    assert player_analytics_pager(("avg_FG",)) is not pager
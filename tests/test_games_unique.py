@@ -1,3 +1,10 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import date_range
+from app.api.models import GameCreate, GameOut
 from app.services.game_service import create_game
 
 def test_create_game_duplicate_returns_none(db_conn):
@@ -5,4 +12,16 @@ def test_create_game_duplicate_returns_none(db_conn):
     assert g1 is not None
 
     g2 = create_game(db_conn, "2026-01-05", "Central High", "Home")
-    assert g2 is None
\ No newline at end of file
+    assert g2 is None
+
+def test_game_models_accept_iso_date_strings():
+    game = GameCreate(date="2026-01-05", opponent="Central High")
+    assert game.date == date(2026, 1, 5)
+    out = GameOut(id=1, date="2026-01-05", opponent="Central High")
+    assert out.model_dump(mode="json")["date"] == "2026-01-05"
+
+def test_date_range_rejects_inverted_window():
+    assert date_range(date(2026, 1, 1), None) == (date(2026, 1, 1), None)
+    with pytest.raises(HTTPException) as exc:
+        date_range(date(2026, 2, 1), date(2026, 1, 1))
+    assert exc.value.status_code == 422
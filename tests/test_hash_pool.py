@@ -0,0 +1,71 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from passlib.context import CryptContext
+
+from app.db import hash_pool
+from app.db.security import _prehash, verify_and_rehash
+
+
+@pytest.fixture()
+def thread_hashing(monkeypatch):
+    monkeypatch.setattr(hash_pool, "HASH_WORKERS", 0)
+    monkeypatch.setattr(hash_pool, "_executor", None)
+    monkeypatch.setattr(hash_pool, "_slots", None)
+    monkeypatch.setattr(hash_pool, "_stats", {"completed": 0, "rejected": 0, "in_flight": 0, "waiting": 0})
+
+
+def test_callers_past_the_cap_time_out(monkeypatch, thread_hashing):
+    monkeypatch.setattr(hash_pool, "HASH_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(hash_pool, "HASH_QUEUE_TIMEOUT", 0.05)
+
+    async def run():
+        return await asyncio.gather(
+            hash_pool._run(time.sleep, 0.3),
+            hash_pool._run(time.sleep, 0.3),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert results[0] is None
+    assert isinstance(results[1], hash_pool.HashingBusy)
+    assert hash_pool.hash_pool_stats()["rejected"] == 1
+
+def test_broken_pool_is_replaced_and_the_hash_retried(monkeypatch, thread_hashing):
+    class Pool:
+        def __init__(self, broken):
+            self.broken = broken
+            self.shut_down = False
+
+        def submit(self, func, *args):
+            if self.broken:
+                raise BrokenProcessPool("a worker died")
+            return ThreadPoolExecutor(1).submit(func, *args)
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    broken, fresh = Pool(True), Pool(False)
+    monkeypatch.setattr(hash_pool, "_executor", broken)
+    monkeypatch.setattr(hash_pool, "HASH_WORKERS", 1)
+    monkeypatch.setattr(hash_pool, "ProcessPoolExecutor", lambda **kw: fresh)
+
+    assert asyncio.run(hash_pool._run(len, "abc")) == 3
+    assert broken.shut_down is True
+    assert hash_pool._executor is fresh
+
+
+def test_verify_and_rehash_upgrades_other_cost():
+    cheap = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    old_hash = cheap.hash(_prehash("secret1"))
+
+    valid, new_hash = verify_and_rehash("secret1", old_hash)
+    assert valid is True
+    assert new_hash is not None and new_hash != old_hash
+
+    assert verify_and_rehash("secret1", new_hash) == (True, None)
+    assert verify_and_rehash("wrong", old_hash) == (False, None)
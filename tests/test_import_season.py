@@ -0,0 +1,86 @@
+import psycopg
+import pytest
+
+from app.db.aggregates import find_drift
+from app.services import import_service
+from app.services.import_service import STAT_LINE_COLUMNS, copy_columns, source_format, stage
+
+
+def test_source_format_and_header_checks():
+    assert source_format("season.CSV") == "csv"
+    assert source_format("season.jsonl") == "ndjson"
+    assert source_format("season.txt", "csv") == "csv"
+    with pytest.raises(ValueError, match="extension"):
+        source_format("season.txt")
+
+    header = ["Player_Name", "date", "opponent", "OREB"]
+    assert copy_columns(header, STAT_LINE_COLUMNS, ("player_name", "date"), "f.csv") == [
+        "player_name", "date", "opponent", "oreb",
+    ]
+    with pytest.raises(ValueError, match="unknown columns: dunks"):
+        copy_columns(["player_name", "dunks"], STAT_LINE_COLUMNS, (), "f.csv")
+    with pytest.raises(ValueError, match="missing columns: opponent"):
+        copy_columns(["player_name"], STAT_LINE_COLUMNS, ("player_name", "opponent"), "f.csv")
+
+
+def test_stage_streams_both_formats(tmp_path, fake_conn):
+    ndjson = tmp_path / "games.ndjson"
+    ndjson.write_text('{"date": "2024-01-05", "Opponent": "Duke"}\n\n{"date": "2024-01-09", "opponent": "Army", "location": "Home"}\n')
+    csv_file = tmp_path / "players.csv"
+    csv_file.write_text('Name,jersey_number\n"A\nA",3\nB,\n')
+    conn = fake_conn(rowcount=2, sync=True)
+    cursor = conn.cursor()
+    seen = []
+
+    assert stage(cursor, "games", str(ndjson), progress=lambda kind, rows, _: seen.append((kind, rows))) == 2
+    assert stage(cursor, "players", str(csv_file), progress=lambda kind, rows, _: seen.append((kind, rows))) == 2
+
+    games, players = conn.copies
+    assert games.rows == [["2024-01-05", "Duke", None], ["2024-01-09", "Army", "Home"]]
+    assert seen[-2:] == [("games", 2), ("players", 2)]
+    assert players.sql.startswith("COPY import_players (name, jersey_number) FROM STDIN WITH (FORMAT csv)")
+    assert b"".join(players.chunks) == b'"A\nA",3\nB,\n'
+    assert conn.statements == ["ANALYZE import_games", "ANALYZE import_players"]
+
+
+def test_ndjson_lines_missing_keys_are_rejected(tmp_path, fake_conn):
+    path = tmp_path / "games.ndjson"
+    path.write_text('{"date": "2024-01-05"}\n')
+    with pytest.raises(ValueError, match="missing opponent"):
+        import_service.stage(fake_conn(sync=True).cursor(), "games", str(path))
+
+
+def test_import_merges_into_existing_rows_against_postgres(pg_url, tmp_path):
+    players = tmp_path / "players.csv"
+    players.write_text("name,jersey_number,position\nA,3,G\nB,4,F\n")
+    games = tmp_path / "games.ndjson"
+    games.write_text('{"date": "2024-01-09", "opponent": "Army", "location": "Away"}\n')
+    lines = tmp_path / "stat_lines.csv"
+    lines.write_text(
+        "player_name,jersey_number,date,opponent,location,minutes,points\n"
+        "A,3,2024-01-05,Duke,Home,20,10\n"
+        "B,4,2024-01-09,Army,Away,15,4\n"
+        "A,3,2024-01-05,Duke,Home,22,12\n"
+        "C,,2024-01-09,Army,Away,5,2\n"
+    )
+    with psycopg.connect(pg_url, autocommit=True) as conn:
+        conn.execute("INSERT INTO players (name, jersey_number) VALUES ('A', 3)")
+        conn.execute("INSERT INTO games (date, opponent, location) VALUES ('2024-01-05', 'Duke', 'Home')")
+        conn.execute("INSERT INTO stat_line (player_id, game_id, points) VALUES (1, 1, 1)")
+        files = {"players": str(players), "games": str(games), "stat_lines": str(lines)}
+
+        with pytest.raises(ValueError, match=r"to add them\): C$"):
+            import_service.import_season(conn, **files)
+        assert conn.execute("SELECT count(*) FROM players").fetchone() == (1,)
+
+        result = import_service.import_season(conn, **files, create_missing=True)
+        again = import_service.import_season(conn, **files, create_missing=True)
+
+        assert result["stat_lines_staged"] == 4
+        assert (result["players_created"], result["games_created"]) == (2, 1)
+        assert (result["stat_lines_inserted"], result["stat_lines_updated"]) == (2, 1)
+        assert (again["stat_lines_inserted"], again["stat_lines_updated"], again["players_created"]) == (0, 0, 0)
+        assert conn.execute(
+            "SELECT p.name, p.position, s.minutes, s.points FROM stat_line s JOIN players p ON p.id = s.player_id ORDER BY 1"
+        ).fetchall() == [("A", "G", 22, 12), ("B", "F", 15, 4), ("C", None, 5, 2)]
+        assert find_drift(conn, "player_aggregates") == [] and find_drift(conn, "game_team_totals") == []
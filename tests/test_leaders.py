@@ -0,0 +1,59 @@
+import asyncio
+
+import psycopg
+import pytest
+
+from app.db.statements import get_sql
+from app.services.aio import analytics_service
+from app.services.analytics_service import LEADER_METRICS, LEADERS, leader_metrics, refresh_season_aggregates
+
+
+def test_leader_metrics_keeps_board_order_and_rejects_unknown():
+    assert leader_metrics(None) == tuple(LEADER_METRICS)
+    assert leader_metrics(["rebounds", "points"]) == ("points", "rebounds")
+    with pytest.raises(ValueError, match="dunks"):
+        leader_metrics(["points", "dunks"])
+
+
+def test_leaders_builds_every_board_from_one_statement(monkeypatch, fake_conn):
+    monkeypatch.setattr(analytics_service, "ANALYTICS_MATERIALIZED", False)
+    rows = [("points", 2, "B", 4, 30), ("points", 1, "A", 3, 20), ("rebounds", 1, "A", 3, 9)]
+    conn = fake_conn([rows], description=[("metric",), ("player_id",), ("name",), ("jersey_number",), ("value",)])
+
+    out = asyncio.run(analytics_service.leaders.uncached(conn, 2, ("points", "rebounds", "assists")))
+
+    ((sql, params),) = conn.executed
+    assert sql.endswith(get_sql(LEADERS)) and conn.prepared == [sql]
+    assert params == (["points", "rebounds", "assists"], 2)
+    assert list(out) == ["points", "rebounds", "assists"]
+    assert [r["player_id"] for r in out["points"]] == [2, 1]
+    assert out["rebounds"] == [{"player_id": 1, "name": "A", "jersey_number": 3, "value": 9}]
+    assert out["assists"] == []
+
+
+def test_leaders_rank_each_metric_against_postgres(pg_url, monkeypatch):
+    with psycopg.connect(pg_url) as setup:
+        setup.execute("INSERT INTO players (name, jersey_number) VALUES ('A', 3), ('B', 4), ('C', 5)")
+        setup.execute("INSERT INTO games (date, opponent) VALUES ('2024-01-05', 'Duke'), ('2024-01-09', 'Army')")
+        setup.execute(
+            """
+            INSERT INTO stat_line (player_id, game_id, minutes, points, rebounds) VALUES
+                (1, 1, 20, 10, 1), (1, 2, 20, 5, 2), (2, 1, 30, 15, 8), (3, 2, 35, 20, 0)
+            """
+        )
+        setup.commit()
+        refresh_season_aggregates(setup)
+
+    async def scenario():
+        async with await psycopg.AsyncConnection.connect(pg_url, autocommit=True) as conn:
+            return await analytics_service.leaders.uncached(conn, 2, ("points", "rebounds"))
+
+    for materialized in (False, True):
+        monkeypatch.setattr(analytics_service, "ANALYTICS_MATERIALIZED", materialized)
+        monkeypatch.setattr(analytics_service, "_view_missing", False)
+        out = asyncio.run(scenario())
+
+        # A and B tie on points; the lower player_id ranks first.
+        assert [(r["name"], r["value"]) for r in out["points"]] == [("C", 20), ("A", 15)]
+        assert [(r["name"], r["value"]) for r in out["rebounds"]] == [("B", 8), ("A", 3)]
+        assert analytics_service.season_refresh_stats()["materialized"] is materialized
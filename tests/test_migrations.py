@@ -0,0 +1,11 @@
+from app.db.migrations import ACCESS_PATH_INDEXES, STAT_LINE_INCLUDE_COLUMNS
+from app.db.statements import get_sql
+from app.services.player_stats_service import PLAYER_TOTALS, STAT_COLUMNS
+
+def test_partial_index_predicate_matches_player_queries():
+    # The planner only uses a partial index when the query repeats its predicate.
+    assert "WHERE COALESCE(minutes, 0) > 0" in ACCESS_PATH_INDEXES["stat_line_player_played_idx"]
+    assert "COALESCE(s.minutes, 0) > 0" in get_sql(PLAYER_TOTALS)
+
+def test_player_index_covers_every_stat_column():
+    assert set(STAT_COLUMNS) <= set(STAT_LINE_INCLUDE_COLUMNS)
@@ -0,0 +1,85 @@
+from datetime import date
+
+import psycopg
+import pytest
+
+from app.db import pagination
+from app.db.pagination import decode_cursor, encode_cursor, fetch_page, page_limit
+from app.db.statements import registered
+from app.services.game_service import GAMES_PAGER
+
+
+def test_cursor_round_trips_and_is_bound_to_its_sort():
+    cursor = encode_cursor("-date", date(2024, 1, 5), 42)
+
+    assert decode_cursor(cursor, "-date") == ("2024-01-05", 42)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "date")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "date")
+
+
+def test_limit_is_capped(monkeypatch):
+    monkeypatch.setattr(pagination, "PAGE_MAX_LIMIT", 50)
+
+    assert page_limit(None) is None
+    assert page_limit(None, "cursor") == 50
+    assert page_limit(10) == 10
+    assert page_limit(10_000) == 50
+
+
+def test_statement_follows_sort_direction_and_cursor():
+    statement, params = GAMES_PAGER.statement((None, None), None, None, 20)
+    assert statement == "games_page_date"
+    assert params == (None, None, 21)
+
+    cursor = encode_cursor("-opponent", "Central", 7)
+    statement, params = GAMES_PAGER.statement((None, None), "-opponent", cursor, 20)
+    sql, param_names = registered()[statement]
+    assert statement == "games_page_opponent_desc_after"
+    assert params == (None, None, "Central", 7, 21)
+    assert len(param_names) == len(params)
+    assert "(page.opponent, page.id) < (%s::text, %s::int)" in sql
+    assert "ORDER BY page.opponent DESC, page.id DESC" in sql
+
+    with pytest.raises(ValueError):
+        GAMES_PAGER.statement((None, None), "points", None, 20)
+
+
+def test_page_returns_next_cursor_only_past_the_limit():
+    rows = [{"id": i, "date": date(2024, 1, i), "opponent": "X"} for i in range(1, 4)]
+
+    assert GAMES_PAGER.page(rows, "date", 3).next_cursor is None
+    assert GAMES_PAGER.page(rows, "date", None) == (rows, None)
+    assert GAMES_PAGER.statement((None, None), None, None, None)[1] == (None, None, None)
+    page = GAMES_PAGER.page(rows, "date", 2)
+    assert [r["id"] for r in page.rows] == [1, 2]
+    assert decode_cursor(page.next_cursor, "date") == ("2024-01-02", 2)
+
+
+def test_keyset_pages_walk_every_row_once_against_postgres(pg_url):
+    games = [
+        (date(2024, 1, 5), "Duke"), (date(2024, 1, 5), "Army"), (date(2024, 1, 9), "Duke"),
+        (date(2024, 1, 2), "Navy"), (date(2024, 1, 9), "Army"), (date(2024, 1, 5), "Navy"),
+        (date(2024, 2, 1), "Army"),
+    ]
+    with psycopg.connect(pg_url) as conn:
+        conn.cursor().executemany("INSERT INTO games (date, opponent) VALUES (%s, %s)", games)
+        rows = [(i, *game) for i, game in enumerate(games, start=1)]
+
+        for sort, key in (("date", 1), ("opponent", 2)):
+            for descending in (False, True):
+                sort_name = f"-{sort}" if descending else sort
+                seen, cursor = [], None
+                while True:
+                    page = fetch_page(conn, GAMES_PAGER, (None, None), sort_name, cursor, limit=2)
+                    assert len(page.rows) <= 2
+                    seen += [row["id"] for row in page.rows]
+                    cursor = page.next_cursor
+                    if cursor is None:
+                        break
+                expected = sorted(rows, key=lambda r: (r[key], r[0]), reverse=descending)
+                assert seen == [r[0] for r in expected], sort_name
+
+        window = fetch_page(conn, GAMES_PAGER, (date(2024, 1, 5), date(2024, 1, 9)), "date", None, limit=10)
+        assert [row["id"] for row in window.rows] == [1, 2, 6, 3, 5]
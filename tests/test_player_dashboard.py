@@ -0,0 +1,66 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from app.services.aio import player_stats_service
+from app.services.player_stats_service import DASHBOARD_SECTIONS, build_dashboard, dashboard_sections
+
+
+def _line(game_id, opponent, location, minutes, points, rebounds=None):
+    line = {col: 0 for col in ("OREB", "assists", "steals", "blocks", "turnovers", "fouls",
+                               "FG", "FGA", "FG3", "FGA3", "FT", "FTA", "PM")}
+    line.update(game_id=game_id, date=f"2024-01-0{game_id}", opponent=opponent, location=location,
+                minutes=minutes, points=points, rebounds=rebounds)
+    return line
+
+
+GAME_LOG = [
+    _line(1, "Duke", "Home", Decimal("30.5"), 20, 5),
+    _line(2, "Army", "Away", Decimal("25"), 15),
+    _line(3, "Duke", "Neutral", Decimal("20.25"), 10, 6),
+    _line(4, "Navy", "Home", 0, 0, 0),
+]
+
+
+def test_dashboard_sections_keep_order_and_reject_unknown():
+    assert dashboard_sections(None) == DASHBOARD_SECTIONS
+    assert dashboard_sections(["totals", "player"]) == ("player", "totals")
+    with pytest.raises(ValueError, match="charts"):
+        dashboard_sections(["totals", "charts"])
+
+
+def test_dashboard_sections_match_the_sql_rules():
+    out = build_dashboard({"id": 7, "name": "A"}, GAME_LOG, DASHBOARD_SECTIONS)
+
+    assert len(out["game_log"]) == 4
+    assert out["totals"]["points"] == 45
+    assert out["totals"]["minutes"] == Decimal("75.75")
+    # AVG skips NULLs and ROUND rounds half away from zero.
+    assert out["averages"]["rebounds"] == Decimal("5.5")
+    assert out["averages"]["minutes"] == Decimal("25.25")
+    assert out["averages"]["points"] == Decimal("15.0")
+
+    location = out["splits_totals"]["location"]
+    assert [r["label"] for r in location] == ["Home", "Away"]
+    assert location[0]["points"] == 20 and location[1]["points"] == 15
+    opponents = out["splits_averages"]["opponents"]
+    assert [r["label"] for r in opponents] == ["Army", "Duke"]
+    assert opponents[1]["points"] == Decimal("15.0")
+
+
+def test_player_only_dashboard_skips_the_game_log_scan(monkeypatch):
+    batches = []
+
+    async def fake_run_batch(conn, *queries):
+        batches.append(len(queries))
+        return ({"id": 7},) if len(queries) == 1 else ({"id": 7}, GAME_LOG)
+
+    monkeypatch.setattr(player_stats_service, "run_batch", fake_run_batch)
+
+    only_player = asyncio.run(player_stats_service.get_player_dashboard.uncached(None, 7, None, None, ("player",)))
+    totals = asyncio.run(player_stats_service.get_player_dashboard.uncached(None, 7, None, None, ("totals",)))
+
+    assert batches == [1, 2]
+    assert only_player == {"player": {"id": 7}}
+    assert totals["totals"]["points"] == 45
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+from psycopg.pq import TransactionStatus
+
+import app.api.deps as deps
+from app.db.pool import pool_settings, pool_stats
+
+
+class FakeAsyncPool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.returned = []
+
+    async def getconn(self):
+        return self.conn
+
+    async def putconn(self, conn):
+        self.returned.append(conn)
+
+
+def _run_get_db(monkeypatch, pool, replica=None, method="GET"):
+    async def fake_get_async_pool():
+        return pool
+
+    async def fake_get_replica_pool():
+        return replica
+
+    monkeypatch.setattr(deps, "get_async_pool", fake_get_async_pool)
+    monkeypatch.setattr(deps, "get_replica_pool", fake_get_replica_pool)
+    request = SimpleNamespace(method=method, headers={})
+
+    async def run():
+        gen = deps.get_db(request)
+        conn = await gen.__anext__()
+        await gen.aclose()
+        return conn
+
+    return asyncio.run(run())
+
+def test_pool_settings_overrides():
+    settings = pool_settings(min_size=4, max_size=2)
+    assert settings["min_size"] == 4
+    assert settings["max_size"] == 4
+
+def test_get_db_rolls_back_open_transaction(monkeypatch, fake_conn):
+    conn = fake_conn()
+    conn.info.transaction_status = TransactionStatus.INTRANS
+    pool = FakeAsyncPool(conn)
+
+    assert _run_get_db(monkeypatch, pool) is conn
+
+    assert conn.rolled_back is True
+    assert pool.returned == [conn]
+    assert pool_stats()["acquires"] >= 1
+
+def test_get_db_returns_idle_connection_untouched(monkeypatch, fake_conn):
+    conn = fake_conn()
+    pool = FakeAsyncPool(conn)
+
+    _run_get_db(monkeypatch, pool)
+
+    assert conn.rolled_back is False
+    assert pool.returned == [conn]
+
+def test_reads_use_replica_when_configured(monkeypatch, fake_conn):
+    primary_conn = fake_conn()
+    replica_conn = fake_conn()
+    primary = FakeAsyncPool(primary_conn)
+    replica = FakeAsyncPool(replica_conn)
+
+    assert _run_get_db(monkeypatch, primary, replica) is replica_conn
+    assert replica.returned == [replica_conn]
@@ -0,0 +1,50 @@
+import gzip
+from datetime import date
+from decimal import Decimal
+
+from fastapi import FastAPI, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.api.compression import CompressionMiddleware, negotiate_encoding
+from app.api.responses import dumps, json_response
+
+
+def test_orjson_matches_jsonable_encoder_for_numeric_values():
+    rows = [{"gp": 3, "total_points": Decimal("41"), "avg_minutes": Decimal("31.25"), "date": date(2024, 1, 5)}]
+
+    assert dumps(rows) == b'[{"gp":3,"total_points":41,"avg_minutes":31.25,"date":"2024-01-05"}]'
+    assert jsonable_encoder(rows)[0]["total_points"] == 41
+
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding("gzip, br", ("br", "gzip")) == "br"
+    assert negotiate_encoding("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+    assert negotiate_encoding("*;q=0", ("gzip",)) is None
+    assert negotiate_encoding(None, ("gzip",)) is None
+
+
+def test_large_bodies_are_compressed_and_keep_route_headers():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/rows")
+    async def rows(response: Response, n: int):
+        response.headers["ETag"] = 'W/"v1"'
+        return json_response([{"id": i, "name": "Player"} for i in range(n)], response)
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(b"x" * 500), headers={"Content-Encoding": "gzip"})
+
+    client = TestClient(app)
+    big = client.get("/rows?n=50", headers={"Accept-Encoding": "gzip"})
+    assert big.headers["content-encoding"] == "gzip"
+    assert big.headers["etag"] == 'W/"v1"'
+    assert len(big.json()) == 50
+
+    small = client.get("/rows?n=1", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    passthrough = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert passthrough.content == b"x" * 500
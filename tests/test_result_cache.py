@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.services import result_cache
+from app.services.result_cache import ResultCache, TEAM_TAG, cached, player_tag, player_tags
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.store("a", 1, ())
+    cache.store("b", 2, ())
+    cache.lookup("a")
+    cache.store("c", 3, ())
+
+    assert cache.lookup("b")[0] is False
+    assert cache.lookup("a") == (True, 1, False)
+    assert cache.stats()["evictions"] == 1
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = ResultCache(max_entries=10, ttl=60)
+    cache.store("p1", "one", (player_tag(1),))
+    cache.store("p2", "two", (player_tag(2),))
+    cache.store("team", "all", (TEAM_TAG,))
+
+    assert cache.invalidate(player_tag(1), TEAM_TAG) == 2
+    assert cache.lookup("p1")[0] is False
+    assert cache.lookup("team")[0] is False
+    assert cache.lookup("p2") == (True, "two", False)
+
+def test_store_skips_results_computed_before_invalidation():
+    cache = ResultCache(max_entries=10, ttl=60)
+    snapshot = cache.snapshot((player_tag(1),))
+    cache.invalidate(player_tag(1))
+
+    assert cache.store("p1", "old", (player_tag(1),), snapshot) is False
+    assert cache.lookup("p1")[0] is False
+
+def test_expired_entry_is_served_stale_inside_window():
+    cache = ResultCache(max_entries=10, ttl=0, stale_seconds=60)
+    cache.store("k", "v", ())
+
+    assert cache.lookup("k") == (True, "v", True)
+    assert cache.stats()["stale_hits"] == 1
+
+def test_cached_function_refreshes_stale_entry_once_in_background(monkeypatch):
+    cache = ResultCache(max_entries=10, ttl=0, stale_seconds=60)
+    monkeypatch.setattr(result_cache, "result_cache", cache)
+    monkeypatch.setattr(result_cache, "CACHE_ENABLED", True)
+    calls = []
+
+    @asynccontextmanager
+    async def fake_connection():
+        yield "refresh-conn"
+
+    monkeypatch.setattr(result_cache, "refresh_connection", fake_connection)
+
+    @cached(tags=player_tags)
+    async def totals(conn, player_id, start=None, end=None):
+        calls.append(conn)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    async def scenario():
+        first = await totals("request-conn", 7)
+        stale = await asyncio.gather(totals("request-conn", player_id=7), totals("request-conn", 7))
+        await asyncio.sleep(0.01)
+        return first, stale
+
+    first, stale = asyncio.run(scenario())
+
+    assert first == 1
+    assert stale == [1, 1]
+    assert calls == ["request-conn", "refresh-conn"]
+    assert cache.stats()["refreshes"] == 1
+
+def test_memory_backend_does_not_store_replica_results(monkeypatch):
+    cache = ResultCache(max_entries=10, ttl=60)
+    monkeypatch.setattr(result_cache, "result_cache", cache)
+    monkeypatch.setattr(result_cache, "_backend", result_cache.MemoryBackend())
+    monkeypatch.setattr(result_cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(result_cache, "is_replica", lambda conn: conn == "replica-conn")
+    calls = []
+
+    @cached(tags=player_tags)
+    async def totals(conn, player_id):
+        calls.append(conn)
+        return len(calls)
+
+    async def scenario():
+        return [await totals(conn, 7) for conn in ("replica-conn", "replica-conn", "primary-conn", "replica-conn")]
+
+    assert asyncio.run(scenario()) == [1, 2, 3, 3]
+    assert calls == ["replica-conn", "replica-conn", "primary-conn"]
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.db import routing
+
+
+def test_write_pins_reads_until_replica_catches_up(fake_conn):
+    asyncio.run(routing.record_write("admin1", fake_conn([[("0/16B3748",)]])))
+    assert routing.pinned_lsn("admin1") == "0/16B3748"
+
+    assert asyncio.run(routing.replica_caught_up(fake_conn([[(False,)]]), "0/16B3748")) is False
+    assert asyncio.run(routing.replica_caught_up(fake_conn([[(True,)]]), "0/16B3748")) is True
+
+    routing.release_pin("admin1")
+    assert routing.pinned_lsn("admin1") is None
+
+def test_pin_expires(monkeypatch, fake_conn):
+    monkeypatch.setattr(routing, "STICKY_SECONDS", 0)
+    asyncio.run(routing.record_write("viewer1", fake_conn([[("0/1",)]])))
+    assert routing.pinned_lsn("viewer1") is None
+
+def test_anonymous_writes_are_not_pinned(fake_conn):
+    asyncio.run(routing.record_write(None, fake_conn([[("0/1",)]])))
+    assert routing.pinned_lsn(None) is None
+
+def test_expired_pins_are_dropped_on_insert(monkeypatch, fake_conn):
+    monkeypatch.setattr(routing, "STICKY_SECONDS", 0)
+    asyncio.run(routing.record_write("viewer2", fake_conn([[("0/1",)]])))
+    monkeypatch.setattr(routing, "STICKY_SECONDS", 10)
+    asyncio.run(routing.record_write("admin2", fake_conn([[("0/2",)]])))
+    assert "viewer2" not in routing._sticky
+    routing.release_pin("admin2")
+
+def test_only_requests_that_wrote_look_up_the_wal_position(monkeypatch, fake_conn):
+    from types import SimpleNamespace
+
+    from app.api import deps
+
+    async def no_pool():
+        return None
+
+    async def acquire(pool):
+        return fake_conn()
+
+    async def release(pool, conn):
+        pass
+
+    recorded = []
+
+    async def record(subject, conn):
+        recorded.append(subject)
+
+    replica = {"pool": None}
+
+    async def replica_pool():
+        return replica["pool"]
+
+    monkeypatch.setattr(deps, "get_async_pool", no_pool)
+    monkeypatch.setattr(deps, "get_replica_pool", replica_pool)
+    monkeypatch.setattr(deps, "acquire_async", acquire)
+    monkeypatch.setattr(deps, "release_async", release)
+    monkeypatch.setattr(deps, "record_write", record)
+    monkeypatch.setattr(deps, "_request_subject", lambda request: "admin3")
+
+    async def post(wrote):
+        gen = deps.get_db(SimpleNamespace(method="POST"))
+        await gen.__anext__()
+        if wrote:
+            routing.note_write()
+        with pytest.raises(StopAsyncIteration):
+            await gen.__anext__()
+
+    async def requests():
+        await post(wrote=True)
+        replica["pool"] = object()
+        await post(wrote=False)
+        await post(wrote=True)
+
+    asyncio.run(requests())
+    assert recorded == ["admin3"]
@@ -0,0 +1,33 @@
+import sqlite3
+from decimal import Decimal
+
+from app.db.rows import map_row, map_rows, row_mapper
+
+
+DESCRIPTION = [("player_id",), ("total_fg",), ("avg_oreb",), ("minutes",)]
+
+
+def test_rows_get_api_keys_and_plain_numbers(fake_conn):
+    row = map_row(fake_conn(description=DESCRIPTION).cursor(), (7, Decimal("41"), Decimal("2.5"), Decimal("31.25")))
+
+    assert row == {"player_id": 7, "total_FG": 41, "avg_OREB": 2.5, "minutes": 31.25}
+    assert type(row["total_FG"]) is int
+    assert row_mapper(tuple(DESCRIPTION)) is row_mapper(DESCRIPTION)
+
+
+def test_sqlite_rows_are_mapped():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT 3 AS fg3, 'Duke' AS opponent UNION ALL SELECT 1, 'Army'")
+
+    assert map_rows(cursor, cursor.fetchall()) == [{"FG3": 3, "opponent": "Duke"}, {"FG3": 1, "opponent": "Army"}]
+
+
+def test_mapped_rows_and_missing_rows_pass_through(fake_conn):
+    row = {"FG": 2}
+    cursor = fake_conn(description=DESCRIPTION).cursor()
+
+    assert map_row(cursor, row) is row
+    assert map_row(cursor, None) is None
+    assert map_rows(cursor, []) == []
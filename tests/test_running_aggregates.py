@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+
+import psycopg
+
+from app.db import aggregates
+from app.services.aio import player_stats_service
+from app.services.player_stats_service import (
+    PLAYER_AGGREGATE_TOTALS,
+    PLAYER_TOTALS,
+    player_stats_statement,
+)
+
+
+def test_unwindowed_reads_use_player_aggregates(monkeypatch):
+    monkeypatch.setattr(aggregates, "RUNNING_AGGREGATES_ENABLED", True)
+    monkeypatch.setattr(aggregates, "_tables_missing", False)
+    start = datetime.date(2025, 1, 1)
+
+    assert player_stats_statement(PLAYER_AGGREGATE_TOTALS, PLAYER_TOTALS, 7) == (PLAYER_AGGREGATE_TOTALS, (7,))
+    assert player_stats_statement(PLAYER_AGGREGATE_TOTALS, PLAYER_TOTALS, 7, start) == (PLAYER_TOTALS, (7, start, None))
+
+    monkeypatch.setattr(aggregates, "RUNNING_AGGREGATES_ENABLED", False)
+    assert player_stats_statement(PLAYER_AGGREGATE_TOTALS, PLAYER_TOTALS, 7) == (PLAYER_TOTALS, (7, None, None))
+
+
+def test_missing_tables_rerun_batch_against_stat_line(monkeypatch):
+    monkeypatch.setattr(aggregates, "RUNNING_AGGREGATES_ENABLED", True)
+    monkeypatch.setattr(aggregates, "_tables_missing", False)
+    built = []
+
+    async def fake_run_batch(conn, *queries):
+        if queries[0] == PLAYER_AGGREGATE_TOTALS:
+            raise psycopg.errors.UndefinedTable("relation \"player_aggregates\" does not exist")
+        return queries
+
+    def build():
+        statement, _ = player_stats_statement(PLAYER_AGGREGATE_TOTALS, PLAYER_TOTALS, 7)
+        built.append(statement)
+        return (statement,)
+
+    monkeypatch.setattr(aggregates, "run_batch", fake_run_batch)
+
+    assert asyncio.run(aggregates.run_aggregate_batch(None, build)) == (PLAYER_TOTALS,)
+    assert built == [PLAYER_AGGREGATE_TOTALS, PLAYER_TOTALS]
+    assert aggregates.use_running_aggregates() is False
+
+
+def test_drift_query_checks_one_partition():
+    sql = aggregates._drift_sql("player_aggregates")
+
+    assert sql.count("%s") == 4
+    assert "FULL JOIN (SELECT * FROM player_aggregates WHERE player_id %% %s = %s)" in sql
+    assert "IS DISTINCT FROM" in sql
+
+
+def test_triggers_keep_aggregates_in_step_against_postgres(pg_url):
+    with psycopg.connect(pg_url) as conn:
+        conn.execute("INSERT INTO players (name) VALUES ('A'), ('B')")
+        conn.execute("INSERT INTO games (date, opponent) VALUES ('2024-01-05', 'Duke'), ('2024-01-09', 'Army')")
+        conn.execute(
+            """
+            INSERT INTO stat_line (player_id, game_id, minutes, points, FG, PM) VALUES
+                (1, 1, 30.5, 20, 8, 4), (1, 2, 0, 3, 1, NULL), (2, 1, 12, NULL, 2, -6)
+            """
+        )
+        conn.execute("UPDATE stat_line SET minutes = 10, points = 7 WHERE player_id = 1 AND game_id = 2")
+        conn.execute("UPDATE stat_line SET minutes = 0 WHERE player_id = 2")
+        conn.execute("DELETE FROM stat_line WHERE player_id = 1 AND game_id = 1")
+        conn.commit()
+
+        assert aggregates.find_drift(conn, "player_aggregates") == []
+        assert aggregates.find_drift(conn, "game_team_totals") == []
+        rows = conn.execute("SELECT player_id, gp, points, PM FROM player_aggregates ORDER BY 1").fetchall()
+        assert rows == [(1, 1, 7, 0), (2, 0, 0, 0)]
+        assert conn.execute("SELECT game_id, lines, FG FROM game_team_totals ORDER BY 1").fetchall() == [
+            (1, 1, 2), (2, 1, 1),
+        ]
+
+        conn.execute("TRUNCATE stat_line")
+        assert conn.execute("SELECT count(*) FROM player_aggregates").fetchone() == (0,)
+
+
+def test_stored_and_windowed_averages_agree_on_null_stats_against_postgres(pg_url):
+    with psycopg.connect(pg_url) as setup:
+        setup.execute("INSERT INTO players (name) VALUES ('A')")
+        setup.execute("INSERT INTO games (date, opponent) VALUES ('2024-01-05', 'Duke'), ('2024-01-09', 'Army')")
+        setup.execute("INSERT INTO stat_line (player_id, game_id, minutes, points) VALUES (1, 1, 20, 9), (1, 2, 10, NULL)")
+
+    async def scenario():
+        async with await psycopg.AsyncConnection.connect(pg_url, autocommit=True) as conn:
+            stored = await player_stats_service.get_player_averages.uncached(conn, 1)
+            windowed = await player_stats_service.get_player_averages.uncached(conn, 1, datetime.date(2024, 1, 1))
+            splits = await player_stats_service.get_player_splits.uncached(conn, 1)
+            return stored, windowed, splits
+
+    stored, windowed, splits = asyncio.run(scenario())
+
+    assert stored == windowed
+    assert stored["points"] == 4.5 and stored["minutes"] == 15
+    assert splits["averages"]["overall"]["points"] == 4.5
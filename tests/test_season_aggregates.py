@@ -0,0 +1,63 @@
+import asyncio
+
+import psycopg
+
+from app.services.aio import analytics_service
+from app.services.analytics_service import PLAYER_ANALYTICS, PLAYER_ANALYTICS_MATERIALIZED
+
+
+def _fresh_refresh_state():
+    return {
+        "first_request": None,
+        "last_request": None,
+        "task": None,
+        "refreshes": 0,
+        "errors": 0,
+        "last_refresh_ms": None,
+    }
+
+
+def test_burst_of_writes_triggers_one_refresh(monkeypatch):
+    monkeypatch.setattr(analytics_service, "_refresh", _fresh_refresh_state())
+    monkeypatch.setattr(analytics_service, "ANALYTICS_MATERIALIZED", True)
+    monkeypatch.setattr(analytics_service, "_view_missing", False)
+    monkeypatch.setattr(analytics_service, "REFRESH_DEBOUNCE", 0.02)
+    monkeypatch.setattr(analytics_service, "REFRESH_MAX_DELAY", 5)
+    calls = []
+
+    async def fake_refresh():
+        calls.append(1)
+
+    monkeypatch.setattr(analytics_service, "refresh_season_aggregates", fake_refresh)
+
+    async def run():
+        for _ in range(5):
+            analytics_service.schedule_season_refresh()
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+
+    assert calls == [1]
+    assert analytics_service.season_refresh_stats()["pending"] is False
+
+
+def test_missing_view_falls_back_to_live_query(monkeypatch, fake_conn):
+    monkeypatch.setattr(analytics_service, "ANALYTICS_MATERIALIZED", True)
+    monkeypatch.setattr(analytics_service, "_view_missing", False)
+    executed = []
+
+    async def fake_aexecute(cursor, name, params=()):
+        executed.append(name)
+        if name == PLAYER_ANALYTICS_MATERIALIZED:
+            raise psycopg.errors.UndefinedTable("relation does not exist")
+        return cursor
+
+    monkeypatch.setattr(analytics_service, "aexecute", fake_aexecute)
+    call = analytics_service.player_totals_and_averages.uncached
+
+    asyncio.run(call(fake_conn(description=[("id",), ("name",)])))
+    asyncio.run(call(fake_conn(description=[("id",), ("name",)])))
+
+    assert executed == [PLAYER_ANALYTICS_MATERIALIZED, PLAYER_ANALYTICS, PLAYER_ANALYTICS]
+    assert analytics_service.season_refresh_stats()["materialized"] is False
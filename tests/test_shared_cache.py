@@ -0,0 +1,99 @@
+import asyncio
+from datetime import date
+
+from app.db.pagination import Page
+from app.services import result_cache, shared_cache
+from app.services.result_cache import TEAM_TAG, player_tag
+
+
+def _no_replica(monkeypatch):
+    async def no_replica():
+        return None
+
+    monkeypatch.setattr(shared_cache, "get_replica_pool", no_replica)
+
+
+def test_backend_is_chosen_by_setting(monkeypatch):
+    monkeypatch.setattr(result_cache, "_backend", None)
+    monkeypatch.setattr(result_cache, "CACHE_BACKEND", "postgres")
+    assert isinstance(result_cache.get_backend(), shared_cache.PostgresBackend)
+
+    monkeypatch.setattr(result_cache, "_backend", None)
+    monkeypatch.setattr(result_cache, "CACHE_BACKEND", "memory")
+    assert isinstance(result_cache.get_backend(), result_cache.MemoryBackend)
+
+def test_lookup_checks_team_tag_against_global_version(monkeypatch, fake_conn):
+    _no_replica(monkeypatch)
+    backend = shared_cache.PostgresBackend(ttl=60)
+    conn = fake_conn([[([4, 2], shared_cache.encode_value({"points": 10}), True)]])
+
+    found, value, stale, snapshot = asyncio.run(backend.lookup(conn, ("leaders", 5), (TEAM_TAG, player_tag(3))))
+
+    sql, params = conn.executed[0]
+    assert params[0] == ["global", "player:3"]
+    assert (found, value, stale, snapshot) == (True, {"points": 10}, False, [4, 2])
+
+def test_values_round_trip_as_json():
+    page = Page([{"game_id": 3, "date": date(2024, 1, 5), "points": 12}], "next")
+
+    assert shared_cache.decode_value(shared_cache.encode_value(page)) == Page(
+        [{"game_id": 3, "date": "2024-01-05", "points": 12}], "next"
+    )
+    assert shared_cache.decode_value(shared_cache.encode_value({"totals": {"PM": 4}})) == {"totals": {"PM": 4}}
+    assert shared_cache.decode_value(shared_cache.encode_value(None)) is None
+
+def test_miss_returns_versions_and_oversized_values_are_skipped(monkeypatch, fake_conn):
+    _no_replica(monkeypatch)
+    monkeypatch.setattr(shared_cache, "MAX_VALUE_BYTES", 64)
+    backend = shared_cache.PostgresBackend(ttl=60)
+    conn = fake_conn([[([7], None, None)]], rowcount=0)
+
+    found, _, _, snapshot = asyncio.run(backend.lookup(conn, ("totals", 1), (TEAM_TAG,)))
+    stored = asyncio.run(backend.store(conn, ("totals", 1), "x" * 500, (TEAM_TAG,), snapshot))
+
+    assert found is False and snapshot == [7]
+    assert stored is False
+    assert backend.stats()["oversized"] == 1
+    assert len(conn.executed) == 1
+
+def test_versions_come_from_the_computing_connection_with_a_replica(monkeypatch, fake_conn):
+    primary = fake_conn([[([9], None, None)]])
+    replica = fake_conn()
+
+    async def replica_pool():
+        return object()
+
+    async def get_pool():
+        return object()
+
+    async def acquire(pool):
+        return primary
+
+    async def release(pool, conn):
+        pass
+
+    async def replica_versions(conn, scopes):
+        assert conn is replica
+        return {scope: 8 for scope in scopes}
+
+    monkeypatch.setattr(shared_cache, "get_replica_pool", replica_pool)
+    monkeypatch.setattr(shared_cache, "get_async_pool", get_pool)
+    monkeypatch.setattr(shared_cache, "acquire_async", acquire)
+    monkeypatch.setattr(shared_cache, "release_async", release)
+    monkeypatch.setattr(shared_cache, "read_versions", replica_versions)
+    backend = shared_cache.PostgresBackend(ttl=60)
+
+    found, _, _, snapshot = asyncio.run(backend.lookup(replica, ("totals", 1), (TEAM_TAG,)))
+
+    assert found is False and snapshot is None
+    assert asyncio.run(backend.snapshot(replica, (TEAM_TAG,))) == [8]
+
+def test_entries_in_another_format_are_misses(monkeypatch, fake_conn):
+    _no_replica(monkeypatch)
+    backend = shared_cache.PostgresBackend(ttl=60)
+    conn = fake_conn([[([4], b"\x80\x04\x95not-json", True)]])
+
+    found, value, _, snapshot = asyncio.run(backend.lookup(conn, ("totals", 1), (TEAM_TAG,)))
+
+    assert (found, value, snapshot) == (False, None, [4])
+    assert backend.stats()["misses"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+
+import psycopg
+
+from app.db.rows import map_rows
+from app.db.statements import get_sql
+from app.services.aio import player_stats_service, team_stats_service
+from app.services.player_stats_service import PLAYER_SPLITS, STAT_COLUMNS
+from app.services.split_service import LOCATION_SET, OPPONENT_SET, OVERALL_SET, shape_splits, split_view
+from app.services.team_stats_service import TEAM_SPLITS
+
+
+def _cols():
+    return ["split_set", "label", *[f"total_{c.lower()}" for c in STAT_COLUMNS], *[f"avg_{c.lower()}" for c in STAT_COLUMNS]]
+
+
+def _row(split_set, label, total, avg):
+    return (split_set, label, *[total] * len(STAT_COLUMNS), *[avg] * len(STAT_COLUMNS))
+
+
+ROWS = [
+    _row(LOCATION_SET, "Away", 10, 5),
+    _row(LOCATION_SET, "Neutral", 4, 4),
+    _row(OPPONENT_SET, "Army", 6, 3),
+    _row(OPPONENT_SET, "Duke", 8, 8),
+    _row(OVERALL_SET, None, 14, 4.5),
+]
+
+
+def test_statements_use_one_grouping_sets_scan():
+    for statement in (PLAYER_SPLITS, TEAM_SPLITS):
+        assert "GROUPING SETS ((), (g.location), (g.opponent))" in get_sql(statement)
+
+
+def test_rows_are_shaped_into_the_split_responses(fake_conn):
+    cursor = fake_conn(description=[(c,) for c in _cols()]).cursor()
+    splits = shape_splits(map_rows(cursor, ROWS), STAT_COLUMNS)
+
+    totals = split_view(splits, "totals")
+    assert [r["label"] for r in totals["location"]] == ["Home", "Away"]
+    assert totals["location"][0] == {"label": "Home", **{c: 0 for c in STAT_COLUMNS}}
+    assert totals["location"][1]["OREB"] == 10
+    assert [r["label"] for r in totals["opponents"]] == ["Army", "Duke"]
+    assert split_view(splits, "averages")["opponents"][0]["points"] == 3
+    assert splits["totals"]["overall"]["PM"] == 14
+    assert splits["averages"]["overall"]["minutes"] == 4.5
+
+
+def test_team_splits_are_one_query(monkeypatch, fake_conn):
+    calls = []
+    conn = fake_conn([ROWS], description=[(c,) for c in _cols()])
+
+    async def fake_run_batch(conn, *queries):
+        calls.append([q.statements for q in queries])
+        return [await q.shape([await conn.cursor().execute(*q.statements[0])]) for q in queries]
+
+    monkeypatch.setattr(team_stats_service, "run_batch", fake_run_batch)
+
+    splits = asyncio.run(team_stats_service.get_team_splits.uncached(conn))
+    totals, averages = split_view(splits, "totals"), split_view(splits, "averages")
+
+    assert calls == [[((TEAM_SPLITS, (None, None)),)]]
+    assert totals["location"][1]["points"] == 10
+    assert averages["location"][1]["points"] == 5
+
+
+def test_player_splits_against_postgres(pg_url):
+    with psycopg.connect(pg_url) as setup:
+        setup.execute("INSERT INTO players (name) VALUES ('A')")
+        setup.execute(
+            """
+            INSERT INTO games (date, opponent, location) VALUES
+                ('2024-01-05', 'Duke', 'Home'), ('2024-01-09', 'Army', 'Away'), ('2024-02-01', 'Duke', NULL)
+            """
+        )
+        setup.execute(
+            "INSERT INTO stat_line (player_id, game_id, minutes, points) VALUES (1, 1, 20, 10), (1, 2, 25, 6), (1, 3, 30, 4)"
+        )
+
+    async def scenario():
+        async with await psycopg.AsyncConnection.connect(pg_url, autocommit=True) as conn:
+            return await player_stats_service.get_player_splits.uncached(conn, 1)
+
+    splits = asyncio.run(scenario())
+    totals, averages = split_view(splits, "totals"), split_view(splits, "averages")
+
+    assert [(r["label"], r["points"]) for r in totals["location"]] == [("Home", 10), ("Away", 6)]
+    assert [(r["label"], r["points"]) for r in totals["opponents"]] == [("Army", 6), ("Duke", 14)]
+    assert splits["totals"]["overall"]["points"] == 20
+    assert averages["opponents"][1]["points"] == 7
+    assert splits["averages"]["overall"]["minutes"] == 25
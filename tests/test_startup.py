@@ -0,0 +1,39 @@
+import asyncio
+import subprocess
+import sys
+
+import psycopg
+import pytest
+
+from app.db import schema
+from app.db.security import InvalidToken, create_access_token, decode_token
+
+
+def test_current_schema_skips_ddl(fake_conn):
+    conn = fake_conn([[(schema.SCHEMA_VERSION,)]])
+
+    assert asyncio.run(schema.ensure_schema(conn)) is False
+    assert conn.statements == ["SELECT version FROM schema_version"]
+
+
+def test_missing_or_older_schema_runs_ddl_and_records_version(fake_conn):
+    missing = psycopg.errors.UndefinedTable('relation "schema_version" does not exist')
+    for version in (missing, [(schema.SCHEMA_VERSION - 1,)]):
+        conn = fake_conn([version])
+
+        assert asyncio.run(schema.ensure_schema(conn)) is True
+        assert conn.statements[-len(schema.SCHEMA_DDL) - 2:-2] == list(schema.SCHEMA_DDL)
+        assert conn.statements[-1] == schema.RECORD_SCHEMA_VERSION_SQL
+        assert conn.transactions == 1
+
+
+def test_auth_libraries_load_on_first_use():
+    out = subprocess.run(
+        [sys.executable, "-c", "import sys, app.api.app; print('jose' in sys.modules, 'passlib' in sys.modules)"],
+        check=True, capture_output=True, text=True,
+    )
+    assert out.stdout.split() == ["False", "False"]
+
+    assert decode_token(create_access_token({"sub": "coach"}))["sub"] == "coach"
+    with pytest.raises(InvalidToken):
+        decode_token("not-a-token")
@@ -0,0 +1,43 @@
+import asyncio
+
+from app.db import statements
+from app.services.player_stats_service import PLAYER_TOTALS
+
+
+def test_hot_queries_are_registered_at_import():
+    sql, params = statements.registered()[PLAYER_TOTALS]
+    assert "FROM stat_line s" in sql
+    assert params == ("player_id", "start", "end")
+
+def test_execute_runs_plain_sql_on_sqlite(db_conn):
+    name = statements.register("test_select_one", "SELECT 1 AS one")
+    cursor = db_conn.cursor()
+    statements.execute(cursor, name)
+    assert cursor.fetchone()[0] == 1
+
+def test_aexecute_prepares_and_tracks_hits_per_connection(fake_conn):
+    name = statements.register("test_async_select", "SELECT 1")
+    conn = fake_conn()
+    cursor = conn.cursor()
+
+    asyncio.run(statements.aexecute(cursor, name))
+    asyncio.run(statements.aexecute(cursor, name))
+
+    assert conn.prepared == conn.statements
+    stats = [c for c in statements.statement_stats()["connections"] if c["connection"] == id(conn)][0]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+def test_invalidate_changes_statement_text(fake_conn):
+    name = statements.register("test_invalidate", "SELECT 1")
+    conn = fake_conn()
+    cursor = conn.cursor()
+
+    asyncio.run(statements.aexecute(cursor, name))
+    statements.invalidate()
+    asyncio.run(statements.aexecute(cursor, name))
+
+    first_sql, second_sql = conn.statements
+    assert first_sql != second_sql
+    stats = [c for c in statements.statement_stats()["connections"] if c["connection"] == id(conn)][0]
+    assert stats["misses"] == 2
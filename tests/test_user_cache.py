@@ -0,0 +1,82 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import auth_deps
+from app.db.security import create_access_token
+from app.services import user_cache
+from app.services.user_service import set_user_role
+
+
+@pytest.fixture()
+def users(monkeypatch):
+    """
+    Stubs the users table behind get_current_user and counts connections.
+    """
+    monkeypatch.setattr(user_cache, "USER_CACHE_ENABLED", True)
+    user_cache.clear_user_cache()
+    table = {"coach": {"id": 1, "username": "coach", "password_hash": "x", "role": "admin", "token_version": 0}}
+    opened = []
+
+    @asynccontextmanager
+    async def fake_connection():
+        opened.append(1)
+        yield None
+
+    async def fake_lookup(conn, username):
+        row = table.get(username)
+        return dict(row) if row else None
+
+    monkeypatch.setattr(auth_deps, "user_connection", fake_connection)
+    monkeypatch.setattr(auth_deps, "get_user_by_username", fake_lookup)
+    yield table, opened
+    user_cache.clear_user_cache()
+
+
+def _current_user(token):
+    return asyncio.run(auth_deps.get_current_user(token))
+
+
+def test_cache_hit_opens_no_connection(users):
+    _, opened = users
+    token = create_access_token({"sub": "coach", "role": "admin", "ver": 0})
+
+    first = _current_user(token)
+    second = _current_user(token)
+
+    assert opened == [1]
+    assert second["role"] == "admin"
+    assert "password_hash" not in first
+
+def test_role_change_revokes_old_tokens(users):
+    table, _ = users
+    old_token = create_access_token({"sub": "coach", "role": "admin", "ver": 0})
+    _current_user(old_token)
+
+    table["coach"].update(role="viewer", token_version=1)
+    user_cache.forget_user("coach")
+
+    with pytest.raises(HTTPException) as exc:
+        _current_user(old_token)
+    assert exc.value.status_code == 401
+
+    new_token = create_access_token({"sub": "coach", "role": "viewer", "ver": 1})
+    assert _current_user(new_token)["role"] == "viewer"
+
+def test_newer_token_refreshes_stale_entry(users):
+    table, opened = users
+    _current_user(create_access_token({"sub": "coach", "ver": 0}))
+    table["coach"]["token_version"] = 1
+
+    user = _current_user(create_access_token({"sub": "coach", "ver": 1}))
+
+    assert user["token_version"] == 1
+    assert len(opened) == 2
+
+def test_set_user_role_drops_cached_user(users, fake_conn):
+    user_cache.cache_user({"username": "coach", "role": "admin", "token_version": 0})
+
+    assert set_user_role(fake_conn(sync=True), "coach", "viewer") is True
+    assert user_cache.get_cached_user("coach") is None